@@ -0,0 +1,407 @@
+"""Benchmarks for the host-side hot paths.
+
+Run from the repository root::
+
+    python -m benchmarks.bench --output results.json
+    python -m benchmarks.bench --baseline results.json
+
+Every result is recorded as seconds-per-operation, so lower is always better
+and a single relative ``--threshold`` can flag regressions across all cases.
+"""
+import asyncio
+import json
+import platform
+import statistics
+import subprocess  # nosec
+import sys
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+from itertools import product
+from math import pi, sin
+from pathlib import Path
+from time import perf_counter, sleep
+from typing import Callable, Dict, Optional
+
+import typer
+from rich.console import Console
+from rich.markup import escape
+from textual import events
+from textual.driver import Driver
+from textual.geometry import Size
+
+import magnetometer.asciichartpy as acp
+import magnetometer.tui as tui
+from magnetometer import __version__
+from magnetometer.emulation import EMULATED_PORT, Chip
+from magnetometer.pipeline import PipelinedRead
+from magnetometer.sensors import get_sensor
+
+app = typer.Typer()
+
+WIDTHS = (80, 160, 320)
+HEIGHTS = (10, 30, 60)
+SERIES_COUNTS = (1, 5)
+
+
+def timeit(func: Callable[[], object], repeat: int = 5, min_time: float = 0.2) -> dict:
+    """Time ``func``, auto-scaling the number of loops per repeat.
+
+    Returns
+    -------
+    dict
+        ``min``/``median``/``max`` seconds per call, and the loop count used.
+    """
+    # Calibrate so that each repeat takes roughly ``min_time`` seconds.
+    loops = 1
+    while True:
+        t_start = perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = perf_counter() - t_start
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else max(2, int(min_time / elapsed))
+
+    timings = []
+    for _ in range(repeat):
+        t_start = perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((perf_counter() - t_start) / loops)
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "max": max(timings),
+        "loops": loops,
+    }
+
+
+def make_sensor():
+    return get_sensor("sin")(None, sda=0, scl=1)
+
+
+def make_chart(width: int, height: int, fill: bool = True) -> tui.Chart:
+    tui.sensor = make_sensor()
+    chart = tui.Chart()
+    chart.width, chart.height = width, height
+    if fill:
+        for _ in range(chart.history.maxlen):
+            chart.read_sensor()
+    return chart
+
+
+def make_series(width: int, n_series: int) -> list:
+    return [
+        [100 * sin(2 * pi * (i / 50 + j / n_series)) for i in range(width)]
+        for j in range(n_series)
+    ]
+
+
+def bench_plot(results: dict) -> None:
+    for width, height, n_series in product(WIDTHS, HEIGHTS, SERIES_COUNTS):
+        series = make_series(width, n_series)
+        cfg = {"offset": 2, "height": height, "colors": ["red", "green", "blue"]}
+        name = f"plot[w={width},h={height},series={n_series}]"
+        results[name] = timeit(lambda: acp.plot(series, cfg))
+
+
+def bench_chart_render(results: dict) -> None:
+    for width, height in product(WIDTHS, HEIGHTS):
+        chart = make_chart(width, height)
+        console = Console(
+            file=StringIO(), width=width, height=height, force_terminal=True
+        )
+
+        def render():
+            # Include Rich's markup parsing/segmentation, not just ``acp.plot``.
+            console.file.seek(0)
+            console.file.truncate()
+            console.print(chart.render())
+
+        results[f"chart_render[w={width},h={height}]"] = timeit(render)
+
+
+def bench_read_sensor(results: dict) -> None:
+    chart = make_chart(80, 24, fill=False)
+    chart.zero_x_val, chart.zero_y_val, chart.zero_z_val = 0.1, 0.2, 0.3
+    results["read_sensor"] = timeit(chart.read_sensor)
+
+
+def bench_pipeline(results: dict, device_time: float = 0.005) -> None:
+    """Per-sample time of reading and rendering, with and without pipelining.
+
+    The device is simulated by a read that sleeps for ``device_time`` seconds,
+    releasing the GIL like a real serial round trip does.
+    """
+    chart = make_chart(80, 10)
+    console = Console(file=StringIO(), width=80, height=10, force_terminal=True)
+    read = tui.sensor.read
+
+    def slow_read(*args, **kwargs):
+        sleep(device_time)
+        return read(*args, **kwargs)
+
+    def step():
+        chart.read_sensor()
+        console.file.seek(0)
+        console.file.truncate()
+        console.print(chart.render())
+
+    for depth in (1, 2, 3):
+        tui.pipeline = PipelinedRead(slow_read, depth)
+        try:
+            results[f"pipeline[depth={depth}]"] = timeit(step)
+        finally:
+            tui.pipeline.close()
+            tui.pipeline = None
+
+
+class HeadlessDriver(Driver):
+    """Textual driver without a terminal.
+
+    The app's console size follows Rich's defaults, i.e. the ``COLUMNS`` and
+    ``LINES`` environment variables, or 80x25.
+    """
+
+    def start_application_mode(self) -> None:
+        size = Size(*self.console.size)
+        asyncio.run_coroutine_threadsafe(
+            self._target.post_message(events.Resize(self._target, size)),
+            loop=self._loop,
+        )
+
+    def disable_input(self) -> None:
+        pass
+
+    def stop_application_mode(self) -> None:
+        pass
+
+
+def bench_app(results: dict, duration: float = 3.0) -> None:
+    """End-to-end samples/sec through ``MagnetometerApp`` with the ``Sin`` sensor.
+
+    The read timer is replaced by a loop that reads again as soon as the previous
+    sample has been drawn, so the measured rate is bound by host-side processing
+    and rendering.
+    """
+    tui.sensor = make_sensor()
+    samples = 0
+    frames = 0
+    elapsed = 0.0
+
+    class BenchApp(tui.MagnetometerApp):
+        async def on_mount(self) -> None:
+            # Textual dispatches ``on_mount`` along the whole MRO, so
+            # ``MagnetometerApp.on_mount`` still docks the chart after this.
+            self.drive_task = asyncio.get_event_loop().create_task(self.drive())
+
+        async def drive(self) -> None:
+            nonlocal samples, elapsed
+            # Let the initial layout and resize settle.
+            await asyncio.sleep(0.2)
+
+            render = self.chart.render
+
+            def counted_render():
+                nonlocal frames
+                frames += 1
+                return render()
+
+            self.chart.render = counted_render
+
+            t_start = perf_counter()
+            while (elapsed := perf_counter() - t_start) < duration:
+                self.chart.read_sensor()
+                samples += 1
+                # Wait until the new sample has actually been drawn.
+                drawn = frames
+                while frames == drawn:
+                    await asyncio.sleep(0)
+            await self.shutdown()
+
+    interval = tui.Chart.interval
+    tui.Chart.interval = 3600  # Reads are driven by ``BenchApp.drive`` instead.
+    try:
+        with redirect_stdout(StringIO()):
+            BenchApp.run(driver=HeadlessDriver)
+    finally:
+        tui.Chart.interval = interval
+
+    per_sample = elapsed / samples
+    results["app_e2e"] = {
+        "min": per_sample,
+        "median": per_sample,
+        "max": per_sample,
+        "loops": samples,
+        "samples_per_sec": samples / elapsed,
+    }
+
+
+def bench_driver(results: dict, samples: int = 100) -> None:
+    """Vendored driver hot paths, running against emulated chips.
+
+    ``driver_magnetic`` times ``sensor.magnetic`` on the emulated board and
+    reports its I2C traffic and peak allocation per sample.
+    ``emulated_read`` times a whole single-sample ``Sensor.read`` through Belay.
+    """
+    for name in Chip:
+        sensor = get_sensor(name)(EMULATED_PORT, sda=0, scl=1)
+        try:
+            device_sensor = sensor._board.namespace["sensor"]
+            chip = sensor._board.chips[Chip[name].address]
+
+            def magnetic():
+                return device_sensor.magnetic
+
+            result = timeit(magnetic)
+
+            transactions, written, read = (
+                chip.transactions,
+                chip.bytes_written,
+                chip.bytes_read,
+            )
+            for _ in range(samples):
+                magnetic()
+            result["transactions_per_sample"] = (
+                chip.transactions - transactions
+            ) / samples
+            result["bytes_per_sample"] = (
+                chip.bytes_written + chip.bytes_read - written - read
+            ) / samples
+
+            tracemalloc.start()
+            try:
+                magnetic()
+                result["peak_alloc_bytes"] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+            results[f"driver_magnetic[{name}]"] = result
+            results[f"emulated_read[{name}]"] = timeit(lambda: sensor.read(samples=1))
+        finally:
+            sensor.close()
+
+
+IMPORTS = {
+    "python": "pass",
+    "magnetometer": "import magnetometer",
+    "sensor": "from magnetometer.sensors import get_sensor; get_sensor('lis3mdl')",
+    "cli": "import magnetometer.main",
+    "tui": "import magnetometer.tui",
+}
+
+
+def bench_import(results: dict) -> None:
+    """Cold-start time of a fresh interpreter importing each entry point.
+
+    ``import_time[python]`` is the bare interpreter startup, for reference.
+    ``modules`` counts the modules loaded, e.g. to spot an eager Textual import.
+    """
+    for name, statement in IMPORTS.items():
+        command = [sys.executable, "-c", statement]
+        result = timeit(lambda: subprocess.run(command, check=True))  # nosec
+        result["modules"] = int(
+            subprocess.run(  # nosec
+                [
+                    sys.executable,
+                    "-c",
+                    f"{statement}; import sys; print(len(sys.modules))",
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        )
+        results[f"import_time[{name}]"] = result
+
+
+BENCHMARKS: Dict[str, Callable[[dict], None]] = {
+    "plot": bench_plot,
+    "chart_render": bench_chart_render,
+    "read_sensor": bench_read_sensor,
+    "pipeline": bench_pipeline,
+    "app": bench_app,
+    "driver": bench_driver,
+    "import": bench_import,
+}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Compare ``results`` against ``baseline`` medians.
+
+    Returns
+    -------
+    list
+        ``(name, baseline, current, ratio)`` for every case slower than
+        ``1 + threshold`` times its baseline.
+    """
+    regressions = []
+    console = Console()
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+        ratio = current["median"] / baseline[name]["median"]
+        color = "red" if ratio > 1 + threshold else "green"
+        console.print(f"[{color}]{ratio:6.2f}x[/] {escape(name)}")
+        if ratio > 1 + threshold:
+            regressions.append(
+                (name, baseline[name]["median"], current["median"], ratio)
+            )
+    return regressions
+
+
+@app.command()
+def main(
+    only: Optional[str] = typer.Option(
+        None, help=f"Comma-separated subset of {{{','.join(BENCHMARKS)}}}."
+    ),
+    output: Optional[Path] = typer.Option(
+        None, help="Write machine-readable JSON results here."
+    ),
+    baseline: Optional[Path] = typer.Option(
+        None, help="Previously saved JSON results to compare against."
+    ),
+    threshold: float = typer.Option(
+        0.10, help="Relative slowdown vs baseline that counts as a regression."
+    ),
+):
+    selected = only.split(",") if only else list(BENCHMARKS)
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        raise typer.BadParameter(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    results = {}
+    for name in selected:
+        BENCHMARKS[name](results)
+
+    for name, result in results.items():
+        print(f"{result['median'] * 1e6:12.1f} µs  {name}")
+
+    report = {
+        "meta": {
+            "magnetometer": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+    if output:
+        output.write_text(json.dumps(report, indent=2))
+
+    if baseline:
+        regressions = compare(
+            results, json.loads(baseline.read_text())["results"], threshold
+        )
+        if regressions:
+            print(
+                f"{len(regressions)} benchmark(s) regressed by more than {threshold:.0%}."
+            )
+            raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    sys.exit(app())
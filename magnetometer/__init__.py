@@ -3,6 +3,18 @@ __version__ = "0.0.0"
 
 __all__ = [
     "Sensor",
+    "stream",
 ]
 
-from .sensors import Sensor
+
+def __getattr__(name: str):
+    # Imported on first use, so ``import magnetometer`` stays cheap.
+    if name == "Sensor":
+        from .sensors import Sensor
+
+        return Sensor
+    if name == "stream":
+        from .streaming import stream
+
+        return stream
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,251 @@
+"""Sensor acquisition in its own process, publishing to a ``SampleRing``.
+
+Keeping device I/O out of the UI process means rendering can't hold the GIL
+while a read is due.
+"""
+
+import multiprocessing
+import signal
+from multiprocessing.connection import Connection
+from time import monotonic, perf_counter_ns
+from typing import Optional, Sequence
+
+from magnetometer.clock import ClockSync
+from magnetometer.ring import SampleRing
+
+__all__ = [
+    "AcquisitionProcess",
+    "acquire",
+    "acquire_array",
+]
+
+
+def acquire(
+    sensor,
+    ring: SampleRing,
+    stop,
+    samples: int = 16,
+    interval: float = 0.1,
+    controller=None,
+) -> None:
+    """Read ``sensor`` into ``ring`` every ``interval`` seconds until ``stop`` is set.
+
+    Parameters
+    ----------
+    sensor: Sensor
+        Initialized sensor.
+    ring: SampleRing
+        Ring to append records to.
+    stop: multiprocessing.Event
+        Set to end acquisition.
+    samples: int
+        Samples averaged per reading, unless ``controller`` is given.
+    interval: float
+        Seconds between the starts of consecutive reads, unless ``controller``
+        is given.
+    controller: Optional[OversamplingController]
+        Adapts ``samples`` and ``interval`` to a requested rate or noise.
+    """
+    scale = 0
+    clock = ClockSync()
+    next_read = monotonic()
+    while not stop.is_set():
+        if controller is not None:
+            samples = controller.samples
+        t_start = perf_counter_ns()
+        x, y, z, device_ns, started, sequence = sensor.read(
+            scale, samples=samples, timed=True
+        )
+        t_end = perf_counter_ns()
+        round_trip_ns = t_end - t_start
+        # Stamp the middle of the on-device averaging.
+        sampled = started + device_ns // 2
+        clock.add(sampled, t_start, t_end)
+        t = clock.time(sampled)
+        ring.append((t, x, y, z, device_ns, round_trip_ns, samples, sequence))
+
+        scale = sensor.autorange(scale, (x, y, z))
+        if controller is not None:
+            controller.update((x, y, z), samples, round_trip_ns)
+            interval = controller.interval
+
+        next_read = _wait(stop, next_read + interval)
+
+
+def acquire_array(
+    array,
+    rings: Sequence[SampleRing],
+    stop,
+    samples: int = 16,
+    interval: float = 0.1,
+) -> None:
+    """Like ``acquire``, for a ``SensorArray``, one ring per member.
+
+    All members are read in one round trip, so their records share the
+    timing fields.
+    """
+    scales = [0] * len(rings)
+    clock = ClockSync()
+    next_read = monotonic()
+    while not stop.is_set():
+        t_start = perf_counter_ns()
+        *values, device_ns, started, sequence = array.read_all(
+            scales, samples=samples, timed=True
+        )
+        t_end = perf_counter_ns()
+        sampled = started + device_ns // 2
+        clock.add(sampled, t_start, t_end)
+        t = clock.time(sampled)
+        readings = [values[i : i + 3] for i in range(0, len(values), 3)]
+        for ring, (x, y, z) in zip(rings, readings):
+            ring.append((t, x, y, z, device_ns, t_end - t_start, samples, sequence))
+        scales = array.autorange_all(scales, readings)
+        next_read = _wait(stop, next_read + interval)
+
+
+def _wait(stop, next_read: float) -> float:
+    """Wait for ``monotonic()`` time ``next_read``; returns the time waited for."""
+    delay = next_read - monotonic()
+    if delay > 0:
+        stop.wait(delay)
+        return next_read
+    # Running behind; don't try to catch up with a burst of reads.
+    return monotonic()
+
+
+def _run(
+    connection: Connection,
+    stop,
+    ring_name: str,
+    sensor_name: str,
+    port: str,
+    sensor_kwargs: dict,
+    samples: int,
+    interval: float,
+    rate: Optional[float],
+    noise: Optional[float],
+) -> None:
+    from magnetometer.sensors import get_sensor
+
+    # Ctrl-C reaches the whole process group; the parent stops acquisition
+    # through ``stop``, so the sensor is closed after a complete read.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    ring = SampleRing.attach(ring_name)
+    try:
+        try:
+            sensor = get_sensor(sensor_name)(port, **sensor_kwargs)
+        except Exception as e:
+            connection.send(e)
+            return
+        connection.send(None)
+
+        controller = None
+        if rate or noise:
+            from magnetometer.oversampling import OversamplingController
+
+            controller = OversamplingController(rate, noise, samples=samples)
+        try:
+            acquire(sensor, ring, stop, samples, interval, controller)
+        finally:
+            sensor.close()
+    finally:
+        ring.close()
+
+
+class AcquisitionProcess:
+    """Owns the sensor and a ``SampleRing`` it fills from a child process.
+
+    Parameters
+    ----------
+    sensor_name: str
+        Sensor registry name, e.g. ``"lis3mdl"``.
+    port: str
+        Board port.
+    samples: int
+        Samples averaged per reading, unless ``rate`` or ``noise`` is given.
+    interval: float
+        Seconds between reads, unless ``rate`` or ``noise`` is given.
+    rate: Optional[float]
+        See ``OversamplingController``.
+    noise: Optional[float]
+        See ``OversamplingController``.
+    ring_name: Optional[str]
+        Shared memory name, for other processes to ``SampleRing.attach`` to.
+        Random if not given.
+    capacity: int
+        Records held by the ring.
+    **sensor_kwargs
+        Passed to the sensor's constructor, e.g. ``sda`` and ``scl``.
+    """
+
+    def __init__(
+        self,
+        sensor_name: str,
+        port: str,
+        *,
+        samples: int = 16,
+        interval: float = 0.1,
+        rate: Optional[float] = None,
+        noise: Optional[float] = None,
+        ring_name: Optional[str] = None,
+        capacity: int = 4096,
+        **sensor_kwargs,
+    ):
+        self.ring = SampleRing.create(capacity, ring_name)
+        # Spawn, so the child doesn't inherit the parent's threads or serial port.
+        context = multiprocessing.get_context("spawn")
+        self._stop = context.Event()
+        self._connection, self._child_connection = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=_run,
+            args=(
+                self._child_connection,
+                self._stop,
+                self.ring.name,
+                sensor_name,
+                port,
+                sensor_kwargs,
+                samples,
+                interval,
+                rate,
+                noise,
+            ),
+            name="magnetometer-acquisition",
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        """Start acquiring, once the sensor is initialized.
+
+        Raises the child's exception if the sensor fails to initialize.
+        """
+        self.process.start()
+        # Only the child's copy stays open, so its exit is seen as EOF.
+        self._child_connection.close()
+        try:
+            error = self._connection.recv()
+        except EOFError:
+            self.process.join()
+            error = RuntimeError(
+                f"Acquisition process exited with code {self.process.exitcode}."
+            )
+        if error is not None:
+            self.process.join()
+            self.ring.close()
+            raise error
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the child process and free the ring."""
+        self._stop.set()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.ring.close()
+
+    def __enter__(self) -> "AcquisitionProcess":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,345 @@
+"""Acquire from several boards at once onto one timeline.
+
+::
+
+    from magnetometer.boards import BoardSet
+
+    boards = [{"port": "/dev/ttyACM0"}, {"port": "/dev/ttyACM1", "sensors": ["tlv493d"]}]
+    with BoardSet(boards, interval=0.02) as board_set:
+        while True:
+            times, fields = board_set.read()  # (n,), (n, channels, 3)
+
+Each board is opened and read on its own thread with
+``magnetometer.acquisition.acquire``, one ``SampleRing`` per sensor. Reads
+mostly wait on the serial link, so the threads overlap rather than contend
+for the GIL. Every reading is stamped on the host clock by its board's
+``ClockSync``, and ``Timeline`` resamples all channels onto one time grid.
+If the boards give their sensors' ``positions``, ``BoardSet.gradient`` fits
+the field and its gradient across all channels.
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from magnetometer.acquisition import acquire, acquire_array
+from magnetometer.calibration import Calibration
+from magnetometer.gradient import Gradient
+from magnetometer.ring import FIELDS, SampleRing
+
+__all__ = [
+    "BoardSet",
+    "Timeline",
+    "load_boards",
+    "parse_board",
+]
+
+
+def parse_board(spec: str) -> dict:
+    """Board from ``PORT`` or ``PORT=SENSOR[,SENSOR...]``.
+
+    Sensors are registry names, optionally with an I2C address as for
+    ``SensorArray``, e.g. ``/dev/ttyACM0=lis3mdl,lis3mdl@0x1E``.
+    """
+    port, _, sensors = spec.partition("=")
+    board: dict = {"port": port}
+    if sensors:
+        board["sensors"] = sensors.split(",")
+    return board
+
+
+def load_boards(path: Path) -> List[dict]:
+    """Boards listed in a JSON file.
+
+    The file holds a list of boards, or an object with a ``boards`` list whose
+    other keys are defaults for every board::
+
+        {"scl": 1, "sda": 0, "boards": [
+            {"port": "/dev/ttyACM0", "sensors": ["lis3mdl", "lis3mdl@0x1E"],
+             "positions": [[0, 0, 0], [0, 0, 0.05]]},
+            {"port": "/dev/ttyACM1", "sda": 2, "scl": 3}
+        ]}
+    """
+    config = json.loads(Path(path).read_text())
+    if isinstance(config, list):
+        return config
+    defaults = {key: value for key, value in config.items() if key != "boards"}
+    return [{**defaults, **board} for board in config["boards"]]
+
+
+class Timeline:
+    """Resample channels stamped on the host clock onto one time grid.
+
+    Grid times are multiples of ``period``. A grid time is returned once
+    every channel has a reading at or after it, so the slowest board sets the
+    latency.
+
+    Parameters
+    ----------
+    rings: Sequence[SampleRing]
+        One per channel.
+    period: float
+        Seconds between grid times.
+    max_gap: Optional[float]
+        Readings further apart than this, in seconds, aren't interpolated
+        between; the grid times in between are ``NaN``. Defaults to four
+        periods.
+    """
+
+    def __init__(
+        self,
+        rings: Sequence[SampleRing],
+        period: float,
+        max_gap: Optional[float] = None,
+    ):
+        if period <= 0:
+            raise ValueError(f"period must be positive, got {period}.")
+        self.rings = list(rings)
+        self.period = period
+        self.max_gap = 4 * period if max_gap is None else max_gap
+        # (time, x, y, z) readings not yet passed by the grid, plus the last
+        # one before it to interpolate from.
+        self._buffers = [np.zeros((0, 4)) for _ in self.rings]
+        # Grid index of the next time to return.
+        self._next: Optional[int] = None
+
+    @property
+    def dropped(self) -> int:
+        """Readings lost because ``read`` wasn't called often enough."""
+        return sum(ring.dropped for ring in self.rings)
+
+    def read(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Grid times every channel has been read past since the previous ``read``.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            ``(n,)`` host ``time.time()`` grid times and ``(n, channels, 3)``
+            fields at them, in microteslas.
+        """
+        for i, ring in enumerate(self.rings):
+            records = np.frombuffer(ring.read_bytes()).reshape(-1, len(FIELDS))
+            if len(records):
+                self._buffers[i] = np.concatenate([self._buffers[i], records[:, :4]])
+        if not all(len(buffer) for buffer in self._buffers):
+            return np.zeros(0), np.zeros((0, len(self.rings), 3))
+
+        if self._next is None:
+            start = max(buffer[0, 0] for buffer in self._buffers)
+            self._next = int(np.ceil(start / self.period))
+        end = int(
+            np.floor(min(buffer[-1, 0] for buffer in self._buffers) / self.period)
+        )
+        times = np.arange(self._next, max(end + 1, self._next)) * self.period
+        self._next += len(times)
+
+        fields = np.empty((len(times), len(self.rings), 3))
+        for i, buffer in enumerate(self._buffers):
+            fields[:, i] = self._interpolate(buffer, times)
+            keep = np.searchsorted(buffer[:, 0], self._next * self.period) - 1
+            self._buffers[i] = buffer[max(keep, 0) :]
+        return times, fields
+
+    def _interpolate(self, buffer: np.ndarray, times: np.ndarray) -> np.ndarray:
+        if len(buffer) == 1:
+            return np.repeat(buffer[:, 1:], len(times), axis=0)
+        t = buffer[:, 0]
+        right = np.clip(np.searchsorted(t, times), 1, len(t) - 1)
+        left = right - 1
+        span = t[right] - t[left]
+        weight = np.divide(
+            times - t[left], span, out=np.zeros_like(times), where=span > 0
+        )
+        values = buffer[left, 1:]
+        values = values + weight[:, None] * (buffer[right, 1:] - values)
+        values[span > self.max_gap] = np.nan
+        return values
+
+
+class BoardSet:
+    """Boards read concurrently, each on its own thread, onto one ``Timeline``.
+
+    Parameters
+    ----------
+    boards: Sequence[dict]
+        One per board: ``port``, optionally ``sensors`` (defaults to
+        ``[sensor]``; several are read as a ``SensorArray``), ``name``
+        (defaults to ``port``) and ``positions`` (``[x, y, z]`` of each
+        sensor, in meters), and any other sensor constructor arguments,
+        e.g. ``sda`` and ``scl``. See ``parse_board`` and ``load_boards``.
+    sensor: str
+        Sensor registry name for boards that don't list ``sensors``.
+    samples: int
+        Samples averaged on-device per reading.
+    interval: float
+        Seconds between reads of each board.
+    period: Optional[float]
+        Seconds between timeline grid times. Defaults to ``interval``.
+    max_gap: Optional[float]
+        See ``Timeline``.
+    capacity: int
+        Readings buffered per channel between ``read``s.
+    calibration: bool
+        Correct each channel with its sensor's saved calibration, if any.
+    **sensor_kwargs
+        Defaults for every board's sensor constructor arguments.
+
+    Attributes
+    ----------
+    channels: List[str]
+        ``NAME/SENSOR`` name of each channel, once open.
+    gradient: Optional[Gradient]
+        Fits the field and its gradient to ``(..., channels, 3)`` fields, if
+        every board gives ``positions``.
+    """
+
+    def __init__(
+        self,
+        boards: Sequence[dict],
+        sensor: str = "lis3mdl",
+        *,
+        samples: int = 16,
+        interval: float = 0.1,
+        period: Optional[float] = None,
+        max_gap: Optional[float] = None,
+        capacity: int = 4096,
+        calibration: bool = True,
+        **sensor_kwargs,
+    ):
+        if not boards:
+            raise ValueError("BoardSet needs at least one board.")
+        self.boards = [{**sensor_kwargs, **board} for board in boards]
+        self.sensor_name = sensor
+        self.samples = samples
+        self.interval = interval
+        self.period = interval if period is None else period
+        self.max_gap = max_gap
+        self.capacity = capacity
+        self.calibration = calibration
+
+        self.gradient: Optional[Gradient] = None
+        positions = [board.get("positions") for board in self.boards]
+        if any(board_positions is not None for board_positions in positions):
+            if None in positions:
+                raise ValueError("Give positions for every board or none.")
+            for board, board_positions in zip(self.boards, positions):
+                if len(board_positions) != len(board.get("sensors", [sensor])):
+                    raise ValueError(
+                        f"{board['port']}: give one position per sensor, "
+                        f"got {len(board_positions)}."
+                    )
+            self.gradient = Gradient(np.concatenate(positions))
+
+        self.sensors: list = []
+        self.channels: List[str] = []
+        self.calibrations: List[Optional[Calibration]] = []
+        self.rings: List[SampleRing] = []
+        self.timeline: Optional[Timeline] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._errors: List[BaseException] = []
+
+    def _open_board(self, board: dict):
+        from magnetometer.sensors import SensorArray, get_sensor
+
+        kwargs = dict(board)
+        port = kwargs.pop("port")
+        kwargs.pop("name", None)
+        kwargs.pop("positions", None)
+        sensors = kwargs.pop("sensors", [self.sensor_name])
+        if len(sensors) == 1 and "@" not in sensors[0]:
+            return get_sensor(sensors[0])(port, **kwargs)
+        return SensorArray(port, sensors, **kwargs)
+
+    def open(self) -> "BoardSet":
+        """Initialize every board, concurrently, and start acquiring.
+
+        Raises the first board's exception if any fails to initialize, after
+        closing the others.
+        """
+        if self.timeline is not None:
+            return self
+        with ThreadPoolExecutor(len(self.boards)) as executor:
+            futures = [
+                executor.submit(self._open_board, board) for board in self.boards
+            ]
+        errors = [future.exception() for future in futures]
+        self.sensors = [
+            future.result() for future, error in zip(futures, errors) if error is None
+        ]
+        if any(errors):
+            self.close()
+            raise next(error for error in errors if error is not None)
+
+        for board, sensor in zip(self.boards, self.sensors):
+            labels = getattr(sensor, "labels", None) or [type(sensor).__registry__.name]
+            calibrations = getattr(sensor, "calibrations", None) or [
+                Calibration.load(labels[0])
+            ]
+            rings = [SampleRing.create(self.capacity) for _ in labels]
+            name = board.get("name", board["port"])
+            self.channels.extend(f"{name}/{label}" for label in labels)
+            self.calibrations.extend(calibrations)
+            self.rings.extend(rings)
+            self._threads.append(
+                threading.Thread(
+                    target=self._acquire,
+                    args=(sensor, rings),
+                    name=f"magnetometer-acquisition-{name}",
+                    daemon=True,
+                )
+            )
+        if not self.calibration:
+            self.calibrations = [None] * len(self.channels)
+        self.timeline = Timeline(self.rings, self.period, self.max_gap)
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def _acquire(self, sensor, rings: List[SampleRing]) -> None:
+        try:
+            if hasattr(sensor, "read_all"):
+                acquire_array(sensor, rings, self._stop, self.samples, self.interval)
+            else:
+                acquire(sensor, rings[0], self._stop, self.samples, self.interval)
+        except BaseException as e:
+            self._errors.append(e)
+
+    def read(self) -> Tuple[np.ndarray, np.ndarray]:
+        """``Timeline.read``, calibrated.
+
+        Raises an acquisition thread's exception if reading a board failed.
+        """
+        if self._errors:
+            raise self._errors[0]
+        if self.timeline is None:
+            raise ValueError("BoardSet isn't open.")
+        times, fields = self.timeline.read()
+        for i, calibration in enumerate(self.calibrations):
+            if calibration is not None and len(times):
+                calibration.apply(fields[:, i], out=fields[:, i])
+        return times, fields
+
+    def close(self) -> None:
+        """Stop acquiring and release every board."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        for sensor in self.sensors:
+            sensor.close()
+        self.sensors = []
+        for ring in self.rings:
+            ring.close()
+        self.rings = []
+        self.timeline = None
+
+    def __enter__(self) -> "BoardSet":
+        return self.open()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
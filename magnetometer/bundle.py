@@ -0,0 +1,123 @@
+"""Precompiled ``.mpy`` bundles of the vendored drivers.
+
+Importing ``.py`` sources makes CircuitPython compile them on-device, which
+takes seconds at startup and fragments the heap. Bundles hold each sensor's
+dependencies cross-compiled to bytecode, one directory per CircuitPython major
+version and sensor::
+
+    magnetometer/bundles/8.x/lis3mdl/adafruit_lis3mdl/__init__.mpy
+
+Build them with CircuitPython's ``mpy-cross`` (MicroPython's ``mpy-cross``
+emits an incompatible format)::
+
+    python -m magnetometer.bundle path/to/mpy-cross
+"""
+
+import re
+import shutil
+import subprocess  # nosec
+from pathlib import Path
+from typing import Dict, Optional
+
+from .sync import DEPENDENCIES_PATH, module_files
+
+__all__ = [
+    "BUNDLES_PATH",
+    "build",
+    "bundle_files",
+]
+
+BUNDLES_PATH = Path(__file__).parent / "bundles"
+
+
+def _circuitpython_major(mpy_cross: str) -> int:
+    """CircuitPython major version targeted by an ``mpy-cross`` binary."""
+    output = subprocess.run(  # nosec
+        [mpy_cross, "--version"], capture_output=True, text=True, check=True
+    ).stdout
+    match = re.search(r"CircuitPython (\d+)\.", output)
+    if not match:
+        raise ValueError(f"{mpy_cross} is not CircuitPython's mpy-cross: {output!r}")
+    return int(match.group(1))
+
+
+def build(
+    mpy_cross: str = "mpy-cross",
+    root: Path = DEPENDENCIES_PATH,
+    output: Path = BUNDLES_PATH,
+) -> Path:
+    """Cross-compile every sensor's dependencies for one CircuitPython version.
+
+    Parameters
+    ----------
+    mpy_cross: str
+        CircuitPython ``mpy-cross`` executable; its version selects the bundle.
+    root: Path
+        Local directory containing the vendored modules.
+    output: Path
+        Directory to write the ``{major}.x/{sensor}`` bundles into.
+
+    Returns
+    -------
+    Path
+        Directory containing this version's bundles.
+    """
+    from .sensors import SENSORS, get_sensor
+
+    version_path = output / f"{_circuitpython_major(mpy_cross)}.x"
+    if version_path.exists():
+        shutil.rmtree(version_path)
+
+    for name in SENSORS:
+        cls = get_sensor(name)
+        if not cls.dependencies:
+            continue
+        for relative, src in module_files(cls.dependencies, root).items():
+            dst = version_path / name / relative
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            subprocess.run(  # nosec
+                [
+                    mpy_cross,
+                    "-o",
+                    str(dst.with_suffix(".mpy")),
+                    "-s",
+                    relative,
+                    str(src),
+                ],
+                check=True,
+            )
+    return version_path
+
+
+def bundle_files(
+    sensor: str, major_version: int, bundles: Path = BUNDLES_PATH
+) -> Optional[Dict[str, Path]]:
+    """Files of a sensor's bundle, keyed by path relative to ``/lib``.
+
+    Returns
+    -------
+    Optional[Dict[str, Path]]
+        ``None`` if no bundle was built for this sensor and version.
+    """
+    path = bundles / f"{major_version}.x" / sensor
+    if not path.is_dir():
+        return None
+    return {
+        file.relative_to(path).as_posix(): file
+        for file in sorted(path.rglob("*"))
+        if file.is_file()
+    }
+
+
+if __name__ == "__main__":
+    import typer
+
+    def main(
+        mpy_cross: str = typer.Argument(
+            "mpy-cross", help="CircuitPython mpy-cross executable."
+        ),
+    ):
+        """Build the precompiled sensor bundles."""
+        typer.echo(f"Wrote {build(mpy_cross)}")
+
+    typer.run(main)
@@ -0,0 +1,186 @@
+"""Hard- and soft-iron calibration.
+
+Nearby magnetized material adds a constant offset to readings (hard iron) and
+distorts the field (soft iron), so rotating the sensor traces an offset,
+tilted ellipsoid instead of a sphere centered on zero. ``EllipsoidFit`` fits
+that ellipsoid while the sensor is rotated; the resulting ``Calibration`` maps
+it back onto a sphere.
+
+Calibrations are saved per sensor type in ``calibration_path()`` and loaded
+with ``Calibration.load(sensor_name)``.
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+__all__ = [
+    "Calibration",
+    "EllipsoidFit",
+    "calibration_path",
+]
+
+_NOT_AN_ELLIPSOID = (
+    "Readings don't fit an ellipsoid; rotate the sensor through more orientations."
+)
+
+
+def calibration_path() -> Path:
+    """JSON file holding the saved calibration of each sensor type."""
+    from click import get_app_dir
+
+    return Path(get_app_dir("magnetometer")) / "calibration.json"
+
+
+class Calibration:
+    """Correct readings as ``matrix @ (reading - offset)``.
+
+    Parameters
+    ----------
+    offset: Sequence[float]
+        Hard-iron offset, in microteslas.
+    matrix: Sequence[Sequence[float]]
+        3x3 soft-iron correction.
+    """
+
+    def __init__(
+        self,
+        offset: Sequence[float] = (0.0, 0.0, 0.0),
+        matrix: Sequence[Sequence[float]] = ((1, 0, 0), (0, 1, 0), (0, 0, 1)),
+    ):
+        self.offset = np.array(offset, dtype=float)
+        self.matrix = np.array(matrix, dtype=float)
+        # Plain floats for correcting single readings without numpy overhead.
+        self._offset = tuple(self.offset.tolist())
+        self._rows = tuple(tuple(row) for row in self.matrix.tolist())
+
+    def __call__(self, reading: Sequence[float]) -> Tuple[float, float, float]:
+        """Correct a single ``(x, y, z)`` reading."""
+        # ``float`` so that numpy readings give plain floats too.
+        x = float(reading[0]) - self._offset[0]
+        y = float(reading[1]) - self._offset[1]
+        z = float(reading[2]) - self._offset[2]
+        return tuple(a * x + b * y + c * z for a, b, c in self._rows)  # type: ignore
+
+    def apply(self, readings: np.ndarray, out: Optional[np.ndarray] = None):
+        """Correct an ``(n, 3)`` array of readings.
+
+        ``out`` may be ``readings`` itself, e.g. a column slice of a batch.
+        """
+        result = (readings - self.offset) @ self.matrix.T
+        if out is None:
+            return result
+        out[...] = result
+        return out
+
+    def to_dict(self) -> dict:
+        return {"offset": self.offset.tolist(), "matrix": self.matrix.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Calibration":
+        return cls(data["offset"], data["matrix"])
+
+    @classmethod
+    def load(
+        cls, sensor_name: str, path: Optional[Path] = None
+    ) -> Optional["Calibration"]:
+        """Saved calibration of a sensor type, if there is one."""
+        path = path or calibration_path()
+        try:
+            saved = json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        if sensor_name not in saved:
+            return None
+        return cls.from_dict(saved[sensor_name])
+
+    def save(self, sensor_name: str, path: Optional[Path] = None) -> Path:
+        """Save as the calibration of a sensor type, replacing any previous one."""
+        path = path or calibration_path()
+        try:
+            saved = json.loads(path.read_text())
+        except FileNotFoundError:
+            saved = {}
+        saved[sensor_name] = {
+            **self.to_dict(),
+            "saved": datetime.now().isoformat(timespec="seconds"),
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(saved, indent=2))
+        return path
+
+
+class EllipsoidFit:
+    """Least-squares ellipsoid through readings, updated one batch at a time.
+
+    Fits ``p^T A p + 2 b^T p = 1`` with symmetric ``A``, which is linear in its
+    9 unknowns. Only the 9x9 normal equations are accumulated, so points
+    aren't kept, an update costs O(1) per point, and ``solve`` can be called
+    at any time for the fit of every point so far.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._normal = np.zeros((9, 9))
+        self._rhs = np.zeros(9)
+        # Readings are divided by this, so the normal equations stay well
+        # conditioned whatever the field strength.
+        self._scale: Optional[float] = None
+
+    def _design(self, points: np.ndarray) -> np.ndarray:
+        x, y, z = (points / self._scale).T
+        return np.stack(
+            [x * x, y * y, z * z, 2 * x * y, 2 * x * z, 2 * y * z, 2 * x, 2 * y, 2 * z],
+            axis=1,
+        )
+
+    def append(self, reading: Sequence[float]) -> None:
+        self.extend(np.array([reading], dtype=float))
+
+    def extend(self, readings: np.ndarray) -> None:
+        """Add an ``(n, 3)`` array of raw readings."""
+        readings = np.asarray(readings, dtype=float)
+        if not len(readings):
+            return
+        if self._scale is None:
+            self._scale = float(np.linalg.norm(readings, axis=1).max()) or 1.0
+        design = self._design(readings)
+        self._normal += design.T @ design
+        self._rhs += design.sum(axis=0)
+        self.count += len(readings)
+
+    def solve(self) -> Calibration:
+        """Calibration that maps the fitted ellipsoid onto a sphere.
+
+        The sphere's radius is the ellipsoid's geometric mean radius, so field
+        magnitudes keep their scale.
+
+        Raises
+        ------
+        ValueError
+            If the readings don't determine an ellipsoid yet, typically because
+            the sensor wasn't rotated through enough orientations.
+        """
+        if self.count < 9:
+            raise ValueError(f"Need at least 9 readings, got {self.count}.")
+        theta = np.linalg.lstsq(self._normal, self._rhs, rcond=None)[0]
+        a, b, c, d, e, f, g, h, i = theta
+        quadric = np.array([[a, d, e], [d, b, f], [e, f, c]])
+        linear = np.array([g, h, i])
+
+        try:
+            center = -np.linalg.solve(quadric, linear)
+        except np.linalg.LinAlgError:
+            raise ValueError(_NOT_AN_ELLIPSOID) from None
+        # (p - center)^T (quadric / k) (p - center) = 1
+        k = 1 + center @ quadric @ center
+        eigenvalues, eigenvectors = np.linalg.eigh(quadric / k)
+        if k <= 0 or (eigenvalues <= 0).any():
+            raise ValueError(_NOT_AN_ELLIPSOID)
+        radii = 1 / np.sqrt(eigenvalues)
+        radius = np.prod(radii) ** (1 / 3)
+        matrix = eigenvectors @ np.diag(radius / radii) @ eigenvectors.T
+        return Calibration(center * self._scale, matrix)
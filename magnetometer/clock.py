@@ -0,0 +1,93 @@
+"""Map device timestamps onto the host clock.
+
+A reading's host arrival time includes serial latency and scheduling jitter,
+and every board's clock runs at a slightly different rate. ``ClockSync``
+pairs the device's ``time.monotonic_ns`` at each read with the host's
+``perf_counter_ns`` and fits the device clock's offset and drift, so samples
+are stamped with when they were taken rather than when they arrived.
+Recordings from several boards then share the host's timeline.
+"""
+
+from collections import deque
+from time import perf_counter_ns, time_ns
+from typing import Deque, Tuple
+
+import numpy as np
+
+__all__ = [
+    "ClockSync",
+]
+
+
+class ClockSync:
+    """Least-squares fit of host time against device time over recent reads.
+
+    Each pair assumes the device stamp was taken halfway through the host's
+    round trip, so the fit is accurate to the round trip's asymmetry, which
+    is shared by boards on the same kind of link. Pairs whose round trip is
+    more than twice the shortest in the window are left out, since their
+    midpoint is the least certain.
+
+    Parameters
+    ----------
+    window: int
+        Most recent pairs fitted.
+    refit: int
+        Pairs added between fits, once the window has that many.
+    """
+
+    def __init__(self, window: int = 256, refit: int = 16):
+        if window < 2:
+            raise ValueError(f"window must be at least 2, got {window}.")
+        self.window = window
+        self.refit = refit
+        # (device_ns, host_ns, round_trip_ns)
+        self.pairs: Deque[Tuple[int, int, int]] = deque(maxlen=window)
+        # ``time.time_ns()`` at ``perf_counter_ns()`` zero. Fixed at creation,
+        # so the stamps of one session stay monotonic if the wall clock steps.
+        self.epoch_ns = time_ns() - perf_counter_ns()
+        self._added = 0
+        # Fitted host_ns = host_origin + rate * (device_ns - device_origin).
+        self._device_origin = 0.0
+        self._host_origin = 0.0
+        self.rate = 1.0
+
+    @property
+    def drift(self) -> float:
+        """How much faster the device clock runs than the host's, in ppm."""
+        return (1 / self.rate - 1) * 1e6
+
+    def add(self, device_ns: int, host_start_ns: int, host_end_ns: int) -> None:
+        """Pair a device stamp with the host ``perf_counter_ns`` round trip it
+        was taken in."""
+        round_trip_ns = host_end_ns - host_start_ns
+        self.pairs.append(
+            (device_ns, host_start_ns + round_trip_ns // 2, round_trip_ns)
+        )
+        self._added += 1
+        if len(self.pairs) <= self.refit or self._added >= self.refit:
+            self._added = 0
+            self._fit()
+
+    def _fit(self) -> None:
+        pairs = np.array(self.pairs, dtype=np.int64)
+        pairs = pairs[pairs[:, 2] <= 2 * pairs[:, 2].min()]
+        # Relative to the newest pair, so the float64 math keeps ns precision.
+        device = (pairs[:, 0] - pairs[-1, 0]).astype(float)
+        host = (pairs[:, 1] - pairs[-1, 1]).astype(float)
+        device_mean = device.mean()
+        host_mean = host.mean()
+        spread = device - device_mean
+        variance = spread @ spread
+        if len(pairs) > 1 and variance > 0:
+            self.rate = float(spread @ (host - host_mean) / variance)
+        self._device_origin = pairs[-1, 0] + device_mean
+        self._host_origin = pairs[-1, 1] + host_mean
+
+    def host_ns(self, device_ns: float) -> float:
+        """Host ``perf_counter_ns`` at device ``monotonic_ns`` ``device_ns``."""
+        return self._host_origin + self.rate * (device_ns - self._device_origin)
+
+    def time(self, device_ns: float) -> float:
+        """Host ``time.time()`` at device ``monotonic_ns`` ``device_ns``."""
+        return (self.host_ns(device_ns) + self.epoch_ns) * 1e-9
@@ -186,3 +186,128 @@ class I2CDevice:
                 # pylint: enable=raise-missing-from
         finally:
             self.i2c.unlock()
+
+
+# Opt-in transaction tracing.
+#
+# ``enable_trace()`` swaps traced variants in for the ``I2CDevice`` methods, so
+# untraced code pays nothing. Counts are kept per ``(device_address, register)``
+# where the register is the first byte written. ``readinto`` has no register
+# byte of its own and is attributed to the device's most recently written
+# register (``-1`` if none). Lock-spin iterations in ``__enter__`` are
+# attributed to the next transaction in the ``with`` block.
+
+_TRANSACTIONS = 0
+_WRITTEN = 1
+_READ = 2
+_SPINS = 3
+
+_trace = {}
+_untraced = {}
+
+
+def _record(device, register, written, read):
+    if register is None:
+        register = getattr(device, "_trace_register", -1)
+    else:
+        device._trace_register = register
+    key = (device.device_address, register)
+    try:
+        counts = _trace[key]
+    except KeyError:
+        counts = _trace[key] = [0, 0, 0, 0]
+    counts[_TRANSACTIONS] += 1
+    counts[_WRITTEN] += written
+    counts[_READ] += read
+    counts[_SPINS] += getattr(device, "_trace_spins", 0)
+    device._trace_spins = 0
+
+
+def _traced_readinto(self, buf, *, start=0, end=None):
+    if end is None:
+        end = len(buf)
+    _untraced["readinto"](self, buf, start=start, end=end)
+    _record(self, None, 0, end - start)
+
+
+def _traced_write(self, buf, *, start=0, end=None):
+    if end is None:
+        end = len(buf)
+    register = buf[start] if end > start else None
+    _untraced["write"](self, buf, start=start, end=end)
+    _record(self, register, end - start, 0)
+
+
+def _traced_write_then_readinto(
+    self,
+    out_buffer,
+    in_buffer,
+    *,
+    out_start=0,
+    out_end=None,
+    in_start=0,
+    in_end=None
+):
+    if out_end is None:
+        out_end = len(out_buffer)
+    if in_end is None:
+        in_end = len(in_buffer)
+    # Drivers often read into the buffer they wrote from.
+    register = out_buffer[out_start] if out_end > out_start else None
+    _untraced["write_then_readinto"](
+        self,
+        out_buffer,
+        in_buffer,
+        out_start=out_start,
+        out_end=out_end,
+        in_start=in_start,
+        in_end=in_end,
+    )
+    _record(self, register, out_end - out_start, in_end - in_start)
+
+
+def _traced_enter(self):
+    spins = 0
+    while not self.i2c.try_lock():
+        spins += 1
+        time.sleep(0)
+    self._trace_spins = getattr(self, "_trace_spins", 0) + spins
+    return self
+
+
+_TRACED = {
+    "readinto": _traced_readinto,
+    "write": _traced_write,
+    "write_then_readinto": _traced_write_then_readinto,
+    "__enter__": _traced_enter,
+}
+
+
+def enable_trace() -> None:
+    """Start counting transactions on every ``I2CDevice``."""
+    if _untraced:
+        return
+    for name, traced in _TRACED.items():
+        _untraced[name] = getattr(I2CDevice, name)
+        setattr(I2CDevice, name, traced)
+
+
+def disable_trace() -> None:
+    """Stop counting transactions; collected counts are kept."""
+    for name, untraced in _untraced.items():
+        setattr(I2CDevice, name, untraced)
+    _untraced.clear()
+
+
+def trace_summary(reset: bool = False) -> dict:
+    """
+    Counts collected since the last reset.
+
+    :param bool reset: Clear the counts after reading them.
+    :return: ``{(device_address, register): (transactions, bytes_written,
+        bytes_read, lock_spins)}``
+    """
+    summary = {key: tuple(counts) for key, counts in _trace.items()}
+    if reset:
+        _trace.clear()
+    return summary
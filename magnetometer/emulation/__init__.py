@@ -0,0 +1,24 @@
+"""Host-side emulation of a CircuitPython board with a magnetometer attached.
+
+Lets the vendored drivers and the on-device bodies of the ``Sensor`` tasks run
+unmodified on CPython, e.g. for benchmarking driver hot paths::
+
+    sensor = get_sensor("lis3mdl")("emulated", sda=0, scl=1)
+    sensor.read()
+
+``EmulatedBoard`` replaces Belay's serial connection; ``Chip`` subclasses
+simulate each sensor at the register level.
+"""
+
+__all__ = [
+    "Chip",
+    "EMULATED_PORT",
+    "EmulatedBoard",
+    "earth_field",
+]
+
+from .board import EmulatedBoard
+from .chips import Chip, earth_field
+
+# Pass as the port to connect to an emulated board.
+EMULATED_PORT = "emulated"
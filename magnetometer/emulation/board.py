@@ -0,0 +1,346 @@
+"""In-process stand-in for a CircuitPython board reached over Belay."""
+
+import builtins
+import importlib
+import os
+import shutil
+import sys
+import threading
+import traceback
+import tracemalloc
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import ModuleType, SimpleNamespace
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from belay.pyboard import PyboardException
+
+from .chips import Chip
+
+__all__ = [
+    "EmulatedBoard",
+]
+
+# Stand-ins for the CircuitPython built-in modules that drivers import directly.
+STANDINS_PATH = str(Path(__file__).parent / "circuitpython")
+
+# Frames from these files are hidden from on-device tracebacks.
+_HIDDEN_PATHS = (str(Path(__file__).parent),)
+
+N_PINS = 29
+
+# Boards in one process share ``sys.modules`` and ``sys.path``, so only one
+# runs code at a time, importing from its own filesystem only.
+_LOCK = threading.RLock()
+_active: Optional["EmulatedBoard"] = None
+
+# Boards not closed yet; the stand-ins are importable on the host while any
+# of them is open.
+_open: Set["EmulatedBoard"] = set()
+
+
+def _install_standins(board: "EmulatedBoard") -> None:
+    with _LOCK:
+        _open.add(board)
+        if STANDINS_PATH not in sys.path:
+            sys.path.insert(0, STANDINS_PATH)
+
+
+def _remove_standins(board: "EmulatedBoard") -> None:
+    """Take the stand-ins off ``sys.path`` once the last board is closed."""
+    with _LOCK:
+        _open.discard(board)
+        if _open:
+            return
+        if STANDINS_PATH in sys.path:
+            sys.path.remove(STANDINS_PATH)
+        for name, module in list(sys.modules.items()):
+            if (getattr(module, "__file__", None) or "").startswith(STANDINS_PATH):
+                del sys.modules[name]
+
+
+class _Filesystem:
+    """Maps absolute on-device paths into a host directory."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.cwd = "/"
+
+    def path(self, path: str) -> str:
+        if not path.startswith("/"):
+            path = self.cwd.rstrip("/") + "/" + path
+        return str(self.root / path.lstrip("/"))
+
+    def module(self) -> ModuleType:
+        """On-device ``os`` module."""
+        fs = self
+        module = ModuleType("os")
+        module.sep = "/"
+
+        def listdir(path: str = "") -> list:
+            return sorted(os.listdir(fs.path(path)))
+
+        def stat(path: str) -> tuple:
+            st = os.stat(fs.path(path))
+            return (st.st_mode, 0, 0, 0, 0, 0, st.st_size, 0, int(st.st_mtime), 0)
+
+        def chdir(path: str) -> None:
+            if not os.path.isdir(fs.path(path)):
+                raise OSError(2, "No such file/directory")
+            fs.cwd = "/" + fs.path(path)[len(str(fs.root)) :].strip("/")
+
+        module.listdir = listdir
+        module.stat = stat
+        module.chdir = chdir
+        module.getcwd = lambda: fs.cwd
+        module.mkdir = lambda path: os.mkdir(fs.path(path))
+        module.rmdir = lambda path: os.rmdir(fs.path(path))
+        module.remove = lambda path: os.remove(fs.path(path))
+        module.rename = lambda old, new: os.rename(fs.path(old), fs.path(new))
+        module.sync = lambda: None
+        module.urandom = os.urandom
+        module.uname = lambda: SimpleNamespace(
+            sysname="rp2040", machine="Emulated board with rp2040"
+        )
+        return module
+
+    def open(self, file, mode="r", *args, **kwargs):
+        return builtins.open(self.path(file), mode, *args, **kwargs)
+
+
+class EmulatedBoard:
+    """Executes Belay's commands in-process against simulated chips.
+
+    Implements the subset of ``belay.pyboard.Pyboard`` that ``belay.Device``
+    uses. Commands run in a namespace that sees stand-ins for ``board``,
+    ``busio``, ``os`` (rooted in a private directory), ``sys`` and ``gc``;
+    modules synced to ``/lib`` are imported with CPython's regular machinery.
+
+    Parameters
+    ----------
+    chips: Iterable[Chip]
+        Chips wired to the I2C bus on pins ``scl``/``sda``.
+    scl: int
+        SCL GPIO number.
+    sda: int
+        SDA GPIO number.
+    root: Optional[Path]
+        Directory backing the board's filesystem.
+        Defaults to a temporary directory that is deleted on ``close``.
+    version: Tuple[int, int, int]
+        Reported CircuitPython version.
+    heap_size: int
+        Reported heap size in bytes. ``gc.mem_free()`` subtracts the memory
+        currently traced by ``tracemalloc``, if it is running.
+    """
+
+    serial = None
+
+    def __init__(
+        self,
+        chips: Iterable[Chip] = (),
+        *,
+        scl: int = 1,
+        sda: int = 0,
+        root: Optional[Path] = None,
+        version: Tuple[int, int, int] = (8, 0, 0),
+        heap_size: int = 192 * 1024,
+    ):
+        _install_standins(self)
+        self.chips = {chip.address: chip for chip in chips}
+        self.scl = scl
+        self.sda = sda
+        self.version = version
+        self.heap_size = heap_size
+
+        self._tmp_dir = None
+        if root is None:
+            self._tmp_dir = TemporaryDirectory()
+            root = Path(self._tmp_dir.name)
+        self.root = Path(root)
+        (self.root / "lib").mkdir(parents=True, exist_ok=True)
+        self.lib_path = str(self.root / "lib")
+
+        self.namespace: dict = {}
+        self.in_raw_repl = False
+
+    def i2c_devices(self, scl, sda) -> Dict[int, Chip]:
+        """Chips reachable from an I2C bus on the given pins."""
+        if (scl.name, sda.name) == (f"GP{self.scl}", f"GP{self.sda}"):
+            return self.chips
+        return {}
+
+    def _board_module(self) -> ModuleType:
+        from microcontroller import Pin
+
+        module = ModuleType("board")
+        for i in range(N_PINS):
+            setattr(module, f"GP{i}", Pin(self, f"GP{i}"))
+        module.SCL = getattr(module, f"GP{self.scl}")
+        module.SDA = getattr(module, f"GP{self.sda}")
+        module.board_id = "emulated"
+        return module
+
+    def _sys_module(self) -> ModuleType:
+        module = ModuleType("sys")
+        # No ``mpy`` attribute: CPython can't import ``.mpy`` files, so
+        # sensors fall back to syncing sources.
+        module.implementation = SimpleNamespace(
+            name="circuitpython", version=self.version
+        )
+        module.platform = "RP2040"
+        module.path = ["", "/", ".frozen", "/lib"]
+        module.modules = sys.modules
+        module.maxsize = 2**30 - 1
+        module.byteorder = "little"
+        module.exit = sys.exit
+        return module
+
+    def _gc_module(self) -> ModuleType:
+        import gc
+
+        heap_size = self.heap_size
+
+        def mem_alloc() -> int:
+            if tracemalloc.is_tracing():
+                return tracemalloc.get_traced_memory()[0]
+            return 0
+
+        module = ModuleType("gc")
+        module.collect = gc.collect
+        module.enable = gc.enable
+        module.disable = gc.disable
+        module.isenabled = gc.isenabled
+        module.mem_alloc = mem_alloc
+        module.mem_free = lambda: max(heap_size - mem_alloc(), 0)
+        return module
+
+    def soft_reset(self) -> None:
+        """Clear the interpreter state, like ctrl-D.
+
+        Chips stay powered, so their registers are kept.
+        """
+        with _LOCK:
+            self._forget_modules()
+            self._activate()
+
+        fs = _Filesystem(self.root)
+        modules = {
+            "board": self._board_module(),
+            "gc": self._gc_module(),
+            "os": fs.module(),
+            "sys": self._sys_module(),
+        }
+
+        def device_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level == 0 and name in modules:
+                return modules[name]
+            return builtins.__import__(name, globals, locals, fromlist, level)
+
+        device_builtins = dict(vars(builtins))
+        device_builtins["__import__"] = device_import
+        # ``@micropython.native`` is resolved by MicroPython's compiler, so
+        # Belay's emitter check doesn't import it.
+        device_builtins["micropython"] = importlib.import_module("micropython")
+        device_builtins["open"] = fs.open
+        device_builtins["print"] = self._print
+        self.namespace = {"__name__": "__main__", "__builtins__": device_builtins}
+
+    def reboot(self) -> None:
+        """Power-cycle the board, e.g. to test reconnecting after a reset.
+
+        Globals are lost; the filesystem is kept. The next ``enter_raw_repl``
+        starts a fresh interpreter.
+        """
+        self.namespace = {}
+        self.in_raw_repl = False
+
+    def _activate(self) -> None:
+        """Make this board's ``/lib`` the only one importable."""
+        global _active
+        if _active is not None and _active is not self:
+            _active._forget_modules()
+            if _active.lib_path in sys.path:
+                sys.path.remove(_active.lib_path)
+        _active = self
+        if sys.path[:1] != [self.lib_path]:
+            if self.lib_path in sys.path:
+                sys.path.remove(self.lib_path)
+            sys.path.insert(0, self.lib_path)
+
+    def _print(self, *args, sep=" ", end="\n", file=None) -> None:
+        if file is not None:
+            print(*args, sep=sep, end=end, file=file)
+            return
+        self._stdout.append(sep.join(str(arg) for arg in args) + end)
+
+    def enter_raw_repl(self, soft_reset: bool = True) -> None:
+        if soft_reset or not self.namespace:
+            self.soft_reset()
+        self.in_raw_repl = True
+
+    def exit_raw_repl(self) -> None:
+        self.in_raw_repl = False
+
+    def _format_exception(self, e: BaseException) -> str:
+        frames = [
+            frame
+            for frame in traceback.extract_tb(e.__traceback__)
+            if not frame.filename.startswith(_HIDDEN_PATHS)
+            and frame.filename != __file__
+        ]
+        root = str(self.root)
+        lines = ["Traceback (most recent call last):"]
+        for frame in frames:
+            filename = frame.filename
+            if filename.startswith(root):
+                filename = filename[len(root) :]
+            lines.append(f'  File "{filename}", line {frame.lineno}, in {frame.name}')
+        lines.extend(
+            line.rstrip("\n") for line in traceback.format_exception_only(type(e), e)
+        )
+        return "\n".join(lines) + "\n"
+
+    def exec(self, command, data_consumer=None) -> bytes:
+        if isinstance(command, bytes):
+            command = command.decode()
+        self._stdout = []
+        error = None
+        try:
+            with _LOCK:
+                self._activate()
+                exec(compile(command, "<stdin>", "exec"), self.namespace)
+        except Exception as e:
+            error = self._format_exception(e)
+
+        out = "".join(self._stdout).replace("\n", "\r\n").encode()
+        if data_consumer:
+            for line in out.splitlines(keepends=True):
+                data_consumer(line)
+        if error:
+            raise PyboardException(error)
+        return out
+
+    def fs_put(self, src, dest, chunk_size=256, progress_callback=None) -> None:
+        shutil.copyfile(src, _Filesystem(self.root).path(dest))
+
+    def _forget_modules(self) -> None:
+        """Drop modules imported from the board's filesystem from ``sys.modules``."""
+        root = str(self.root)
+        for name, module in list(sys.modules.items()):
+            if (getattr(module, "__file__", None) or "").startswith(root):
+                del sys.modules[name]
+
+    def close(self) -> None:
+        global _active
+        with _LOCK:
+            # Otherwise a later board in this process would import them.
+            self._forget_modules()
+            if self.lib_path in sys.path:
+                sys.path.remove(self.lib_path)
+            if _active is self:
+                _active = None
+            _remove_standins(self)
+        if self._tmp_dir is not None:
+            self._tmp_dir.cleanup()
+            self._tmp_dir = None
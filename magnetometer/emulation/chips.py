@@ -0,0 +1,428 @@
+"""Register-level simulations of the supported magnetometer chips.
+
+Each chip answers I2C reads and writes like the real part closely enough for
+the vendored Adafruit drivers to run unmodified: identification registers,
+soft resets, operating modes, output data rate and the raw output encoding.
+Measurements come from a ``field`` function of time plus optional gaussian
+noise.
+"""
+
+import random
+import struct
+from math import cos, pi, sin
+from time import monotonic
+from typing import Callable, Optional, Tuple
+
+from autoregistry import Registry
+
+__all__ = [
+    "Chip",
+    "Field",
+    "LIS2MDL",
+    "LIS3MDL",
+    "MMC5603",
+    "TLV493D",
+    "earth_field",
+]
+
+Field = Callable[[float], Tuple[float, float, float]]
+
+
+def earth_field(t: float) -> Tuple[float, float, float]:
+    """Earth-like field, in microteslas, as if the board were slowly rotated."""
+    angle = 2 * pi * 0.1 * t
+    return (30 * cos(angle), 30 * sin(angle), -40 + 5 * sin(0.5 * angle))
+
+
+def _clip(value: int, low: int, high: int) -> int:
+    return max(low, min(high, value))
+
+
+class Chip(Registry):
+    """Simulated I2C magnetometer.
+
+    Parameters
+    ----------
+    field: Field
+        Magnetic field in microteslas as a function of ``time.monotonic()``.
+    noise: Optional[float]
+        Standard deviation of the gaussian noise added to each axis, in
+        microteslas. Defaults to the chip's typical RMS noise.
+    seed: Optional[int]
+        Seed for the noise generator.
+
+    Attributes
+    ----------
+    transactions: int
+        Number of I2C reads and writes addressed to this chip.
+    bytes_written: int
+    bytes_read: int
+    conversions: int
+        Number of measurements the chip has made.
+    """
+
+    address: int
+    # Typical RMS noise, in microteslas.
+    noise: float = 0.0
+
+    def __init__(
+        self,
+        field: Field = earth_field,
+        noise: Optional[float] = None,
+        seed: Optional[int] = None,
+    ):
+        self.field = field
+        if noise is not None:
+            self.noise = noise
+        self._random = random.Random(seed)
+        self.transactions = 0
+        self.bytes_written = 0
+        self.bytes_read = 0
+        self.conversions = 0
+        self.power_on()
+
+    def power_on(self) -> None:
+        """Restore the power-on state."""
+
+    def measure(self) -> Tuple[float, float, float]:
+        """Field sample, including noise, in microteslas."""
+        self.conversions += 1
+        x, y, z = self.field(monotonic())
+        if self.noise:
+            gauss = self._random.gauss
+            x += gauss(0, self.noise)
+            y += gauss(0, self.noise)
+            z += gauss(0, self.noise)
+        return x, y, z
+
+    def write(self, data: bytes) -> None:
+        self.transactions += 1
+        self.bytes_written += len(data)
+        self._write(data)
+
+    def read(self, n: int) -> bytes:
+        self.transactions += 1
+        self.bytes_read += n
+        return self._read(n)
+
+    def _write(self, data: bytes) -> None:
+        raise NotImplementedError
+
+    def _read(self, n: int) -> bytes:
+        raise NotImplementedError
+
+
+class RegisterChip(Chip, skip=True):
+    """Chip with an auto-incrementing 8-bit register address.
+
+    A write sets the register pointer to its first byte and stores any
+    remaining bytes; a read returns bytes starting at the pointer.
+    """
+
+    # Power-on register values.
+    defaults: dict = {}
+
+    def power_on(self) -> None:
+        self.registers = bytearray(256)
+        for register, value in self.defaults.items():
+            self.registers[register] = value
+        self.pointer = 0
+        self._continuous_start = None
+        self._sample_index = -1
+
+    def _write(self, data: bytes) -> None:
+        if not data:
+            return  # Address probe.
+        self.pointer = data[0]
+        for value in data[1:]:
+            self.write_register(self.pointer, value)
+            self.pointer = (self.pointer + 1) & 0xFF
+
+    def _read(self, n: int) -> bytes:
+        self.update()
+        out = bytearray(n)
+        for i in range(n):
+            out[i] = self.read_register(self.pointer)
+            self.pointer = (self.pointer + 1) & 0xFF
+        return bytes(out)
+
+    def write_register(self, register: int, value: int) -> None:
+        self.registers[register] = value
+
+    def read_register(self, register: int) -> int:
+        return self.registers[register]
+
+    def start_continuous(self) -> None:
+        self._continuous_start = monotonic()
+        self._sample_index = -1
+
+    def stop_continuous(self) -> None:
+        self._continuous_start = None
+
+    def odr(self) -> float:
+        """Output data rate in continuous mode, in Hz."""
+        raise NotImplementedError
+
+    def update(self) -> None:
+        """In continuous mode, convert if a new sample is due."""
+        if self._continuous_start is None:
+            return
+        index = int((monotonic() - self._continuous_start) * self.odr())
+        if index != self._sample_index:
+            self._sample_index = index
+            self.convert()
+
+    def convert(self) -> None:
+        """Take a measurement and update the output registers."""
+        raise NotImplementedError
+
+
+class LIS3MDL(RegisterChip):
+    address = 0x1C
+    noise = 0.32
+
+    WHO_AM_I = 0x0F
+    CTRL_REG1 = 0x20
+    CTRL_REG2 = 0x21
+    CTRL_REG3 = 0x22
+    STATUS_REG = 0x27
+    OUT_X_L = 0x28
+
+    defaults = {
+        WHO_AM_I: 0x3D,
+        CTRL_REG1: 0x10,
+        CTRL_REG3: 0x03,
+        0x30: 0xE8,  # INT_CFG
+    }
+    # LSB per gauss, indexed by CTRL_REG2 FS bits.
+    LSB_PER_GAUSS = (6842, 3421, 2281, 1711)
+    DATA_RATES = (0.625, 1.25, 2.5, 5, 10, 20, 40, 80)
+    FAST_DATA_RATES = (1000, 560, 300, 155)  # Indexed by OM bits.
+
+    def write_register(self, register: int, value: int) -> None:
+        if register == self.CTRL_REG2 and value & 0x04:
+            # SOFT_RST: configuration and user registers to defaults, self-clearing.
+            self.power_on()
+            return
+        super().write_register(register, value)
+        if register == self.CTRL_REG3:
+            mode = value & 0x03
+            if mode == 0:
+                self.start_continuous()
+            else:
+                self.stop_continuous()
+                if mode == 1:
+                    # Single conversion, then back to power-down.
+                    self.convert()
+                    self.registers[register] |= 0x03
+
+    def odr(self) -> float:
+        ctrl1 = self.registers[self.CTRL_REG1]
+        if ctrl1 & 0x02:  # FAST_ODR
+            return self.FAST_DATA_RATES[(ctrl1 >> 5) & 0x03]
+        return self.DATA_RATES[(ctrl1 >> 2) & 0x07]
+
+    def convert(self) -> None:
+        lsb = self.LSB_PER_GAUSS[(self.registers[self.CTRL_REG2] >> 5) & 0x03]
+        raw = (_clip(round(axis / 100 * lsb), -32768, 32767) for axis in self.measure())
+        struct.pack_into("<hhh", self.registers, self.OUT_X_L, *raw)
+        self.registers[self.STATUS_REG] = 0x0F
+
+
+class LIS2MDL(RegisterChip):
+    address = 0x1E
+    noise = 0.3
+
+    OFFSET_X_REG_L = 0x45
+    WHO_AM_I = 0x4F
+    CFG_REG_A = 0x60
+    INT_CTRL_REG = 0x63
+    INT_SOURCE_REG = 0x64
+    INT_THS_L_REG = 0x65
+    STATUS_REG = 0x67
+    OUTX_L_REG = 0x68
+
+    defaults = {
+        WHO_AM_I: 0x40,
+        CFG_REG_A: 0x03,
+        INT_CTRL_REG: 0xE0,
+    }
+    SCALE = 0.15  # Microteslas per LSB.
+    DATA_RATES = (10, 20, 50, 100)
+
+    def write_register(self, register: int, value: int) -> None:
+        if register == self.CFG_REG_A and value & 0x60:
+            # SOFT_RST / REBOOT: back to defaults, self-clearing.
+            self.power_on()
+            return
+        super().write_register(register, value)
+        if register == self.CFG_REG_A:
+            mode = value & 0x03
+            if mode == 0:
+                self.start_continuous()
+            else:
+                self.stop_continuous()
+                if mode == 1:
+                    self.convert()
+                    self.registers[register] |= 0x03
+
+    def read_register(self, register: int) -> int:
+        value = super().read_register(register)
+        if register == self.INT_SOURCE_REG and self.registers[self.INT_CTRL_REG] & 0x02:
+            # Latched interrupts clear when the source register is read.
+            self.registers[register] = 0
+        return value
+
+    def odr(self) -> float:
+        return self.DATA_RATES[(self.registers[self.CFG_REG_A] >> 2) & 0x03]
+
+    def convert(self) -> None:
+        offsets = struct.unpack_from("<hhh", self.registers, self.OFFSET_X_REG_L)
+        raw = [
+            _clip(round(axis / self.SCALE) - offset, -32768, 32767)
+            for axis, offset in zip(self.measure(), offsets)
+        ]
+        struct.pack_into("<hhh", self.registers, self.OUTX_L_REG, *raw)
+        self.registers[self.STATUS_REG] = 0x0F
+        self._update_interrupt(raw)
+
+    def _update_interrupt(self, raw) -> None:
+        int_ctrl = self.registers[self.INT_CTRL_REG]
+        if not int_ctrl & 0x01:  # IEN
+            return
+        threshold = struct.unpack_from("<H", self.registers, self.INT_THS_L_REG)[0]
+        threshold &= 0x7FFF
+        source = 0
+        for axis, value in enumerate(raw):
+            if not int_ctrl & (0x80 >> axis):  # XIEN, YIEN, ZIEN
+                continue
+            if value > threshold:
+                source |= 0x80 >> axis
+            elif value < -threshold:
+                source |= 0x10 >> axis
+        if source:
+            source |= 0x01
+        if int_ctrl & 0x02:  # IEL
+            self.registers[self.INT_SOURCE_REG] |= source
+        else:
+            self.registers[self.INT_SOURCE_REG] = source
+
+
+class MMC5603(RegisterChip):
+    address = 0x30
+    noise = 0.2
+
+    STATUS_REG = 0x18
+    ODR_REG = 0x1A
+    CTRL_REG0 = 0x1B
+    CTRL_REG1 = 0x1C
+    CTRL_REG2 = 0x1D
+    PRODUCT_ID = 0x39
+
+    defaults = {
+        STATUS_REG: 0x10,  # OTP read done.
+        PRODUCT_ID: 0x10,
+    }
+    SCALE = 0.00625  # Microteslas per LSB.
+    TEMPERATURE = 25.0
+
+    def power_on(self) -> None:
+        super().power_on()
+        self._cmm_freq_en = False
+
+    def write_register(self, register: int, value: int) -> None:
+        if register == self.CTRL_REG0:
+            # Control registers are write-only command strobes.
+            if value & 0x01:  # TM_M
+                self.convert()
+            if value & 0x02:  # TM_T
+                self.registers[0x09] = _clip(
+                    round((self.TEMPERATURE + 75) / 0.8), 0, 255
+                )
+                self.registers[self.STATUS_REG] |= 0x80
+            if value & 0x80:  # Cmm_freq_en
+                self._cmm_freq_en = True
+            return
+        if register == self.CTRL_REG1:
+            if value & 0x80:  # SW_RST
+                self.power_on()
+            return
+        if register == self.CTRL_REG2:
+            self.registers[register] = value
+            if value & 0x10 and self._cmm_freq_en:  # Cmm_en
+                self.start_continuous()
+            else:
+                self.stop_continuous()
+            return
+        super().write_register(register, value)
+
+    def read_register(self, register: int) -> int:
+        if register in (self.CTRL_REG0, self.CTRL_REG1, self.CTRL_REG2):
+            return 0
+        return super().read_register(register)
+
+    def odr(self) -> float:
+        odr = self.registers[self.ODR_REG]
+        if odr == 255 and self.registers[self.CTRL_REG2] & 0x80:  # hpower
+            return 1000
+        return max(odr, 1)
+
+    def convert(self) -> None:
+        registers = self.registers
+        for axis, value in enumerate(self.measure()):
+            raw = _clip(round(value / self.SCALE) + (1 << 19), 0, (1 << 20) - 1)
+            registers[2 * axis] = (raw >> 12) & 0xFF
+            registers[2 * axis + 1] = (raw >> 4) & 0xFF
+            registers[6 + axis] = (raw & 0x0F) << 4
+        registers[self.STATUS_REG] |= 0x40  # Meas_m_done
+
+
+class TLV493D(Chip):
+    """TLV493D-A1B6 in master-controlled mode.
+
+    The chip has no register pointer: reads always start at the first of its
+    10 read registers, and writes always start at its first write register.
+    """
+
+    address = 0x5E
+    noise = 98.0  # One LSB.
+
+    SCALE = 98.0  # Microteslas per LSB.
+    # 25C, at 1.1 LSB/C.
+    TEMPERATURE_RAW = 340
+
+    def power_on(self) -> None:
+        self.read_registers = bytearray(10)
+        # Factory settings the driver must copy into its writes.
+        self.read_registers[7:10] = b"\x08\x3c\x12"
+        self.write_registers = bytearray(4)
+        self.frame = 0
+
+    @property
+    def powered_down(self) -> bool:
+        # MOD1 FAST and LOW bits both clear.
+        return not self.write_registers[1] & 0x03
+
+    def _write(self, data: bytes) -> None:
+        n = min(len(data), len(self.write_registers))
+        self.write_registers[:n] = data[:n]
+
+    def _read(self, n: int) -> bytes:
+        if not self.powered_down:
+            self.convert()
+        return bytes(self.read_registers[:n]) + bytes(max(0, n - 10))
+
+    def convert(self) -> None:
+        x, y, z = (
+            _clip(round(axis / self.SCALE), -2048, 2047) & 0x0FFF
+            for axis in self.measure()
+        )
+        self.frame = (self.frame + 1) & 0x03
+        registers = self.read_registers
+        registers[0] = x >> 4
+        registers[1] = y >> 4
+        registers[2] = z >> 4
+        registers[3] = ((self.TEMPERATURE_RAW >> 8) << 4) | (self.frame << 2)
+        registers[4] = ((x & 0x0F) << 4) | (y & 0x0F)
+        registers[5] = 0x10 | (z & 0x0F)  # PD flag: conversion complete.
+        registers[6] = self.TEMPERATURE_RAW & 0xFF
@@ -0,0 +1,77 @@
+"""Stand-in for CircuitPython's ``busio``, backed by simulated chips."""
+
+import errno
+
+
+class I2C:
+    def __init__(self, scl, sda, *, frequency: int = 100000, timeout: int = 255):
+        if scl is sda or scl.board is not sda.board:
+            raise ValueError("Invalid pins")
+        self.frequency = frequency
+        self._devices = sda.board.i2c_devices(scl, sda)
+        self._locked = False
+        self._deinited = False
+
+    def deinit(self) -> None:
+        self._deinited = True
+        self._locked = False
+
+    def __enter__(self) -> "I2C":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.deinit()
+
+    def try_lock(self) -> bool:
+        if self._deinited:
+            raise ValueError("Object has been deinitialized and can no longer be used.")
+        if self._locked:
+            return False
+        self._locked = True
+        return True
+
+    def unlock(self) -> None:
+        self._locked = False
+
+    def _check_lock(self) -> None:
+        if self._deinited:
+            raise ValueError("Object has been deinitialized and can no longer be used.")
+        if not self._locked:
+            raise RuntimeError("Function requires lock")
+
+    def _device(self, address: int):
+        self._check_lock()
+        try:
+            return self._devices[address]
+        except KeyError:
+            raise OSError(errno.ENODEV, "No such device") from None
+
+    def scan(self) -> list:
+        self._check_lock()
+        return sorted(self._devices)
+
+    def readfrom_into(self, address: int, buffer, *, start: int = 0, end=None) -> None:
+        if end is None:
+            end = len(buffer)
+        buffer[start:end] = self._device(address).read(end - start)
+
+    def writeto(self, address: int, buffer, *, start: int = 0, end=None) -> None:
+        self._device(address).write(bytes(buffer[start:end]))
+
+    def writeto_then_readfrom(
+        self,
+        address: int,
+        out_buffer,
+        in_buffer,
+        *,
+        out_start: int = 0,
+        out_end=None,
+        in_start: int = 0,
+        in_end=None,
+    ) -> None:
+        device = self._device(address)
+        # Copy first; drivers commonly pass the same buffer for both.
+        device.write(bytes(out_buffer[out_start:out_end]))
+        if in_end is None:
+            in_end = len(in_buffer)
+        in_buffer[in_start:in_end] = device.read(in_end - in_start)
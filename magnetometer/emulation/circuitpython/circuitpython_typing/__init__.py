@@ -0,0 +1,6 @@
+"""Stand-in for ``circuitpython_typing``, so driver annotations evaluate."""
+
+from typing import Union
+
+ReadableBuffer = Union[bytes, bytearray, memoryview]
+WriteableBuffer = Union[bytearray, memoryview]
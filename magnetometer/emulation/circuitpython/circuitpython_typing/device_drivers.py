@@ -0,0 +1,3 @@
+from typing import Any
+
+I2CDeviceDriver = Any
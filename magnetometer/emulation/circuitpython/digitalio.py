@@ -0,0 +1,58 @@
+"""Stand-in for CircuitPython's ``digitalio``.
+
+Pins are not connected to anything; inputs read their pull (or ``False``).
+"""
+
+
+class Direction:
+    INPUT = "INPUT"
+    OUTPUT = "OUTPUT"
+
+
+class Pull:
+    UP = "UP"
+    DOWN = "DOWN"
+
+
+class DriveMode:
+    PUSH_PULL = "PUSH_PULL"
+    OPEN_DRAIN = "OPEN_DRAIN"
+
+
+class DigitalInOut:
+    def __init__(self, pin):
+        self.pin = pin
+        self.direction = Direction.INPUT
+        self.pull = None
+        self.drive_mode = DriveMode.PUSH_PULL
+        self._value = False
+
+    def deinit(self) -> None:
+        pass
+
+    def __enter__(self) -> "DigitalInOut":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.deinit()
+
+    def switch_to_output(self, value=False, drive_mode=DriveMode.PUSH_PULL) -> None:
+        self.direction = Direction.OUTPUT
+        self.drive_mode = drive_mode
+        self._value = value
+
+    def switch_to_input(self, pull=None) -> None:
+        self.direction = Direction.INPUT
+        self.pull = pull
+
+    @property
+    def value(self) -> bool:
+        if self.direction == Direction.INPUT:
+            return self.pull == Pull.UP
+        return self._value
+
+    @value.setter
+    def value(self, value: bool) -> None:
+        if self.direction == Direction.INPUT:
+            raise AttributeError("Cannot set value when direction is input.")
+        self._value = value
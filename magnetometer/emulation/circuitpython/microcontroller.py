@@ -0,0 +1,16 @@
+"""Stand-in for CircuitPython's ``microcontroller`` module."""
+
+
+class Pin:
+    """A GPIO on an emulated board.
+
+    ``board`` is the owning ``magnetometer.emulation.EmulatedBoard``, which
+    knows which simulated chips are wired to which pins.
+    """
+
+    def __init__(self, board, name: str):
+        self.board = board
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"board.{self.name}"
@@ -0,0 +1,14 @@
+"""Stand-in for MicroPython's ``micropython`` module."""
+
+
+def const(value):
+    return value
+
+
+def _unsupported_emitter(f):
+    # Belay probes for native emitters and expects this exact message.
+    raise SyntaxError("invalid micropython decorator")
+
+
+native = _unsupported_emitter
+viper = _unsupported_emitter
@@ -0,0 +1,266 @@
+"""Digital filters applied to sample batches on the host.
+
+On-device oversampling is a boxcar average, which can't reject mains hum. The
+filters here are second-order IIR sections (biquads), designed for the
+measured sample rate:
+
+* ``lowpass``: Butterworth low-pass, to smooth noise.
+* ``highpass``: Butterworth high-pass at a low cutoff, to block the static
+  (DC) field and show only changes.
+* ``notch``: narrow band-stop, e.g. at 50 or 60 Hz to reject mains hum.
+
+Each filter keeps its state across batches, and a whole batch is filtered
+with one matrix product over all samples and axes.
+"""
+
+from math import cos, pi, sin, sqrt
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+__all__ = [
+    "Biquad",
+    "DEFAULT_FREQUENCIES",
+    "FilterChain",
+    "KINDS",
+    "filter_chain",
+]
+
+KINDS = ("lowpass", "highpass", "notch")
+# Hz, for filters toggled on without a configured frequency.
+DEFAULT_FREQUENCIES = {"lowpass": 1.0, "highpass": 0.05, "notch": 50.0}
+
+# Longest run of samples filtered by one matrix product.
+_BLOCK = 256
+
+
+class Biquad:
+    """Second-order IIR section applied independently to each channel.
+
+    Coefficients follow the Audio EQ Cookbook. A batch of ``n`` samples is
+    filtered as ``y = T @ x + G @ state``, where ``T`` holds the first ``n``
+    terms of the impulse response and ``G`` the response to the carried-over
+    state. Both are computed once per batch length.
+
+    Parameters
+    ----------
+    kind: str
+        One of ``KINDS``.
+    frequency: float
+        Cutoff (low/high-pass) or center (notch) frequency, in Hz.
+    q: Optional[float]
+        Quality factor. Defaults to 1/sqrt(2) (Butterworth) for low/high-pass
+        and 10 for the notch, i.e. a stop band of a tenth of ``frequency``.
+    """
+
+    def __init__(self, kind: str, frequency: float, q: Optional[float] = None):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown filter {kind!r}; expected one of {KINDS}.")
+        self.kind = kind
+        self.frequency = frequency
+        self.q = q or (10.0 if kind == "notch" else 1 / sqrt(2))
+        self.rate: Optional[float] = None
+        self.b = (1.0, 0.0, 0.0)
+        self.a = (0.0, 0.0)
+        self.state: Optional[np.ndarray] = None
+        self._blocks: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    @property
+    def valid(self) -> bool:
+        """Whether ``frequency`` is below the Nyquist frequency of ``rate``."""
+        return self.rate is not None and 0 < self.frequency < self.rate / 2
+
+    def design(self, rate: float) -> None:
+        """Compute coefficients for ``rate`` samples per second.
+
+        The state is kept, so redesigning for a drifting rate doesn't restart
+        the filter.
+        """
+        self.rate = rate
+        self._blocks.clear()
+        if not self.valid:
+            return
+        w0 = 2 * pi * self.frequency / rate
+        alpha = sin(w0) / (2 * self.q)
+        c = cos(w0)
+        if self.kind == "lowpass":
+            b = ((1 - c) / 2, 1 - c, (1 - c) / 2)
+        elif self.kind == "highpass":
+            b = ((1 + c) / 2, -(1 + c), (1 + c) / 2)
+        else:
+            b = (1.0, -2 * c, 1.0)
+        a0 = 1 + alpha
+        self.b = tuple(coefficient / a0 for coefficient in b)
+        self.a = (-2 * c / a0, (1 - alpha) / a0)
+
+    def reset(self) -> None:
+        """Forget the state; the next batch starts as if its first value had
+        always been the input."""
+        self.state = None
+
+    def _block(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        if n not in self._blocks:
+            b0, b1, b2 = self.b
+            a1, a2 = self.a
+            # Impulse response, and responses to unit initial states, by
+            # running the transposed direct form II recursion.
+            responses = np.zeros((3, n))
+            for column, (x0, z0, z1) in enumerate(((1, 0, 0), (0, 1, 0), (0, 0, 1))):
+                for k in range(n):
+                    x = x0 if k == 0 else 0
+                    y = b0 * x + z0
+                    z0 = b1 * x - a1 * y + z1
+                    z1 = b2 * x - a2 * y
+                    responses[column, k] = y
+            impulse, state_response = responses[0], responses[1:].T
+            lag = np.subtract.outer(np.arange(n), np.arange(n))
+            toeplitz = np.where(lag >= 0, impulse[np.clip(lag, 0, None)], 0.0)
+            if len(self._blocks) > 32:
+                self._blocks.clear()
+            self._blocks[n] = toeplitz, state_response
+        return self._blocks[n]
+
+    def __call__(self, values: np.ndarray) -> np.ndarray:
+        """Filter an ``(n, channels)`` batch, continuing from the previous one."""
+        if not self.valid or not len(values):
+            return values
+        b0, b1, b2 = self.b
+        a1, a2 = self.a
+        if self.state is None:
+            # Steady state for a constant input equal to the first value.
+            x0 = values[0]
+            y0 = x0 * (b0 + b1 + b2) / (1 + a1 + a2)
+            z1 = b2 * x0 - a2 * y0
+            self.state = np.stack([b1 * x0 - a1 * y0 + z1, z1])
+
+        output = np.empty_like(values)
+        for start in range(0, len(values), _BLOCK):
+            x = values[start : start + _BLOCK]
+            toeplitz, state_response = self._block(len(x))
+            y = toeplitz @ x + state_response @ self.state
+            output[start : start + _BLOCK] = y
+            if len(x) > 1:
+                previous_z1 = b2 * x[-2] - a2 * y[-2]
+            else:
+                previous_z1 = self.state[1]
+            self.state = np.stack(
+                [b1 * x[-1] - a1 * y[-1] + previous_z1, b2 * x[-1] - a2 * y[-1]]
+            )
+        return output
+
+
+class FilterChain:
+    """Filters applied in order to timestamped batches, each toggled on or off.
+
+    The sample rate is estimated from the timestamps, and filters are
+    redesigned when it drifts by more than ``tolerance``.
+
+    Parameters
+    ----------
+    filters: Sequence[Biquad]
+        At most one filter of each kind.
+    enabled: Sequence[str]
+        Kinds of filter to start enabled.
+    smoothing: float
+        Weight of each new sample interval in the sample-rate estimate.
+    tolerance: float
+        Relative sample-rate change that triggers a redesign.
+    """
+
+    def __init__(
+        self,
+        filters: Sequence[Biquad],
+        enabled: Sequence[str] = (),
+        smoothing: float = 0.05,
+        tolerance: float = 0.05,
+    ):
+        self.filters = {biquad.kind: biquad for biquad in filters}
+        self.enabled = set(enabled)
+        self.smoothing = smoothing
+        self.tolerance = tolerance
+        self.period: Optional[float] = None
+        self._time: Optional[float] = None
+
+    @property
+    def active(self) -> bool:
+        return bool(self.enabled)
+
+    def toggle(self, kind: str) -> bool:
+        """Enable or disable a filter; returns whether it's now enabled."""
+        if kind in self.enabled:
+            self.enabled.discard(kind)
+            return False
+        if not self.enabled:
+            # Timestamps weren't tracked while every filter was off.
+            self._time = None
+        self.filters[kind].reset()
+        self.enabled.add(kind)
+        return True
+
+    def _update_rate(self, times: np.ndarray) -> None:
+        previous, self._time = self._time, float(times[-1])
+        if len(times) == 1:
+            # Common for direct reads; skip the array work.
+            if previous is None or self._time <= previous:
+                return
+            period = self._time - previous
+        else:
+            if previous is not None:
+                times = np.concatenate([[previous], times])
+            intervals = np.diff(times)
+            intervals = intervals[intervals > 0]
+            if not len(intervals):
+                return
+            period = float(np.median(intervals))
+        if self.period is None:
+            self.period = period
+        else:
+            self.period += self.smoothing * (period - self.period)
+
+        rate = 1 / self.period
+        for biquad in self.filters.values():
+            if biquad.rate is None or abs(rate / biquad.rate - 1) > self.tolerance:
+                biquad.design(rate)
+
+    def __call__(self, times: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Filter ``(n, channels)`` ``values`` sampled at ``time.time()`` ``times``."""
+        self._update_rate(np.asarray(times, dtype=float))
+        for kind in KINDS:
+            if kind in self.enabled and kind in self.filters:
+                values = self.filters[kind](values)
+        return values
+
+    def describe(self) -> str:
+        """Enabled filters, noting those the sample rate is too low for."""
+        descriptions = []
+        for kind in KINDS:
+            if kind not in self.enabled or kind not in self.filters:
+                continue
+            biquad = self.filters[kind]
+            description = f"{kind} {biquad.frequency:g} Hz"
+            if biquad.rate is not None and not biquad.valid:
+                description += (
+                    f" (inactive: needs > {2 * biquad.frequency:g} Hz sampling)"
+                )
+            descriptions.append(description)
+        return ", ".join(descriptions)
+
+
+def filter_chain(
+    lowpass: Optional[float] = None,
+    highpass: Optional[float] = None,
+    notch: Optional[float] = None,
+) -> FilterChain:
+    """Chain of one filter of each kind.
+
+    Filters given a frequency start enabled; the others use
+    ``DEFAULT_FREQUENCIES`` once toggled on.
+    """
+    frequencies = {"lowpass": lowpass, "highpass": highpass, "notch": notch}
+    return FilterChain(
+        [
+            Biquad(kind, frequency or DEFAULT_FREQUENCIES[kind])
+            for kind, frequency in frequencies.items()
+        ],
+        enabled=[kind for kind, frequency in frequencies.items() if frequency],
+    )
@@ -0,0 +1,80 @@
+"""Detect missed and repeated sensor conversions from sequence numbers.
+
+Each timed read reports ``sequence``, the number of sensor conversions the
+device has read so far, and ``samples``, how many it averaged into this
+reading. Between consecutive readings the sequence should advance by exactly
+``samples``. More means conversions were lost, e.g. readings the host fell
+too far behind to see or a TLV493D converting faster than it's read; less
+means some were read twice. Sensors without a conversion counter count every
+read as a new conversion, so only lost readings show up for them.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+__all__ = [
+    "GapCounter",
+]
+
+
+class GapCounter:
+    """Running totals of conversions missed and repeated between readings.
+
+    Attributes
+    ----------
+    missed: int
+        Conversions never seen.
+    repeated: int
+        Conversions read more than once.
+    gaps: int
+        Readings preceded by missed conversions.
+    """
+
+    def __init__(self):
+        self.missed = 0
+        self.repeated = 0
+        self.gaps = 0
+        self._previous: Optional[float] = None
+
+    def __call__(self, sequences: np.ndarray, samples: np.ndarray) -> np.ndarray:
+        """Account for a batch of readings.
+
+        Parameters
+        ----------
+        sequences: np.ndarray
+            ``(n,)`` device conversion counts.
+        samples: np.ndarray
+            ``(n,)`` conversions averaged into each reading.
+
+        Returns
+        -------
+        np.ndarray
+            ``(n,)`` conversions missed just before each reading.
+        """
+        sequences = np.asarray(sequences, dtype=float)
+        if not len(sequences):
+            return np.zeros(0)
+        previous = (
+            sequences[0] - samples[0] if self._previous is None else self._previous
+        )
+        self._previous = float(sequences[-1])
+        steps = np.diff(sequences, prepend=previous)
+        excess = steps - samples
+        # A count going backwards means the device restarted; there's nothing
+        # to compare the first reading after it with.
+        excess[steps < 0] = 0
+        missed = np.clip(excess, 0, None)
+        self.missed += int(missed.sum())
+        self.repeated += int(-excess[excess < 0].sum())
+        self.gaps += int(np.count_nonzero(missed))
+        return missed
+
+    def describe(self) -> str:
+        """Totals so far, or ``""`` if nothing was missed or repeated."""
+        parts = []
+        if self.missed:
+            parts.append(f"{self.missed} missed in {self.gaps} gaps")
+        if self.repeated:
+            parts.append(f"{self.repeated} repeated")
+        return ", ".join(parts)
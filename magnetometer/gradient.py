@@ -0,0 +1,57 @@
+"""Field gradient across an array of sensors at known positions.
+
+Models the field near the array as ``B(p) = B0 + G @ (p - center)`` and fits
+``B0`` and the gradient tensor ``G[i, j] = dB_i / dx_j`` by least squares to
+the members' readings. Two sensors make a gradiometer along the line between
+them; four or more not in one plane give the full tensor.
+"""
+
+from typing import Sequence, Tuple
+
+import numpy as np
+
+__all__ = [
+    "Gradient",
+]
+
+
+class Gradient:
+    """Least-squares field and gradient tensor from simultaneous readings.
+
+    The fit reduces to one precomputed ``(3, members)`` matrix, so batches of
+    readings cost a single ``einsum``. Gradient components along directions
+    the positions don't span (e.g. across a two-sensor baseline) are zero.
+
+    Parameters
+    ----------
+    positions: Sequence[Sequence[float]]
+        ``(members, 3)`` sensor positions, in meters, in the order of the
+        readings' members.
+    """
+
+    def __init__(self, positions: Sequence[Sequence[float]]):
+        positions = np.array(positions, dtype=float)
+        if positions.ndim != 2 or positions.shape[1] != 3 or len(positions) < 2:
+            raise ValueError(
+                f"positions must be (members, 3) with at least 2 members, "
+                f"got {positions.shape}."
+            )
+        self.positions = positions
+        self.center = positions.mean(axis=0)
+        self._solve = np.linalg.pinv(positions - self.center)
+
+    def __call__(self, readings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Fit ``(..., members, 3)`` readings in microteslas.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            ``(..., 3)`` field at ``center``, in microteslas, and ``(..., 3, 3)``
+            gradient tensor, in microteslas per meter.
+        """
+        readings = np.asarray(readings, dtype=float)
+        field = readings.mean(axis=-2)
+        gradient = np.einsum(
+            "...mi,jm->...ij", readings - field[..., None, :], self._solve
+        )
+        return field, gradient
@@ -1,206 +1,706 @@
 from __future__ import annotations
 
-from collections import deque
-from datetime import datetime
 from enum import Enum
 from functools import partial
-from math import isfinite, nan, sqrt
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional
 
 import typer
-from rich.columns import Columns
-from rich.console import Console, Group, RenderableType
-from rich.panel import Panel
-from textual.app import App
-from textual.widget import Widget
-from textual.widgets import Footer
 from typer import Argument, Option
+from typer.core import TyperGroup
 
-import magnetometer.asciichartpy as acp
-from magnetometer import Sensor, __version__
+from magnetometer import __version__
+from magnetometer.profiling import Profiler, profile
+from magnetometer.sensors import SENSORS
 
-app = typer.Typer()
+if TYPE_CHECKING:
+    from rich.table import Table
 
-Arg = partial(Argument, ..., show_default=False)
-Opt = partial(Option)
-SensorEnum = Enum("SensorEnum", {k: k for k in Sensor}, type=str)
-
-sensor: Sensor
 
-X_COLOR = "red"
-Y_COLOR = "green"
-Z_COLOR = "blue"
-MAG_COLOR = "white"
+class DefaultCommandGroup(TyperGroup):
+    """Run the ``run`` command when no command is named.
 
+    Keeps ``magnetometer PORT`` working alongside ``magnetometer serve PORT``.
+    """
 
-class Chart(Widget):
-    def on_mount(self) -> None:
-        history_length = 1024
+    default_command = "run"
+    passthrough = {"--help", "--install-completion", "--show-completion"}
 
-        self.height = -1
-        self.width = -1
+    def parse_args(self, ctx, args):
+        if not args or (
+            args[0] not in self.commands and args[0] not in self.passthrough
+        ):
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
 
-        self.zero_x_val = 0
-        self.zero_y_val = 0
-        self.zero_z_val = 0
 
-        self.scale = 0
+app = typer.Typer(
+    cls=DefaultCommandGroup,
+    help="Chart a magnetic sensor; `magnetometer PORT` is short for `magnetometer run PORT`.",
+)
 
-        # Add a dummy zero-value to simulate an X-axis
-        self.history = deque(
-            [(0, nan, nan, nan, nan)] * history_length, maxlen=history_length
-        )
-        self.history.append((0, 0, 0, 0, 0))  # Need one valid data-point
-        self.set_interval(0.1, self.read_sensor)
-
-    def zero_x(self) -> None:
-        self.zero_x_val += self.history[-1][1]
-
-    def zero_y(self) -> None:
-        self.zero_y_val += self.history[-1][2]
-
-    def zero_z(self) -> None:
-        self.zero_z_val += self.history[-1][3]
-
-    def read_sensor(self) -> None:
-        x, y, z = sensor.read(self.scale)
-
-        x -= self.zero_x_val
-        y -= self.zero_y_val
-        z -= self.zero_z_val
-        mag = sqrt(x**2 + y**2 + z**2)
-
-        # Auto-scale logic
-        threshold = 0.9
-        if sensor.scales:
-            max_mag = max(x, y, z)
-            lower_scale = max(0, self.scale - 1)
-            new_scale = self.scale
-            if max_mag > threshold * sensor.scales[self.scale]:
-                new_scale = min(len(sensor.scales) - 1, self.scale + 1)
-            elif max_mag < threshold * sensor.scales[lower_scale]:
-                new_scale = lower_scale
-
-            if new_scale != self.scale:
-                self.scale = new_scale
-
-        self.history.append((0, x, y, z, mag))
-        self.refresh()
-
-    def on_resize(self, event):
-        self.height = event.height
-        self.width = event.width
-
-    def render(self) -> RenderableType:
-        if self.height == -1 or self.width == -1:
-            return ""
-
-        width = self.width - 13
-        cfg = {
-            "offset": 2,
-            "colors": ["", X_COLOR, Y_COLOR, Z_COLOR, MAG_COLOR],
-            "height": self.height - 5,
-        }
-
-        series = [list(elem)[-width:] for elem in zip(*self.history)]
-        max_mag = max(mag for mag in series[4] if isfinite(mag))
-
-        if max_mag > 1000:
-            units = "m"
-            series = [[x / 1000 for x in data] for data in series]
-        else:
-            units = "μ"
-
-        x = series[1][-1]
-        y = series[2][-1]
-        z = series[3][-1]
-        mag = series[4][-1]
-
-        buf = acp.plot(series, cfg)
-
-        return Group(
-            Panel(
-                buf,
-                title=f"Magnetometer v{__version__} ({sensor.__registry__.name})",
-            ),
-            Columns(
-                [
-                    f"[bold {X_COLOR}]X: {x:6.2f} {units}T[/]",
-                    f"[bold {Y_COLOR}]Y: {y:6.2f} {units}T[/]",
-                    f"[bold {Z_COLOR}]Z: {z:6.2f} {units}T[/]",
-                    f"[bold {MAG_COLOR}]Mag: {mag:6.2f} {units}T[/]",
-                ],
-                equal=True,
-                expand=True,
-                align="center",
-            ),
+Arg = partial(Argument, ..., show_default=False)
+Opt = partial(Option)
+SensorEnum = Enum("SensorEnum", {k: k for k in SENSORS}, type=str)
+
+
+class ChartOptions:
+    """Options of the commands that chart in the TUI, ``run`` and ``connect``.
+
+    Both commands declare each of these as ``name: type = ChartOptions.name``
+    and pass them on to ``configure_chart``.
+    """
+
+    log = Opt("", help="Filename to write debugging logs.")
+    print_stats = Opt(
+        False, "--stats", help="Print per-stage latency statistics on exit."
+    )
+    fft_size = Opt(
+        256,
+        min=8,
+        help="Samples per window of the spectrum pane (toggle it with f).",
+    )
+    windows = Opt(
+        [100],
+        "--window",
+        min=1,
+        help="Readings per window of the footer statistics; repeat for several windows (cycle through them with w).",
+    )
+    use_calibration = Opt(
+        True,
+        "--calibration/--no-calibration",
+        help="Correct readings with the sensor's saved calibration (press c to calibrate).",
+    )
+    lowpass = Opt(
+        None,
+        min=0,
+        help="Start with a Butterworth low-pass filter at this cutoff (Hz); toggle it with l.",
+    )
+    highpass = Opt(
+        None,
+        min=0,
+        help="Start with a DC-blocking high-pass filter at this cutoff (Hz); toggle it with h.",
+    )
+    notch = Opt(
+        None,
+        min=0,
+        help="Start with a notch filter at this frequency (Hz), e.g. 50 or 60 for mains hum; toggle it with n.",
+    )
+    trigger_level = Opt(
+        None,
+        min=0,
+        help="Save an event when the field magnitude rises through this level (μT).",
+    )
+    trigger_slope = Opt(
+        None,
+        min=0,
+        help="Save an event when the field changes faster than this (μT/s).",
+    )
+    trigger_saturation = Opt(
+        None,
+        min=0,
+        max=1,
+        help="Save an event when an axis reaches this fraction of the sensor's range, e.g. 0.95.",
+    )
+    pre_trigger = Opt(
+        100,
+        "--pre",
+        min=0,
+        help="Samples saved from before each trigger.",
+    )
+    post_trigger = Opt(
+        100,
+        "--post",
+        min=1,
+        help="Samples saved from each trigger on.",
+    )
+    events_path = Opt(
+        Path(),
+        "--events",
+        file_okay=False,
+        help="Directory trigger events are saved to, as CSV files.",
+    )
+
+
+def i2c_trace_table(summary: dict, samples: int) -> Table:
+    """Render ``Sensor.trace_i2c`` results, normalized per ``sensor.magnetic`` read."""
+    from rich.table import Table
+
+    table = Table(title=f"I2C transactions per read ({samples} reads)")
+    table.add_column("Address")
+    table.add_column("Register")
+    for column in ("Transactions", "Written (B)", "Read (B)", "Lock spins"):
+        table.add_column(column, justify="right")
+
+    totals = [0, 0, 0, 0]
+    for (address, register), counts in sorted(summary.items()):
+        totals = [total + count for total, count in zip(totals, counts)]
+        table.add_row(
+            f"0x{address:02X}",
+            "-" if register < 0 else f"0x{register:02X}",
+            *(f"{count / samples:g}" for count in counts),
         )
+    table.add_section()
+    table.add_row("Total", "", *(f"{total / samples:g}" for total in totals))
+    return table
 
 
-class MagnetometerApp(App):
-    async def on_load(self) -> None:
-        await self.bind("a", "zero_all", "Zero ALL")
-        await self.bind("x", "zero_x", "Zero X")
-        await self.bind("y", "zero_y", "Zero Y")
-        await self.bind("z", "zero_z", "Zero Z")
-        await self.bind("s", "screenshot", "Screenshot")
-
-        await self.bind("q", "quit", "Quit")
+def version_callback(value: bool):
+    if value:
+        print(__version__)
+        raise typer.Exit()
 
-    async def on_mount(self) -> None:
-        footer = Footer()
-        self.chart = Chart()
 
-        await self.view.dock(footer, edge="bottom")
-        await self.view.dock(self.chart, edge="top")
+def configure_chart(
+    sensor_name: str,
+    fft_size: int,
+    windows: List[int],
+    use_calibration: bool,
+    lowpass: Optional[float],
+    highpass: Optional[float],
+    notch: Optional[float],
+    trigger_level: Optional[float],
+    trigger_slope: Optional[float],
+    trigger_saturation: Optional[float],
+    pre_trigger: int,
+    post_trigger: int,
+    events_path: Path,
+):
+    """Set the ``magnetometer.tui`` globals from the ``ChartOptions``."""
+    from magnetometer import tui
+    from magnetometer.calibration import Calibration
+    from magnetometer.filters import filter_chain
+    from magnetometer.trigger import TriggeredCapture
+
+    tui.spectrum_size = fft_size
+    tui.stat_windows = tuple(windows)
+    if use_calibration:
+        tui.calibration = Calibration.load(sensor_name)
+    tui.filters = filter_chain(lowpass, highpass, notch)
+    if (trigger_level, trigger_slope, trigger_saturation) != (None, None, None):
+        tui.trigger = TriggeredCapture(
+            trigger_level,
+            trigger_slope,
+            trigger_saturation,
+            pre_trigger,
+            post_trigger,
+            events_path,
+        )
 
-    def action_zero_x(self) -> None:
-        self.chart.zero_x()
 
-    def action_zero_y(self) -> None:
-        self.chart.zero_y()
+def run_tui(
+    log: Path,
+    print_stats: bool,
+    profile_path: Optional[Path] = None,
+    profiler: Profiler = Profiler.auto,
+    trace_allocations: float = 0,
+):
+    """Run ``MagnetometerApp`` with the ``magnetometer.tui`` globals already set."""
+    from rich.console import Console
 
-    def action_zero_z(self) -> None:
-        self.chart.zero_z()
+    from magnetometer import tui
 
-    def action_zero_all(self) -> None:
-        self.chart.zero_x()
-        self.chart.zero_y()
-        self.chart.zero_z()
+    log: str = str(log)
+    if log == ".":
+        log = ""
 
-    def action_screenshot(self) -> None:
-        time = datetime.now().isoformat(timespec="seconds", sep=" ")
-        fn_svg = Path(f"magnetometer {time}.svg")
-        console = Console(record=True)
-        console.print(self)
-        console.save_svg(str(fn_svg), title=time)
+    with profile(
+        profile_path,
+        profiler=profiler,
+        allocation_interval=trace_allocations,
+        frames=lambda: tui.stats.histograms["rich"].count,
+    ):
+        try:
+            tui.MagnetometerApp.run(log=log)
+        finally:
+            if tui.pipeline:
+                tui.pipeline.close()
+            if tui.telemetry:
+                tui.telemetry.close()
+
+    if print_stats:
+        Console().print(tui.stats.table(title="Latency"))
+
+
+@app.command("run")
+def main(
+    port: str = Arg(help="CircuitPython device communication port."),
+    sda: int = Opt(0, help="Device I2C SDA GPIO number."),
+    scl: int = Opt(1, help="Device I2C SCL GPIO number."),
+    sensor_name: SensorEnum = Opt(
+        "lis3mdl", "--sensor", case_sensitive=False, help="Sensor Type."
+    ),
+    version: Optional[bool] = Opt(
+        None, "--version", callback=version_callback, help="Print Magnetometer version."
+    ),
+    log: Path = ChartOptions.log,
+    print_stats: bool = ChartOptions.print_stats,
+    fft_size: int = ChartOptions.fft_size,
+    windows: List[int] = ChartOptions.windows,
+    use_calibration: bool = ChartOptions.use_calibration,
+    lowpass: Optional[float] = ChartOptions.lowpass,
+    highpass: Optional[float] = ChartOptions.highpass,
+    notch: Optional[float] = ChartOptions.notch,
+    trigger_level: Optional[float] = ChartOptions.trigger_level,
+    trigger_slope: Optional[float] = ChartOptions.trigger_slope,
+    trigger_saturation: Optional[float] = ChartOptions.trigger_saturation,
+    pre_trigger: int = ChartOptions.pre_trigger,
+    post_trigger: int = ChartOptions.post_trigger,
+    events_path: Path = ChartOptions.events_path,
+    profile_path: Optional[Path] = Opt(
+        None,
+        "--profile",
+        help="Profile the session and write the results to this file on quit.",
+    ),
+    profiler: Profiler = Opt(
+        Profiler.auto,
+        case_sensitive=False,
+        help="cProfile writes pstats; sampling (requires pyinstrument) writes speedscope JSON. auto prefers sampling.",
+    ),
+    trace_allocations: float = Opt(
+        0,
+        help="With --profile, take tracemalloc snapshots this many seconds apart and report per-frame allocations by line.",
+    ),
+    telemetry_path: Optional[Path] = Opt(
+        None,
+        "--telemetry",
+        help="Collect on-device timing and memory telemetry, appending it to this CSV file.",
+    ),
+    trace_i2c: int = Opt(
+        0,
+        help="Trace the I2C transactions behind this many sensor reads, print a per-register summary, and exit.",
+    ),
+    samples: int = Opt(
+        16, min=1, help="Samples averaged on-device per reading (oversampling)."
+    ),
+    rate: Optional[float] = Opt(
+        None,
+        min=0,
+        help="Target readings per second; oversampling adapts to the measured read time.",
+    ),
+    noise: Optional[float] = Opt(
+        None,
+        min=0,
+        help="Target per-axis noise (μT); oversampling adapts to the measured sensor noise. Combine with --rate to cap the rate.",
+    ),
+    pipeline: int = Opt(
+        1,
+        min=1,
+        help="Number of sensor reads to keep in flight, overlapping the device round trip with rendering. 1 disables pipelining.",
+    ),
+    reset: bool = Opt(
+        False,
+        help="Soft-reset the board and re-initialize the sensor even if it is still configured from a previous session.",
+    ),
+    multiprocess: bool = Opt(
+        False,
+        help="Read the sensor in a separate process, handing samples to the UI through shared memory.",
+    ),
+    ring_name: Optional[str] = Opt(
+        None,
+        "--ring",
+        help="With --multiprocess, name the shared-memory sample ring so other processes can attach to it.",
+    ),
+):
+    """Read a sensor and chart it."""
+    from rich.console import Console
+
+    from magnetometer import tui
+    from magnetometer.sensors import get_sensor
+
+    if trace_allocations and not profile_path:
+        raise typer.BadParameter("--trace-allocations requires --profile.")
+    configure_chart(
+        sensor_name.value,
+        fft_size,
+        windows,
+        use_calibration,
+        lowpass,
+        highpass,
+        notch,
+        trigger_level,
+        trigger_slope,
+        trigger_saturation,
+        pre_trigger,
+        post_trigger,
+        events_path,
+    )
+    acquisition = None
+    sensor = None
+    if multiprocess:
+        if telemetry_path or pipeline > 1 or trace_i2c:
+            raise typer.BadParameter(
+                "--multiprocess can't be combined with --telemetry, --pipeline or --trace-i2c."
+            )
+        from magnetometer.acquisition import AcquisitionProcess
+
+        acquisition = AcquisitionProcess(
+            sensor_name.value,
+            port,
+            samples=samples,
+            interval=tui.Chart.interval,
+            rate=rate,
+            noise=noise,
+            ring_name=ring_name,
+            sda=sda,
+            scl=scl,
+            reset=reset,
+        )
+        acquisition.start()
+        tui.sensor = get_sensor(sensor_name.value)
+        tui.ring = acquisition.ring
+    else:
+        sensor = get_sensor(sensor_name.value)(port, sda=sda, scl=scl, reset=reset)
+
+    try:
+        if sensor is not None:
+            if trace_i2c > 0:
+                table = i2c_trace_table(sensor.trace_i2c(trace_i2c), trace_i2c)
+                Console().print(table)
+                raise typer.Exit()
+
+            tui.sensor = sensor
+            tui.samples = samples
+            if pipeline > 1:
+                tui.pipeline = sensor.pipelined(pipeline)
+            if rate or noise:
+                from magnetometer.oversampling import OversamplingController
+
+                tui.controller = OversamplingController(
+                    rate, noise, samples=samples, overlapped=pipeline > 1
+                )
+            if telemetry_path:
+                from magnetometer.telemetry import Telemetry
+
+                tui.telemetry = Telemetry(telemetry_path)
+
+        run_tui(log, print_stats, profile_path, profiler, trace_allocations)
+    finally:
+        if acquisition:
+            acquisition.stop()
+        if sensor is not None:
+            sensor.close()
 
 
-def version_callback(value: bool):
-    if value:
-        print(__version__)
-        raise typer.Exit()
+@app.command()
+def serve(
+    port: str = Arg(help="CircuitPython device communication port."),
+    sda: int = Opt(0, help="Device I2C SDA GPIO number."),
+    scl: int = Opt(1, help="Device I2C SCL GPIO number."),
+    sensor_name: SensorEnum = Opt(
+        "lis3mdl", "--sensor", case_sensitive=False, help="Sensor Type."
+    ),
+    address: Optional[str] = Opt(
+        None,
+        show_default=False,
+        help="Unix socket path, or HOST:PORT to listen on TCP. Defaults to magnetometer.sock in the temporary directory.",
+    ),
+    interval: float = Opt(0.1, min=0, help="Seconds between sensor reads."),
+    samples: int = Opt(
+        16, min=1, help="Samples averaged on-device per reading (oversampling)."
+    ),
+    rate: Optional[float] = Opt(
+        None,
+        min=0,
+        help="Target readings per second; oversampling adapts to the measured read time.",
+    ),
+    noise: Optional[float] = Opt(
+        None,
+        min=0,
+        help="Target per-axis noise (μT); oversampling adapts to the measured sensor noise. Combine with --rate to cap the rate.",
+    ),
+    batch_interval: float = Opt(
+        0.05, min=0, help="Seconds between frames sent to subscribers."
+    ),
+    max_pending: int = Opt(
+        64,
+        min=1,
+        help="Frames queued for a slow subscriber before its oldest are dropped.",
+    ),
+    reset: bool = Opt(
+        False,
+        help="Soft-reset the board and re-initialize the sensor even if it is still configured from a previous session.",
+    ),
+    ring_name: Optional[str] = Opt(
+        None,
+        "--ring",
+        help="Name the shared-memory sample ring so local processes can also attach to it directly.",
+    ),
+):
+    """Own the sensor and stream its samples to any number of subscribers."""
+    import asyncio
+    import logging
+
+    from magnetometer.acquisition import AcquisitionProcess
+    from magnetometer.server import DEFAULT_ADDRESS, StreamServer
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    with AcquisitionProcess(
+        sensor_name.value,
+        port,
+        samples=samples,
+        interval=interval,
+        rate=rate,
+        noise=noise,
+        ring_name=ring_name,
+        sda=sda,
+        scl=scl,
+        reset=reset,
+    ) as acquisition:
+        server = StreamServer(
+            acquisition.ring,
+            sensor_name.value,
+            address=address or DEFAULT_ADDRESS,
+            batch_interval=batch_interval,
+            max_pending=max_pending,
+        )
+        try:
+            asyncio.run(server.serve())
+        except KeyboardInterrupt:
+            pass
 
 
 @app.command()
-def main(
+def capture(
     port: str = Arg(help="CircuitPython device communication port."),
     sda: int = Opt(0, help="Device I2C SDA GPIO number."),
     scl: int = Opt(1, help="Device I2C SCL GPIO number."),
     sensor_name: SensorEnum = Opt(
         "lis3mdl", "--sensor", case_sensitive=False, help="Sensor Type."
     ),
-    version: Optional[bool] = Opt(
-        None, "--version", callback=version_callback, help="Print Magnetometer version."
+    level: Optional[float] = Opt(
+        None,
+        min=0,
+        help="Trigger when the field magnitude rises through this level (μT).",
+    ),
+    slope: Optional[float] = Opt(
+        None,
+        min=0,
+        help="Trigger when the field changes faster than this between consecutive readings (μT/s).",
+    ),
+    axis: Optional[float] = Opt(
+        None,
+        min=0,
+        help="Trigger when any axis reaches this magnitude (μT). The LIS2MDL checks every conversion with its threshold interrupt.",
+    ),
+    pre_trigger: int = Opt(
+        64, "--pre", min=0, help="Readings saved from before each trigger."
+    ),
+    post_trigger: int = Opt(
+        64, "--post", min=1, help="Readings saved from each trigger on."
+    ),
+    events_path: Path = Opt(
+        Path(),
+        "--events",
+        file_okay=False,
+        help="Directory events are saved to, as CSV files.",
+    ),
+    count: int = Opt(0, min=0, help="Stop after this many events; 0 never stops."),
+    scale: int = Opt(0, min=0, help="Index of the sensor range to read at."),
+    reset: bool = Opt(
+        False,
+        help="Soft-reset the board and re-initialize the sensor even if it is still configured from a previous session.",
     ),
-    log: Path = Opt("", help="Filename to write debugging logs."),
 ):
-    global sensor
-    sensor = Sensor[sensor_name.value](port, sda=sda, scl=scl)
+    """Wait for triggers on the device and save the readings around each one.
+
+    The board reads the sensor as fast as it can and evaluates the trigger
+    itself, only sending readings over the serial link once it fires, so the
+    link's bandwidth doesn't limit the sample rate.
+    """
+    from time import time
+
+    import numpy as np
+
+    from magnetometer.sensors import get_sensor
+    from magnetometer.trigger import save_event
+
+    if (level, slope, axis) == (None, None, None):
+        raise typer.BadParameter("Specify at least one of --level, --slope or --axis.")
+    sensor = get_sensor(sensor_name.value)(port, sda=sda, scl=scl, reset=reset)
+    saved = 0
+    try:
+        while not count or saved < count:
+            # Return to the host regularly so Ctrl-C isn't stuck on the device.
+            event = sensor.capture(
+                level, slope, axis, pre_trigger, post_trigger, scale, timeout=5
+            )
+            t_received = time()
+            if event is None:
+                continue
+            reason, n_pre, times_ns, xs, ys, zs = event
+            # Device timestamps are relative to the trigger; the last reading
+            # was taken about when the result arrived.
+            times = t_received + (np.array(times_ns) - times_ns[-1]) * 1e-9
+            path = save_event(
+                events_path, np.column_stack([times, xs, ys, zs]), n_pre, reason
+            )
+            saved += 1
+            typer.echo(f"{reason}: saved {path}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sensor.close()
 
-    log: str = str(log)
-    if log == ".":
-        log = ""
 
-    MagnetometerApp.run(log=log)
+@app.command()
+def record(
+    boards: Optional[List[str]] = Argument(
+        None,
+        show_default=False,
+        help="Board ports, each optionally followed by =SENSOR[,SENSOR...] for the sensors on its I2C bus, e.g. /dev/ttyACM0=lis3mdl,lis3mdl@0x1E.",
+    ),
+    config: Optional[Path] = Opt(
+        None,
+        exists=True,
+        dir_okay=False,
+        help='JSON file listing boards, e.g. {"sda": 0, "scl": 1, "boards": [{"port": "/dev/ttyACM0", "sensors": ["lis3mdl"]}]}.',
+    ),
+    sda: int = Opt(0, help="Device I2C SDA GPIO number, unless a board sets its own."),
+    scl: int = Opt(1, help="Device I2C SCL GPIO number, unless a board sets its own."),
+    sensor_name: SensorEnum = Opt(
+        "lis3mdl",
+        "--sensor",
+        case_sensitive=False,
+        help="Sensor Type of boards that don't list their sensors.",
+    ),
+    interval: float = Opt(0.1, min=0, help="Seconds between reads of each board."),
+    samples: int = Opt(
+        16, min=1, help="Samples averaged on-device per reading (oversampling)."
+    ),
+    period: Optional[float] = Opt(
+        None,
+        min=0,
+        show_default=False,
+        help="Seconds between rows of the merged timeline. Defaults to --interval.",
+    ),
+    output: Optional[Path] = Opt(
+        None,
+        "--output",
+        "-o",
+        dir_okay=False,
+        show_default=False,
+        help="CSV file to write. Defaults to standard output.",
+    ),
+    duration: float = Opt(0, min=0, help="Seconds to record; 0 records until Ctrl-C."),
+    use_calibration: bool = Opt(
+        True,
+        "--calibration/--no-calibration",
+        help="Correct readings with each sensor's saved calibration.",
+    ),
+    reset: bool = Opt(
+        False,
+        help="Soft-reset the boards and re-initialize their sensors even if they are still configured from a previous session.",
+    ),
+):
+    """Record several boards at once onto one timeline, as CSV.
+
+    Each board is read on its own thread and stamped on the host clock from
+    its own clock, so one process covers every board and their readings
+    line up. Rows are resampled to a common period; a channel is left empty
+    where its board missed readings.
+
+    If the --config boards give their sensors' positions, each row also
+    holds the fitted field at their center (field.x, ...) and its gradient
+    tensor in μT/m (gradient.xy is dBx/dy, ...).
+    """
+    import sys
+    from time import monotonic, sleep
+
+    import numpy as np
+
+    from magnetometer.boards import BoardSet, load_boards, parse_board
+
+    board_list = load_boards(config) if config else []
+    board_list.extend(parse_board(spec) for spec in boards or [])
+    if not board_list:
+        raise typer.BadParameter("Specify at least one board, or --config.")
+    board_set = BoardSet(
+        board_list,
+        sensor_name.value,
+        samples=samples,
+        interval=interval,
+        period=period,
+        calibration=use_calibration,
+        sda=sda,
+        scl=scl,
+        reset=reset,
+    )
+    f = open(output, "w") if output else sys.stdout
+    rows = 0
+    try:
+        with board_set:
+            columns = [f"{c}.{axis}" for c in board_set.channels for axis in "xyz"]
+            derived = []
+            if board_set.gradient is not None:
+                derived = [f"field.{axis}" for axis in "xyz"]
+                derived += [f"gradient.{i}{j}" for i in "xyz" for j in "xyz"]
+            f.write(",".join(["time", *columns, *derived]) + "\n")
+            t_end = monotonic() + duration
+            while not duration or monotonic() < t_end:
+                sleep(0.2)
+                times, fields = board_set.read()
+                parts = [times, fields.reshape(len(times), len(columns))]
+                if board_set.gradient is not None:
+                    field, gradient = board_set.gradient(fields)
+                    parts += [field, gradient.reshape(len(times), 9)]
+                table = np.column_stack(parts)
+                for row in table.tolist():
+                    # NaN, where a board missed readings, is left empty.
+                    f.write(",".join("" if v != v else repr(v) for v in row) + "\n")
+                rows += len(times)
+                f.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if output:
+            f.close()
+            typer.echo(f"Wrote {rows} rows to {output}", err=True)
+
+
+@app.command()
+def connect(
+    address: Optional[str] = Argument(
+        None,
+        show_default=False,
+        help="Address of a running `magnetometer serve`, if not the default.",
+    ),
+    log: Path = ChartOptions.log,
+    print_stats: bool = ChartOptions.print_stats,
+    fft_size: int = ChartOptions.fft_size,
+    windows: List[int] = ChartOptions.windows,
+    use_calibration: bool = ChartOptions.use_calibration,
+    lowpass: Optional[float] = ChartOptions.lowpass,
+    highpass: Optional[float] = ChartOptions.highpass,
+    notch: Optional[float] = ChartOptions.notch,
+    trigger_level: Optional[float] = ChartOptions.trigger_level,
+    trigger_slope: Optional[float] = ChartOptions.trigger_slope,
+    trigger_saturation: Optional[float] = ChartOptions.trigger_saturation,
+    pre_trigger: int = ChartOptions.pre_trigger,
+    post_trigger: int = ChartOptions.post_trigger,
+    events_path: Path = ChartOptions.events_path,
+):
+    """Chart the samples of a running `magnetometer serve`."""
+    from magnetometer import tui
+    from magnetometer.sensors import get_sensor
+    from magnetometer.server import DEFAULT_ADDRESS, StreamClient
+
+    with StreamClient(address or DEFAULT_ADDRESS) as client:
+        tui.sensor = get_sensor(client.sensor_name)
+        tui.ring = client
+        configure_chart(
+            client.sensor_name,
+            fft_size,
+            windows,
+            use_calibration,
+            lowpass,
+            highpass,
+            notch,
+            trigger_level,
+            trigger_slope,
+            trigger_saturation,
+            pre_trigger,
+            post_trigger,
+            events_path,
+        )
+        run_tui(log, print_stats)
@@ -0,0 +1,191 @@
+"""Adaptive oversampling to hit a requested output rate and/or noise floor."""
+
+from math import ceil, inf, sqrt
+from typing import Optional, Sequence
+
+__all__ = [
+    "OversamplingController",
+]
+
+
+class OversamplingController:
+    """Choose how many samples ``Sensor.read`` averages per reading.
+
+    Read time is modelled as ``overhead + samples * per_sample``, fitted by an
+    exponentially weighted linear regression over measured round trips. Sensor
+    noise is estimated from the difference of consecutive readings; averaging
+    ``samples`` samples divides its standard deviation by ``sqrt(samples)``.
+
+    Parameters
+    ----------
+    rate: Optional[float]
+        Requested readings per second.
+    noise: Optional[float]
+        Requested per-axis noise standard deviation, in microteslas.
+        Readings are made as fast as this allows, limited by ``rate`` if given.
+    samples: int
+        Initial number of samples per reading.
+    min_samples: int
+        Fewest samples per reading.
+    max_samples: int
+        Most samples per reading.
+    overlapped: bool
+        Host-side processing overlaps the round trip (see
+        ``magnetometer.pipeline``), so it doesn't eat into the rate's time budget.
+    smoothing: float
+        Weight of each new measurement in the running estimates.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        noise: Optional[float] = None,
+        samples: int = 16,
+        min_samples: int = 1,
+        max_samples: int = 256,
+        overlapped: bool = False,
+        smoothing: float = 0.1,
+    ):
+        if rate is None and noise is None:
+            raise ValueError("Either rate or noise must be specified.")
+        self.rate = rate
+        self.noise = noise
+        self.samples = min(max(samples, min_samples), max_samples)
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.overlapped = overlapped
+        self.smoothing = smoothing
+
+        # Exponentially weighted moments of (samples, seconds) for the fit.
+        self._moments: Optional[list] = None
+        self.host = 0.0
+        # Variance of a single sample, per axis, in microteslas squared.
+        self.sample_variance: Optional[float] = None
+        self._previous: Optional[tuple] = None
+
+    def _ewma(self, old: Optional[float], new: float) -> float:
+        return new if old is None else old + self.smoothing * (new - old)
+
+    @property
+    def model(self) -> tuple:
+        """``(overhead, per_sample)`` seconds of the fitted read time."""
+        if self._moments is None:
+            return 0.0, 0.0
+        n, t, nn, nt = self._moments
+        variance = nn - n * n
+        if variance > 1e-6 * n * n:
+            per_sample = max((nt - n * t) / variance, 0.0)
+            overhead = max(t - per_sample * n, 0.0)
+        else:
+            # Without varying ``samples``, attribute everything to sampling.
+            per_sample, overhead = t / n, 0.0
+        return overhead, per_sample
+
+    def read_time(self, samples: int) -> float:
+        """Predicted seconds for a read of ``samples`` samples."""
+        overhead, per_sample = self.model
+        return overhead + samples * per_sample
+
+    def period(self, samples: int) -> float:
+        """Predicted seconds between readings of ``samples`` samples."""
+        if self.overlapped:
+            return max(self.read_time(samples), self.host)
+        return self.read_time(samples) + self.host
+
+    @property
+    def max_rate(self) -> float:
+        """Highest reachable readings per second."""
+        period = self.period(self.min_samples)
+        return 1 / period if period > 0 else inf
+
+    @property
+    def interval(self) -> float:
+        """Seconds to wait between the starts of consecutive reads."""
+        period = self.period(self.samples)
+        if self.rate:
+            return max(1 / self.rate, period)
+        return period
+
+    @property
+    def achieved_noise(self) -> Optional[float]:
+        """Predicted per-axis noise in microteslas at the current ``samples``."""
+        if self.sample_variance is None:
+            return None
+        return sqrt(self.sample_variance / self.samples)
+
+    @property
+    def warning(self) -> Optional[str]:
+        """Why the requested rate or noise can't be reached, if it can't."""
+        if self._moments is None:
+            return None
+        problems = []
+        if self.rate and self.max_rate < self.rate * 0.98:
+            problems.append(
+                f"{self.rate:g} Hz requested, but this sensor reaches at most "
+                f"{self.max_rate:.1f} Hz"
+            )
+        noise = self.achieved_noise
+        if self.noise and noise is not None and noise > self.noise * 1.02:
+            problems.append(
+                f"{self.noise:g} μT noise requested, but {noise:.3g} μT is the best "
+                "reachable"
+            )
+        return "; ".join(problems) or None
+
+    def update(
+        self,
+        reading: Sequence[float],
+        samples: int,
+        round_trip_ns: int,
+        host_ns: int = 0,
+    ) -> int:
+        """Account for a completed read and choose ``samples`` for the next one.
+
+        Parameters
+        ----------
+        reading: Sequence[float]
+            (x, y, z) reading in microteslas.
+        samples: int
+            Samples averaged into ``reading``.
+        round_trip_ns: int
+            Host-measured duration of the read.
+        host_ns: int
+            Host-side processing time per reading, outside the read.
+
+        Returns
+        -------
+        int
+            Samples to request in the next read; also stored in ``samples``.
+        """
+        seconds = round_trip_ns / 1e9
+        point = (samples, seconds, samples * samples, samples * seconds)
+        if self._moments is None:
+            self._moments = list(point)
+        else:
+            self._moments = [self._ewma(m, p) for m, p in zip(self._moments, point)]
+        self.host = self._ewma(self.host, host_ns / 1e9)
+
+        if self._previous is not None:
+            previous_reading, previous_samples = self._previous
+            squared = sum((a - b) ** 2 for a, b in zip(reading, previous_reading))
+            # Per axis, var(a - b) = var(sample) * (1 / n_a + 1 / n_b).
+            variance = squared / len(reading) / (1 / samples + 1 / previous_samples)
+            self.sample_variance = self._ewma(self.sample_variance, variance)
+        self._previous = (tuple(reading), samples)
+
+        self.samples = self._choose()
+        return self.samples
+
+    def _choose(self) -> int:
+        candidates = [self.max_samples]
+        if self.rate:
+            overhead, per_sample = self.model
+            budget = 1 / self.rate
+            if not self.overlapped:
+                budget -= self.host
+            if per_sample > 0:
+                candidates.append(int((budget - overhead) / per_sample))
+        if self.noise and self.sample_variance is not None:
+            # Don't average more than the noise target needs.
+            candidates.append(ceil(self.sample_variance / self.noise**2))
+        return max(self.min_samples, min(candidates))
@@ -0,0 +1,79 @@
+"""Pipelined sensor reads that overlap the serial round trip with host work."""
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import perf_counter_ns
+from typing import Callable, Deque, Tuple
+
+__all__ = [
+    "PipelinedRead",
+]
+
+
+class PipelinedRead:
+    """Keep up to ``depth`` reads in flight on a background thread.
+
+    Each call submits a new read and returns the result of the oldest one, so
+    the device and link work on the next sample while the caller processes
+    the previous one. Throughput approaches ``1 / max(device, host)`` instead of
+    ``1 / (device + host)``, at the cost of ``depth - 1`` samples of latency.
+
+    Reads run one at a time on a single worker thread, which must be the only
+    thread talking to the device while the pipeline is open.
+
+    Parameters
+    ----------
+    read: Callable[..., tuple]
+        Blocking read, e.g. ``Sensor.read``.
+    depth: int
+        Number of outstanding reads. ``1`` behaves like calling ``read`` directly.
+    """
+
+    def __init__(self, read: Callable[..., tuple], depth: int = 2):
+        if depth < 1:
+            raise ValueError(f"depth must be at least 1, got {depth}.")
+        self.read = read
+        self.depth = depth
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="magnetometer-read"
+        )
+        self._pending: Deque[Future] = deque()
+
+        # Of the most recently returned result.
+        self.started_ns = 0
+        self.round_trip_ns = 0
+        self.wait_ns = 0
+        self.kwargs: dict = {}
+
+    def _timed_read(self, *args, **kwargs) -> Tuple[tuple, int, int, dict]:
+        t_start = perf_counter_ns()
+        result = self.read(*args, **kwargs)
+        return result, t_start, perf_counter_ns() - t_start, kwargs
+
+    def __call__(self, *args, **kwargs) -> tuple:
+        """Submit ``read(*args, **kwargs)`` and return the oldest outstanding result.
+
+        Arguments apply to the newly submitted read; results of reads submitted
+        earlier with other arguments are still returned first. The keyword
+        arguments of the returned read are available as ``kwargs``.
+        """
+        while len(self._pending) < self.depth:
+            self._pending.append(
+                self._executor.submit(self._timed_read, *args, **kwargs)
+            )
+        t_start = perf_counter_ns()
+        future = self._pending.popleft()
+        result, self.started_ns, self.round_trip_ns, self.kwargs = future.result()
+        self.wait_ns = perf_counter_ns() - t_start
+        return result
+
+    def close(self) -> None:
+        """Wait for outstanding reads to finish and discard their results."""
+        self._executor.shutdown(wait=True)
+        self._pending.clear()
+
+    def __enter__(self) -> "PipelinedRead":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
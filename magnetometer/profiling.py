@@ -0,0 +1,176 @@
+"""Whole-session profiling for reproducing performance issues in the field."""
+
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from enum import Enum
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+__all__ = [
+    "Profiler",
+    "profile",
+]
+
+# Allocations are only attributed to lines in these files.
+ALLOCATION_FILES = ("*/magnetometer/tui.py", "*/magnetometer/asciichartpy.py")
+
+
+class Profiler(str, Enum):
+    auto = "auto"
+    cprofile = "cprofile"
+    sampling = "sampling"
+
+
+def _sampling_available() -> bool:
+    try:
+        import pyinstrument  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@contextmanager
+def _cprofile(path: Path) -> Iterator[None]:
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+@contextmanager
+def _sampling(path: Path) -> Iterator[None]:
+    from pyinstrument import Profiler as SamplingProfiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+
+    # Sample the whole thread, not just the awaited coroutine chain.
+    profiler = SamplingProfiler(async_mode="disabled")
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        path.write_text(profiler.output(SpeedscopeRenderer()))
+
+
+class AllocationTracer:
+    """Periodically snapshot ``tracemalloc`` and diff consecutive snapshots.
+
+    Parameters
+    ----------
+    interval: float
+        Seconds between snapshots.
+    frames: Callable[[], int]
+        Returns the number of frames rendered so far, used to normalize each
+        interval's allocations to a per-frame figure.
+    """
+
+    def __init__(self, interval: float, frames: Callable[[], int]):
+        self.interval = interval
+        self.frames = frames
+        self.filters = [
+            tracemalloc.Filter(True, pattern) for pattern in ALLOCATION_FILES
+        ]
+        self.intervals: List[Tuple[int, List[tracemalloc.StatisticDiff]]] = []
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _snapshot(self) -> Tuple[tracemalloc.Snapshot, int]:
+        return tracemalloc.take_snapshot().filter_traces(self.filters), self.frames()
+
+    def _run(self) -> None:
+        previous, previous_frames = self._snapshot()
+        while not self._stop.wait(self.interval):
+            snapshot, frames = self._snapshot()
+            diff = snapshot.compare_to(previous, "lineno")
+            self.intervals.append((frames - previous_frames, diff))
+            previous, previous_frames = snapshot, frames
+
+    def start(self) -> None:
+        tracemalloc.start()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    def report(self, top: int = 20) -> str:
+        """Per-line allocations per frame, averaged over all intervals."""
+        per_line = {}
+        total_frames = 0
+        for frames, diff in self.intervals:
+            total_frames += frames
+            for stat in diff:
+                if stat.count_diff <= 0:
+                    continue
+                key = str(stat.traceback)
+                size, count = per_line.get(key, (0, 0))
+                per_line[key] = (size + stat.size_diff, count + stat.count_diff)
+
+        lines = [
+            f"{len(self.intervals)} intervals of {self.interval}s, {total_frames} frames.",
+            f"Peak traced memory: {self.peak / 1024:.1f} KiB.",
+            "Net new allocations still alive at the end of each interval, per frame:",
+            "",
+        ]
+        ranked = sorted(per_line.items(), key=lambda item: item[1][0], reverse=True)
+        for location, (size, count) in ranked[:top]:
+            frames = max(total_frames, 1)
+            lines.append(
+                f"{size / frames:10.1f} B/frame {count / frames:8.2f} blocks/frame  {location}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def profile(
+    path: Optional[Path],
+    profiler: Profiler = Profiler.auto,
+    allocation_interval: float = 0,
+    frames: Callable[[], int] = lambda: 0,
+) -> Iterator[None]:
+    """Profile the enclosed block.
+
+    Parameters
+    ----------
+    path: Optional[Path]
+        Output file. If ``None``, profiling is disabled.
+        cProfile writes ``pstats`` data (viewable with ``snakeviz`` or
+        ``flameprof``); the sampling profiler (``pyinstrument``, if installed)
+        writes speedscope JSON (flamegraph).
+    profiler: Profiler
+        Which profiler to use. ``auto`` prefers the low-overhead sampling
+        profiler when it is available.
+    allocation_interval: float
+        If positive, take ``tracemalloc`` snapshots this many seconds apart and
+        write a per-line, per-frame allocation report next to ``path``.
+    frames: Callable[[], int]
+        Number of frames rendered so far; see ``AllocationTracer``.
+    """
+    if path is None:
+        yield
+        return
+
+    if profiler == Profiler.auto:
+        profiler = Profiler.sampling if _sampling_available() else Profiler.cprofile
+    run = _sampling if profiler == Profiler.sampling else _cprofile
+
+    tracer = None
+    if allocation_interval > 0:
+        tracer = AllocationTracer(allocation_interval, frames)
+        tracer.start()
+
+    try:
+        with run(path):
+            yield
+    finally:
+        if tracer:
+            tracer.stop()
+            path.with_name(path.stem + ".allocations.txt").write_text(tracer.report())
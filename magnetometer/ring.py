@@ -0,0 +1,192 @@
+"""Shared-memory ring buffer of sample records.
+
+One process appends records; any number of processes can attach by name and
+read them in place::
+
+    ring = SampleRing.attach("magnetometer")
+    for chunk in ring.read():
+        samples = numpy.frombuffer(chunk).reshape(-1, len(FIELDS))  # No copy.
+
+``read_bytes`` copies the records out instead, and drops any the writer
+overwrote while they were being copied.
+"""
+
+import struct
+from multiprocessing import shared_memory
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+__all__ = [
+    "FIELDS",
+    "RECORD",
+    "SampleRing",
+]
+
+# Each record is one float64 per field.
+FIELDS = (
+    "time",  # Host ``time.time()`` the sample was taken at; see ``ClockSync``.
+    "x",  # μT
+    "y",  # μT
+    "z",  # μT
+    "device_ns",  # On-device duration of the read.
+    "round_trip_ns",  # Host-measured duration of the read.
+    "samples",  # Samples averaged on-device.
+    "sequence",  # Device conversion count; see ``magnetometer.gaps``.
+)
+
+_MAGIC = b"MAGRING3"
+# Magic, capacity (records), count (records ever written), writing (index of
+# the record being or last written).
+_HEADER = struct.Struct("<8sQQQ")
+_COUNT_OFFSET = 16
+_WRITING_OFFSET = 24
+_COUNT = struct.Struct("<Q")
+# One record of ``FIELDS``, as stored in the ring.
+RECORD = struct.Struct(f"<{len(FIELDS)}d")
+
+
+class SampleRing:
+    """Single-writer ring buffer of ``FIELDS`` records in shared memory.
+
+    Create it with ``create`` in the process that owns it and ``attach`` to it
+    from others. The writer publishes a record by bumping the shared count
+    after the record is written; readers that fall more than ``capacity``
+    records behind skip the overwritten ones (see ``dropped``).
+
+    Before writing a slot, the writer also stores the index of the record it
+    is writing. Like a seqlock, readers check it after copying records out,
+    and drop those whose slot the writer has started to overwrite since.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False):
+        self.shm = shm
+        self.owner = owner
+        magic, self.capacity, _, _ = _HEADER.unpack_from(shm.buf)
+        if magic != _MAGIC:
+            raise ValueError(f"{shm.name} is not a magnetometer sample ring.")
+        size = self.capacity * RECORD.size
+        self.records = shm.buf[_HEADER.size : _HEADER.size + size]
+        # Reader position, in records ever written.
+        self.position = 0
+        # Records this reader missed because the writer lapped it.
+        self.dropped = 0
+
+    @classmethod
+    def create(cls, capacity: int = 4096, name: Optional[str] = None) -> "SampleRing":
+        """Allocate a new ring; it is unlinked when the creator ``close``s it."""
+        shm = shared_memory.SharedMemory(
+            name=name, create=True, size=_HEADER.size + capacity * RECORD.size
+        )
+        _HEADER.pack_into(shm.buf, 0, _MAGIC, capacity, 0, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SampleRing":
+        """Attach to an existing ring, reading from its newest record on."""
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before Python 3.13, opening a segment registers it with the
+            # process's resource tracker, which unlinks it when it exits.
+            tracker = shared_memory.resource_tracker
+            register = tracker.register
+            tracker.register = lambda name, rtype: None
+            try:
+                shm = shared_memory.SharedMemory(name=name)
+            finally:
+                tracker.register = register
+        ring = cls(shm)
+        ring.position = ring.count
+        return ring
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def count(self) -> int:
+        """Number of records ever written."""
+        return _COUNT.unpack_from(self.shm.buf, _COUNT_OFFSET)[0]
+
+    def append(self, record: Sequence[float]) -> None:
+        """Write a record of ``FIELDS``. Only one process may append."""
+        count = self.count
+        _COUNT.pack_into(self.shm.buf, _WRITING_OFFSET, count)
+        RECORD.pack_into(self.records, (count % self.capacity) * RECORD.size, *record)
+        _COUNT.pack_into(self.shm.buf, _COUNT_OFFSET, count + 1)
+
+    def _read(self) -> Tuple[int, List[memoryview]]:
+        """Index of the first new record, and views of the new records."""
+        count = self.count
+        start = first = self.position
+        if count - start > self.capacity:
+            self.dropped += count - start - self.capacity
+            start = first = count - self.capacity
+        self.position = count
+
+        chunks = []
+        while start < count:
+            index = start % self.capacity
+            n = min(count - start, self.capacity - index)
+            view = self.records[index * RECORD.size : (index + n) * RECORD.size]
+            chunks.append(view.cast("d"))
+            start += n
+        return first, chunks
+
+    def _overwritten(self, first: int, n: int) -> int:
+        """How many of the ``n`` records from ``first`` on the writer has
+        started to overwrite; they are counted as ``dropped``."""
+        writing = _COUNT.unpack_from(self.shm.buf, _WRITING_OFFSET)[0]
+        # Writing record ``writing`` overwrites record ``writing - capacity``.
+        overwritten = min(max(writing - self.capacity + 1 - first, 0), n)
+        self.dropped += overwritten
+        return overwritten
+
+    def read(self) -> List[memoryview]:
+        """Records written since the previous ``read``, oldest first.
+
+        Returns
+        -------
+        List[memoryview]
+            Up to two contiguous chunks (the ring may wrap) of float64 values,
+            ``len(FIELDS)`` per record. They are views into shared memory and
+            stay valid until the writer wraps around to them again; use
+            ``read_bytes`` for a copy that is checked against the writer.
+        """
+        first, chunks = self._read()
+        n = sum(len(chunk) for chunk in chunks) // len(FIELDS)
+        skip = self._overwritten(first, n) * len(FIELDS)
+        while skip:
+            if len(chunks[0]) <= skip:
+                skip -= len(chunks.pop(0))
+            else:
+                chunks[0] = chunks[0][skip:]
+                skip = 0
+        return chunks
+
+    def read_bytes(self) -> bytearray:
+        """Like ``read``, but copied out of shared memory as packed ``RECORD``s.
+
+        Records the writer started to overwrite while they were being copied
+        are left out, and counted as ``dropped``.
+        """
+        first, chunks = self._read()
+        data = bytearray().join(chunks)
+        del data[: self._overwritten(first, len(data) // RECORD.size) * RECORD.size]
+        return data
+
+    def read_records(self) -> Iterator[Tuple[float, ...]]:
+        """Like ``read_bytes``, but unpacked into one tuple of ``FIELDS`` per record."""
+        return RECORD.iter_unpack(self.read_bytes())
+
+    def close(self) -> None:
+        """Detach; the creating process also frees the shared memory."""
+        self.records.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self) -> "SampleRing":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,137 @@
+"""Running statistics of the sample stream, updated in O(1) per sample."""
+
+from collections import deque
+from math import fsum, inf, nan, sqrt
+from typing import Deque, Tuple
+
+__all__ = [
+    "RunningStats",
+    "WindowedStats",
+]
+
+
+class RunningStats:
+    """Mean, standard deviation, min, max, RMS and peak-to-peak of all values.
+
+    The mean and variance are updated with Welford's algorithm, which stays
+    accurate over long runs where summing squares would lose precision.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget every value added so far."""
+        self.count = 0
+        self.mean = 0.0
+        # Sum of squared differences from the mean.
+        self._m2 = 0.0
+        self._min = inf
+        self._max = -inf
+
+    def append(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+
+    @property
+    def min(self) -> float:
+        return self._min if self.count else nan
+
+    @property
+    def max(self) -> float:
+        return self._max if self.count else nan
+
+    @property
+    def variance(self) -> float:
+        """Sample variance."""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return sqrt(self.variance)
+
+    @property
+    def rms(self) -> float:
+        if not self.count:
+            return nan
+        return sqrt(self.mean**2 + max(self._m2, 0.0) / self.count)
+
+    @property
+    def peak_to_peak(self) -> float:
+        return self.max - self.min
+
+
+class WindowedStats(RunningStats):
+    """``RunningStats`` over the last ``window`` values.
+
+    Each value is added to, and later removed from, the Welford sums in O(1).
+    Min and max come from monotonic queues, which is amortized O(1). Once per
+    window the sums are recomputed from the window's values, so rounding
+    errors from the removals can't accumulate.
+
+    Parameters
+    ----------
+    window: int
+        Number of most recent values the statistics cover.
+    """
+
+    def __init__(self, window: int):
+        if window < 1:
+            raise ValueError(f"window must be at least 1, got {window}.")
+        self.window = window
+        super().__init__()
+
+    def reset(self) -> None:
+        super().reset()
+        self.values: Deque[float] = deque()
+        # (index, value) candidates for the window's min and max.
+        self._mins: Deque[Tuple[int, float]] = deque()
+        self._maxs: Deque[Tuple[int, float]] = deque()
+        self._index = 0
+        self._removed = 0
+
+    def append(self, value: float) -> None:
+        values = self.values
+        values.append(value)
+        if len(values) <= self.window:
+            super().append(value)
+        else:
+            old = values.popleft()
+            self._removed += 1
+            if self._removed >= self.window:
+                self._removed = 0
+                self.mean = fsum(values) / self.count
+                self._m2 = fsum((v - self.mean) ** 2 for v in values)
+            else:
+                old_mean = self.mean
+                self.mean += (value - old) / self.count
+                self._m2 += (value - old) * (value - self.mean + old - old_mean)
+
+        index = self._index
+        self._index += 1
+        expired = index - self.window
+        mins, maxs = self._mins, self._maxs
+        while mins and mins[-1][1] >= value:
+            mins.pop()
+        mins.append((index, value))
+        if mins[0][0] <= expired:
+            mins.popleft()
+        while maxs and maxs[-1][1] <= value:
+            maxs.pop()
+        maxs.append((index, value))
+        if maxs[0][0] <= expired:
+            maxs.popleft()
+
+    @property
+    def min(self) -> float:
+        return self._mins[0][1] if self._mins else nan
+
+    @property
+    def max(self) -> float:
+        return self._maxs[0][1] if self._maxs else nan
@@ -1,6 +1,54 @@
-from .base import Sensor
-from .lis2mdl import LIS2MDL
-from .lis3mdl import LIS3MDL
-from .mmc56x3 import MMC5603
-from .sin import Sin
-from .tlv493d import TLV493D
+"""Sensor drivers.
+
+Sensor modules are imported on first use, e.g. ``get_sensor("lis3mdl")`` only
+imports ``magnetometer.sensors.lis3mdl``.
+"""
+
+from importlib import import_module
+
+__all__ = [
+    "SENSORS",
+    "Sensor",
+    "SensorArray",
+    "LIS2MDL",
+    "LIS3MDL",
+    "MMC5603",
+    "Sin",
+    "TLV493D",
+    "get_sensor",
+]
+
+# Registry name -> (module, class name).
+SENSORS = {
+    "lis2mdl": ("lis2mdl", "LIS2MDL"),
+    "lis3mdl": ("lis3mdl", "LIS3MDL"),
+    "mmc5603": ("mmc56x3", "MMC5603"),
+    "sin": ("sin", "Sin"),
+    "tlv493d": ("tlv493d", "TLV493D"),
+}
+
+
+def get_sensor(name: str):
+    """Sensor class registered as ``name``, importing only its module.
+
+    Raises ``KeyError`` if no sensor is registered as ``name``.
+    """
+    import_module(f".{SENSORS[name][0]}", __name__)
+    from .base import Sensor
+
+    return Sensor[name]
+
+
+def __getattr__(name: str):
+    if name == "Sensor":
+        from .base import Sensor
+
+        return Sensor
+    if name == "SensorArray":
+        from .array import SensorArray
+
+        return SensorArray
+    for module, class_name in SENSORS.values():
+        if class_name == name:
+            return getattr(import_module(f".{module}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
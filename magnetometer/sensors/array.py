@@ -0,0 +1,192 @@
+from typing import List, Optional, Sequence, Type
+
+import numpy as np
+
+from magnetometer.bundle import bundle_files
+from magnetometer.sync import sync_dependencies, sync_files
+
+from . import get_sensor
+from .base import Sensor
+
+
+class SensorArray(Sensor, skip=True):
+    """Several sensors on one board's I2C bus, read together in one round trip.
+
+    Each member's ``init_sensor`` runs on the shared on-device ``i2c``; the
+    drivers are kept in the on-device list ``sensors``. ``read_all`` reads
+    them interleaved, so every member's reading covers the same interval.
+    The inherited single-sensor tasks (``read``, ``capture``, ...) use the
+    first member.
+
+    Parameters
+    ----------
+    sensors: Sequence[str]
+        Registry names of the members, e.g. ``"lis3mdl"``, optionally with
+        the I2C address of a sensor not at its default, e.g.
+        ``"lis3mdl@0x1E"``.
+
+    Attributes
+    ----------
+    members: List[Type[Sensor]]
+        Sensor class of each member.
+    addresses: List[Optional[int]]
+        I2C address of each member, ``None`` for the driver's default.
+    labels: List[str]
+        Name of each member, as given in ``sensors`` with the address
+        normalized. Also its key for ``magnetometer.calibration``.
+    calibrations: list
+        Saved ``Calibration`` of each member, or ``None``.
+    """
+
+    def __init__(
+        self, port, sensors: Sequence[str], *, scl, sda, reset=False, **kwargs
+    ):
+        from magnetometer.calibration import Calibration
+
+        if not sensors:
+            raise ValueError("SensorArray needs at least one sensor.")
+        self.members: List[Type[Sensor]] = []
+        self.addresses: List[Optional[int]] = []
+        self.labels: List[str] = []
+        for spec in sensors:
+            name, _, address = spec.partition("@")
+            cls = get_sensor(name)
+            if not getattr(vars(cls).get("init_sensor"), "__belay__", None):
+                raise ValueError(f"{name} has no on-device driver.")
+            if address:
+                if not cls.addressable:
+                    raise ValueError(f"{name} has a fixed I2C address.")
+                self.addresses.append(int(address, 0))
+                self.labels.append(f"{name}@0x{self.addresses[-1]:02X}")
+            else:
+                self.addresses.append(None)
+                self.labels.append(name)
+            self.members.append(cls)
+        if len(set(self.labels)) < len(self.labels):
+            raise ValueError(f"Sensors share an I2C address: {', '.join(sensors)}.")
+        self.dependencies = sorted(
+            {module for cls in self.members for module in cls.dependencies}
+        )
+        self.calibrations = [Calibration.load(label) for label in self.labels]
+        super().__init__(port, scl=scl, sda=sda, reset=reset, **kwargs)
+
+    @property
+    def names(self) -> List[str]:
+        """Registry name of each member."""
+        return [cls.__registry__.name for cls in self.members]
+
+    @property
+    def config(self) -> str:
+        names = self.names
+        digest = self._digest([type(self), *self.members], names)
+        return f"{'+'.join(self.labels)}:{self.scl}:{self.sda}:{digest}"
+
+    def _emulated_chips(self) -> list:
+        from magnetometer.emulation import Chip
+
+        chips = []
+        for name, address in zip(self.names, self.addresses):
+            chip = Chip[name]()
+            if address is not None:
+                chip.address = address
+            chips.append(chip)
+        return chips
+
+    def sync_sensor_dependencies(self):
+        """Upload the members' dependencies, preferring precompiled bundles.
+
+        Bundles are only used if every member has one.
+        """
+        files: Optional[dict] = None
+        if self("getattr(sys.implementation, 'mpy', 0)"):
+            files = {}
+            for name in self.names:
+                bundle = bundle_files(name, self.implementation.version[0])
+                if bundle is None:
+                    files = None
+                    break
+                files.update(bundle)
+        if files is None:
+            sync_dependencies(self, self.dependencies)
+        else:
+            sync_files(self, files)
+
+    def init_sensor(self):
+        self("sensors = []")
+        for cls, address in zip(self.members, self.addresses):
+            self(f"sensor_address = {address!r}")
+            self.setup(vars(cls)["init_sensor"], register=False)()
+            self("sensors.append(sensor)")
+        # Members may redefine the conversion counter and trigger hooks for
+        # their own ``sensor``; the array counts reads and triggers in
+        # software.
+        self.init_sequence()
+        self.init_trigger()
+        self("sensor = sensors[0]; sensor_address = None")
+        # Rounds read by ``read_all``, counted apart from ``read``'s
+        # ``conversions`` so that neither shows the other's reads as gaps.
+        self("array_conversions = 0")
+
+    @Sensor.task
+    def read_all(scales, samples=16, timed=False):
+        """Read every member on-device.
+
+        Parameters
+        ----------
+        scales: list
+            Index into each member's gauss range scale.
+        samples: int
+            Number of samples to average together per reading (oversampling).
+        timed: bool
+            Also report when and for how long the device read the sensors,
+            and how many times it has read them all.
+
+        Returns
+        -------
+        Tuple[float, ...]
+            ``(x0, y0, z0, x1, y1, z1, ...)`` readings of each member in
+            microteslas. If ``timed``, followed by ``(nanoseconds, start,
+            sequence)`` as for ``read``.
+        """
+        global array_conversions
+        t_start = time.monotonic_ns()  # noqa: F821
+        for member, scale in zip(sensors, scales):  # noqa: F821
+            member.range = scale
+        sums = [0.0] * (3 * len(sensors))  # noqa: F821
+        for _ in range(samples):
+            i = 0
+            for member in sensors:  # noqa: F821
+                x, y, z = member.magnetic
+                sums[i] += x
+                sums[i + 1] += y
+                sums[i + 2] += z
+                i += 3
+        array_conversions += samples  # noqa: F821
+        out = [total / samples for total in sums]
+        if timed:
+            out.append(time.monotonic_ns() - t_start)  # noqa: F821
+            out.append(t_start)
+            out.append(array_conversions)
+        return tuple(out)
+
+    def read_array(self, scales=None, samples=16) -> np.ndarray:
+        """Calibrated ``(members, 3)`` readings in microteslas."""
+        if scales is None:
+            scales = [0] * len(self.members)
+        readings = np.array(self.read_all(scales, samples)).reshape(-1, 3)
+        return self.calibrate(readings)
+
+    def calibrate(self, readings: np.ndarray) -> np.ndarray:
+        """Apply each member's saved calibration to ``(..., members, 3)`` readings."""
+        readings = np.array(readings, dtype=float)
+        for i, calibration in enumerate(self.calibrations):
+            if calibration is not None:
+                calibration.apply(readings[..., i, :], out=readings[..., i, :])
+        return readings
+
+    def autorange_all(self, scales: Sequence[int], readings) -> List[int]:
+        """``autorange`` of each member, given its reading at its scale."""
+        return [
+            cls.autorange(scale, reading)
+            for cls, scale, reading in zip(self.members, scales, readings)
+        ]
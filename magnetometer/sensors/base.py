@@ -1,8 +1,16 @@
+import hashlib
+import inspect
 from abc import abstractmethod
-from typing import Callable, Tuple
+from pathlib import Path
+from typing import Callable, Optional, Sequence
 
 from autoregistry import Registry
-from belay import Device
+from belay import ConnectionLost, Device
+from belay.pyboard import Pyboard, PyboardError
+from belay.webrepl import WebreplToSerial
+
+from magnetometer.bundle import BUNDLES_PATH, bundle_files
+from magnetometer.sync import module_files, sync_dependencies, sync_files
 
 
 class Sensor(Device, Registry):
@@ -10,29 +18,259 @@ class Sensor(Device, Registry):
     # In microteslas.
     scales: list = []
 
-    def __init__(self, *args, scl, sda, **kwargs):
+    # Vendored modules imported by ``init_sensor``; they and everything they
+    # import from ``magnetometer/dependencies/main`` are synced to ``/lib``.
+    dependencies: list = []
+
+    # Whether ``init_sensor`` opens the sensor at the on-device
+    # ``sensor_address`` when it isn't ``None``, e.g. for ``SensorArray``.
+    addressable: bool = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Belay only registers executers found in ``vars(type(self))``;
+        # copy the ones shared by all sensors onto each subclass.
+        for name, method in vars(Sensor).items():
+            if getattr(method, "__belay__", None) and name not in vars(cls):
+                setattr(cls, name, method)
+
+    def __init__(self, *args, scl, sda, reset=False, **kwargs):
+        """Connect to the board and initialize the sensor.
+
+        If the board is still set up for this sensor from a previous session
+        (same sensor, pins and on-device code), the existing on-device
+        ``sensor`` is reused: no soft reset, sync, or sensor reset and settle
+        delays.
+
+        Parameters
+        ----------
+        scl: int
+            SCL GPIO number.
+        sda: int
+            SDA GPIO number.
+        reset: bool
+            Always soft-reset the board and initialize the sensor from scratch.
+        """
         self.scl = scl
         self.sda = sda
+        self.reset = reset
+        self.warm = False
         super().__init__(*args, **kwargs)
 
+    @property
+    def config(self) -> str:
+        """Identifies the on-device state that initialization sets up."""
+        name = type(self).__registry__.name
+        return f"{name}:{self.scl}:{self.sda}:{self._digest([type(self)], [name])}"
+
+    def _digest(self, classes: Sequence[type], names: Sequence[str]) -> str:
+        """Hash of the files behind the on-device code of sensor ``classes``."""
+        paths = {Path(__file__)}
+        paths.update(Path(inspect.getfile(cls)) for cls in classes)
+        paths.update(module_files(self.dependencies).values())
+        for name in names:
+            paths.update(BUNDLES_PATH.glob(f"*/{name}/**/*.mpy"))
+        digest = hashlib.sha256()
+        for path in sorted(paths):
+            digest.update(path.read_bytes())
+        return digest.hexdigest()[:16]
+
+    @classmethod
+    def autorange(cls, scale: int, reading: Sequence[float]) -> int:
+        """Index into ``scales`` to read at next, given a ``reading`` at ``scale``.
+
+        Steps up when the reading nears the top of the current range, and down
+        when it would comfortably fit in the next smaller one.
+        """
+        if not cls.scales:
+            return scale
+        threshold = 0.9
+        max_mag = max(reading)
+        lower_scale = max(0, scale - 1)
+        if max_mag > threshold * cls.scales[scale]:
+            return min(len(cls.scales) - 1, scale + 1)
+        if max_mag < threshold * cls.scales[lower_scale]:
+            return lower_scale
+        return scale
+
+    def pipelined(self, depth: int = 2):
+        """``read`` with up to ``depth`` requests in flight.
+
+        See ``magnetometer.pipeline.PipelinedRead``.
+        """
+        from magnetometer.pipeline import PipelinedRead
+
+        return PipelinedRead(self.read, depth)
+
+    def _connect_to_board(self, **kwargs):
+        from magnetometer.emulation import EMULATED_PORT
+
+        if kwargs.get("device") == EMULATED_PORT:
+            from magnetometer.emulation import EmulatedBoard
+
+            # Reconnects stay on the same board; its state survives unless
+            # it was rebooted.
+            if not isinstance(getattr(self, "_board", None), EmulatedBoard):
+                self._board = EmulatedBoard(
+                    self._emulated_chips(), scl=self.scl, sda=self.sda
+                )
+            can_reset = True
+        else:
+            self._board = Pyboard(**kwargs)
+            # Like ``Device``, never soft-reset over WebREPL.
+            can_reset = not isinstance(self._board.serial, WebreplToSerial)
+
+        # Interrupt whatever is running, but keep the previous session's globals.
+        self._board.enter_raw_repl(soft_reset=False)
+        if not self.reset:
+            on_device = self._board.exec(
+                "print(repr(globals().get('_magnetometer_config')))"
+            )
+            self.warm = on_device.decode().strip() == repr(self.config)
+        if not self.warm and can_reset:
+            self._board.enter_raw_repl(soft_reset=True)
+
+    def reconnect(self, attempts: Optional[int] = None) -> None:
+        """Reconnect to the board, initializing the sensor again if it was reset.
+
+        Belay replays the recorded command history instead, but a warm
+        connection never ran the setup, so there is nothing to replay.
+
+        Parameters
+        ----------
+        attempts: Optional[int]
+            Number of times to attempt to connect, 1 second apart.
+            Defaults to the ``attempts`` given at init, or 1.
+        """
+        kwargs = self._board_kwargs.copy()
+        kwargs["attempts"] = attempts or self.attempts or 1
+        try:
+            self._connect_to_board(**kwargs)
+        except PyboardError as e:
+            raise ConnectionLost from e
+        if self.warm:
+            return
+        self._exec_snippet("startup")
+        # Define the tasks on-device again.
+        for name, method in vars(type(self)).items():
+            metadata = getattr(method, "__belay__", None)
+            if metadata:
+                decorator = getattr(self, metadata.executer.__registry__.name)
+                setattr(self, name, decorator(method, **metadata.kwargs))
+        self.__pre_autoinit__()
+        self._exec_snippet("convenience_imports_circuitpython")
+        self.__post_init__()
+
+    def _emulated_chips(self) -> list:
+        """Simulated chips on the emulated board's bus."""
+        from magnetometer.emulation import Chip
+
+        return [Chip[type(self).__registry__.name]()]
+
     def __pre_autoinit__(self):
         if self.implementation.name != "circuitpython":
             raise RuntimeError(
                 f"Board must be running CircuitPython, detected {self.implementation.name}."
             )
-        self.sync_dependencies("magnetometer", "dependencies/main")
+        if self.warm:
+            return
+        self.sync_sensor_dependencies()
         self("from busio import I2C; import board")
         self(f"i2c = I2C(board.GP{self.scl}, board.GP{self.sda})")
+        self("sensor_address = None")
+
+    def sync_sensor_dependencies(self):
+        """Upload this sensor's dependencies, preferring a precompiled bundle.
+
+        See ``magnetometer.bundle``.
+        """
+        files = None
+        # Boards that cannot import ``.mpy`` files don't report a format.
+        if self("getattr(sys.implementation, 'mpy', 0)"):
+            files = bundle_files(
+                type(self).__registry__.name, self.implementation.version[0]
+            )
+        if files is None:
+            sync_dependencies(self, self.dependencies)
+        else:
+            sync_files(self, files)
+
+    def __post_init__(self):
+        if self.warm:
+            return
+        # Not ``autoinit``, so that a warm reconnect can skip them.
+        self.init_telemetry()
+        self.init_sequence()
+        self.init_trigger()
+        self.init_sensor()
+        self(f"_magnetometer_config = {self.config!r}")
+
+    @Device.setup
+    def init_telemetry():
+        import gc
+
+        class TimedI2C:
+            """``busio.I2C`` proxy accumulating time spent in transactions."""
+
+            def __init__(self, i2c):
+                self.i2c = i2c
+                self.ns = 0
+
+            def try_lock(self):
+                return self.i2c.try_lock()
+
+            def unlock(self):
+                self.i2c.unlock()
+
+            def readfrom_into(self, *args, **kwargs):
+                t_start = time.monotonic_ns()  # noqa: F821
+                self.i2c.readfrom_into(*args, **kwargs)
+                self.ns += time.monotonic_ns() - t_start  # noqa: F821
+
+            def writeto(self, *args, **kwargs):
+                t_start = time.monotonic_ns()  # noqa: F821
+                self.i2c.writeto(*args, **kwargs)
+                self.ns += time.monotonic_ns() - t_start  # noqa: F821
+
+            def writeto_then_readfrom(self, *args, **kwargs):
+                t_start = time.monotonic_ns()  # noqa: F821
+                self.i2c.writeto_then_readfrom(*args, **kwargs)
+                self.ns += time.monotonic_ns() - t_start  # noqa: F821
+
+        # Installed on the first telemetry read, so plain reads pay nothing.
+        timed_i2c = None
+        last_mem_free = 0
+
+    @Device.setup
+    def init_sequence():
+        # Sensor conversions read so far, reported by timed reads so the host
+        # can detect gaps and duplicates.
+        conversions = 0
+
+        # Conversions since the previous call. Sensors with a conversion
+        # counter redefine this in ``init_sensor``; others count every read.
+        def new_conversions():
+            return 1
+
+    @Device.setup
+    def init_trigger():
+        # Sensors that can compare axes against a threshold in hardware
+        # redefine these in ``init_sensor``.
+        def arm_axis_trigger(threshold):
+            pass
+
+        def axis_triggered(x, y, z, threshold):
+            return abs(x) >= threshold or abs(y) >= threshold or abs(z) >= threshold
 
     @abstractmethod
     def init_sensor() -> None:
         raise NotImplementedError
 
-    @abstractmethod
-    def read(scale=0, samples=16) -> Tuple[float, float, float]:
+    @Device.task
+    def read(scale=0, samples=16, timed=False, telemetry=False):
         """Read sensor on-device.
 
-        The object ``i2c`` is already initialized on-device.
+        The objects ``i2c`` and ``sensor`` are already initialized on-device.
 
         Parameters
         ----------
@@ -41,11 +279,186 @@ class Sensor(Device, Registry):
             May or may not be used depending on sensor.
         samples: int
             Number of samples to average together per reading (oversampling).
+        timed: bool
+            Also report when and for how long the device read the sensor, and
+            its conversion count.
+        telemetry: bool
+            Also report on-device diagnostics. Implies ``timed``.
 
         Returns
         -------
-        Tuple[float, float, float]
+        Tuple[float, ...]
             (x, y, z) magnetic reading in microteslas.
+            If ``timed``, (x, y, z, nanoseconds, start, sequence) where
+            nanoseconds is the on-device duration, start the
+            ``time.monotonic_ns`` it started at (see ``magnetometer.clock``),
+            and sequence the number of sensor conversions read so far,
+            including this read's (see ``magnetometer.gaps``).
+            If ``telemetry``, (x, y, z, nanoseconds, start, sequence,
+            i2c_nanoseconds, mem_free, collections) where ``i2c_nanoseconds`` is the part of
+            ``nanoseconds`` spent inside I2C transactions, ``mem_free`` is
+            ``gc.mem_free()`` after the read, and ``collections`` is a lower
+            bound on the number of garbage collections since the previous
+            telemetry read (CircuitPython has no collection counter, so a
+            collection is inferred whenever free memory grows).
         """
+        global timed_i2c, last_mem_free, conversions
+        t_start = time.monotonic_ns()  # noqa: F821
+        if telemetry:
+            if timed_i2c is None:  # noqa: F821
+                timed_i2c = TimedI2C(sensor.i2c_device.i2c)  # noqa: F821
+                sensor.i2c_device.i2c = timed_i2c  # noqa: F821
+                last_mem_free = gc.mem_free()  # noqa: F821
+            i2c_start = timed_i2c.ns
+            mem_free = gc.mem_free()  # noqa: F821
+            collections = int(mem_free > last_mem_free)  # noqa: F821
+        sensor.range = scale  # noqa: F821
+        x_avg, y_avg, z_avg = 0, 0, 0
+        for _ in range(samples):
+            x, y, z = sensor.magnetic  # noqa: F821
+            conversions += new_conversions()  # noqa: F821
+            x_avg += x
+            y_avg += y
+            z_avg += z
+        x_avg /= samples
+        y_avg /= samples
+        z_avg /= samples
+        if not (timed or telemetry):
+            return (x_avg, y_avg, z_avg)
+        elapsed = time.monotonic_ns() - t_start  # noqa: F821
+        if not telemetry:
+            return (x_avg, y_avg, z_avg, elapsed, t_start, conversions)
+        last_mem_free = gc.mem_free()  # noqa: F821
+        collections += last_mem_free > mem_free
+        i2c_ns = timed_i2c.ns - i2c_start
+        return (
+            x_avg,
+            y_avg,
+            z_avg,
+            elapsed,
+            t_start,
+            conversions,
+            i2c_ns,
+            last_mem_free,
+            collections,
+        )
 
-        raise NotImplementedError
+    @Device.task
+    def capture(
+        level=None, slope=None, axis=None, pre=64, post=64, scale=0, timeout=10
+    ):
+        """Wait on-device for a trigger and return the samples around it.
+
+        Reads ``sensor.magnetic`` as fast as the bus allows, keeping the last
+        ``pre`` readings on-device, so only the captured window crosses the
+        serial link. At least one condition must be given:
+
+        * ``level``: ``|B|`` rises through ``level``.
+        * ``slope``: ``|dB/dt|`` between consecutive readings exceeds ``slope``.
+        * ``axis``: any axis's magnitude reaches ``axis``. Sensors with a
+          hardware threshold interrupt evaluate this on every conversion, so
+          transients between reads aren't missed.
+
+        Parameters
+        ----------
+        level: Optional[float]
+            Magnitude threshold, in microteslas.
+        slope: Optional[float]
+            Rate-of-change limit, in microteslas per second.
+        axis: Optional[float]
+            Per-axis threshold, in microteslas.
+        pre: int
+            Readings returned from before the trigger.
+        post: int
+            Readings returned from the trigger on.
+        scale: int
+            Index into gauss range scale.
+        timeout: float
+            Seconds to wait for a trigger.
+
+        Returns
+        -------
+        Optional[Tuple[str, int, list, list, list, list]]
+            ``None`` if nothing triggered within ``timeout``. Otherwise
+            ``(reason, n_pre, times, x, y, z)``, where ``reason`` names the
+            conditions that fired, ``n_pre`` is the number of readings before
+            the trigger (fewer than ``pre`` if it fired early), and ``times``
+            are ``time.monotonic_ns`` offsets from the trigger reading.
+        """
+        sensor.range = scale  # noqa: F821
+        if axis is not None:
+            arm_axis_trigger(axis)  # noqa: F821
+        level2 = level * level if level is not None else 0
+        # Ring buffer of the readings before the trigger.
+        times, xs, ys, zs = [0] * pre, [0.0] * pre, [0.0] * pre, [0.0] * pre
+        count = 0
+        # Rising edges only; the first reading has nothing to rise from.
+        was_above_level = was_above_axis = True
+        t_prev = x_prev = y_prev = z_prev = None
+        deadline = time.monotonic_ns() + int(timeout * 1e9)  # noqa: F821
+        reasons = []
+        while not reasons:
+            t = time.monotonic_ns()  # noqa: F821
+            if t > deadline:
+                return None
+            x, y, z = sensor.magnetic  # noqa: F821
+            if level is not None:
+                above = x * x + y * y + z * z >= level2
+                if above and not was_above_level:
+                    reasons.append("level")
+                was_above_level = above
+            if slope is not None and t_prev is not None:
+                dx, dy, dz = x - x_prev, y - y_prev, z - z_prev
+                rate = slope * (t - t_prev) / 1e9
+                if dx * dx + dy * dy + dz * dz > rate * rate:
+                    reasons.append("slope")
+            if axis is not None:
+                above = axis_triggered(x, y, z, axis)  # noqa: F821
+                if above and not was_above_axis:
+                    reasons.append("axis")
+                was_above_axis = above
+            if not reasons and pre:
+                i = count % pre
+                times[i], xs[i], ys[i], zs[i] = t, x, y, z
+                count += 1
+            t_prev, x_prev, y_prev, z_prev = t, x, y, z
+
+        # Oldest first, then the trigger reading and the ones after it.
+        n_pre = min(count, pre)
+        start = count - n_pre
+        order = [(start + k) % pre for k in range(n_pre)]
+        times = [times[k] for k in order] + [t]
+        xs = [xs[k] for k in order] + [x]
+        ys = [ys[k] for k in order] + [y]
+        zs = [zs[k] for k in order] + [z]
+        for _ in range(post - 1):
+            times.append(time.monotonic_ns())  # noqa: F821
+            x, y, z = sensor.magnetic  # noqa: F821
+            xs.append(x)
+            ys.append(y)
+            zs.append(z)
+        t_trigger = t
+        times = [t - t_trigger for t in times]
+        return ("+".join(reasons), n_pre, times, xs, ys, zs)
+
+    @Device.task
+    def trace_i2c(samples=16):
+        """Count the I2C transactions behind ``samples`` reads of ``sensor.magnetic``.
+
+        Returns
+        -------
+        dict
+            ``{(device_address, register): (transactions, bytes_written, bytes_read, lock_spins)}``
+            totalled over all ``samples``; see
+            ``adafruit_bus_device.i2c_device.trace_summary``.
+        """
+        from adafruit_bus_device import i2c_device
+
+        i2c_device.trace_summary(reset=True)
+        i2c_device.enable_trace()
+        try:
+            for _ in range(samples):
+                sensor.magnetic  # noqa: F821
+        finally:
+            i2c_device.disable_trace()
+        return i2c_device.trace_summary(reset=True)
@@ -3,8 +3,9 @@ from .base import Sensor
 
 class LIS2MDL(Sensor):
     scales = [5000]
+    dependencies = ["adafruit_lis2mdl"]
 
-    @Sensor.setup(autoinit=True)
+    @Sensor.setup
     def init_sensor():
         from adafruit_lis2mdl import LIS2MDL, DataRate
 
@@ -12,16 +13,19 @@ class LIS2MDL(Sensor):
         sensor.low_power = 0  # High Resolution
         sensor.data_rate = DataRate.Rate_100_HZ
 
-    @Sensor.task
-    def read(scale=0, samples=16):
-        x_avg, y_avg, z_avg = 0, 0, 0
-        # LIS3MDL in this mode samples at 115Hz
-        for _ in range(samples):
-            x, y, z = sensor.magnetic  # noqa: F821
-            x_avg += x
-            y_avg += y
-            z_avg += z
-        x_avg /= samples
-        y_avg /= samples
-        z_avg /= samples
-        return (x_avg, y_avg, z_avg)
+        # The driver latches the interrupt, so ``capture`` sees a threshold
+        # crossed by any conversion, not just the ones it reads.
+        def arm_axis_trigger(threshold):
+            sensor.interrupt_threshold = threshold
+            sensor.interrupt_enabled = True
+            sensor.faults  # Clear a stale latch.
+
+        def axis_triggered(x, y, z, threshold):
+            # Reading the latch clears it, so a field that stays above the
+            # threshold only shows up in the current reading.
+            return (
+                sensor.faults[-1]
+                or abs(x) >= threshold
+                or abs(y) >= threshold
+                or abs(z) >= threshold
+            )
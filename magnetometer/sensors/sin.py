@@ -1,22 +1,55 @@
+import gc
 from math import pi, sin
+from time import monotonic_ns
 
 from .base import Sensor
 
 
+def _collections() -> int:
+    return sum(generation["collections"] for generation in gc.get_stats())
+
+
 class Sin(Sensor):
-    def __init__(self, port, sda, scl):
+    def __init__(self, port, sda, scl, reset=False):
         """Dummy sinusoidal sensor for debugging purposes."""
         self.i = 0
+        self.conversions = 0
+        self.last_collections = _collections()
 
     @staticmethod
     def init_sensor():
         pass
 
-    def read(self, scale=0, samples=16):
+    def read(self, scale=0, samples=16, timed=False, telemetry=False):
+        t_start = monotonic_ns()
         out = (
             1 + sin(2 * pi * (0.1 * self.i) + 0.0),
             0 + sin(2 * pi * (0.1 * self.i) + 2.0),
             -1 + sin(2 * pi * (0.1 * self.i) + 4.0),
         )
         self.i += 1
+        self.conversions += samples
+        if not (timed or telemetry):
+            return out
+        elapsed = monotonic_ns() - t_start
+        if not telemetry:
+            return (*out, elapsed, t_start, self.conversions)
+        # No bus and no fixed heap; report the host's GC activity instead.
+        collections = _collections()
+        out = (
+            *out,
+            elapsed,
+            t_start,
+            self.conversions,
+            0,
+            0,
+            collections - self.last_collections,
+        )
+        self.last_collections = collections
         return out
+
+    def trace_i2c(self, samples=16):
+        return {}
+
+    def close(self):
+        pass
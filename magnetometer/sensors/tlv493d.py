@@ -3,23 +3,28 @@ from .base import Sensor
 
 class TLV493D(Sensor):
     scales = [130_000]
+    addressable = True
+    dependencies = ["adafruit_tlv493d"]
 
-    @Sensor.setup(autoinit=True)
+    @Sensor.setup
     def init_sensor():
         from adafruit_tlv493d import TLV493D
 
-        sensor = TLV493D(i2c)
+        if sensor_address is None:  # noqa: F821
+            sensor = TLV493D(i2c)
+        else:
+            sensor = TLV493D(i2c, sensor_address)  # noqa: F821
 
-    @Sensor.task
-    def read(scale=0, samples=16):
-        sensor.range = scale  # noqa: F821
-        x_avg, y_avg, z_avg = 0, 0, 0
-        for _ in range(samples):
-            x, y, z = sensor.magnetic  # noqa: F821
-            x_avg += x
-            y_avg += y
-            z_avg += z
-        x_avg /= samples
-        y_avg /= samples
-        z_avg /= samples
-        return (x_avg, y_avg, z_avg)
+        # The 2-bit frame counter advances once per conversion, so it tells
+        # a repeated frame (0) from missed ones (2 or 3). Four or more
+        # conversions between reads wrap around undetected. It is decoded
+        # from the driver's public register copy, as of the last read.
+        last_frame = None
+        frame_byte, frame_mask, frame_shift = sensor.read_masks["FRAMECOUNTER"]
+
+        def new_conversions():
+            global last_frame
+            frame = (sensor.read_buffer[frame_byte] & frame_mask) >> frame_shift
+            step = 1 if last_frame is None else (frame - last_frame) & 0x03
+            last_frame = frame
+            return step
@@ -0,0 +1,317 @@
+"""Share one sensor among any number of local consumers.
+
+Only one process can open a board's serial port. ``magnetometer serve`` owns it
+and publishes samples over a Unix domain socket (or localhost TCP) to any number
+of subscribers, e.g. ``magnetometer connect``, a recorder and an alerting script.
+
+On connect, the server sends one JSON line describing the stream::
+
+    {"protocol": 2, "sensor": "lis3mdl", "fields": ["time", "x", ...]}
+
+followed by binary frames: a ``FRAME_HEADER`` and then ``count`` records packed
+as ``RECORD``. ``dropped`` is the running total of records the subscriber
+missed because it didn't keep up; slow subscribers never hold up the others.
+
+Protocol 2 added the ``sequence`` field, so records are 8 float64s instead of
+7. ``StreamClient`` rejects servers speaking another protocol or sending other
+fields, so upgrade servers and subscribers together.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+import tempfile
+from collections import deque
+from typing import Deque, Iterator, List, Set, Tuple, Union
+
+from magnetometer.ring import FIELDS, RECORD, SampleRing
+
+__all__ = [
+    "DEFAULT_ADDRESS",
+    "FRAME_HEADER",
+    "PROTOCOL",
+    "StreamClient",
+    "StreamServer",
+    "parse_address",
+]
+
+log = logging.getLogger(__name__)
+
+PROTOCOL = 2
+if hasattr(socket, "AF_UNIX"):
+    DEFAULT_ADDRESS = os.path.join(tempfile.gettempdir(), "magnetometer.sock")
+else:
+    DEFAULT_ADDRESS = "127.0.0.1:8642"
+
+_FRAME_MAGIC = b"MAGF"
+# Magic, count (records in this frame), dropped (records missed so far).
+FRAME_HEADER = struct.Struct("<4sIQ")
+
+
+def parse_address(address: str) -> Union[str, Tuple[str, int]]:
+    """``"HOST:PORT"`` or ``":PORT"`` is TCP; anything else is a Unix socket path."""
+    host, separator, port = address.rpartition(":")
+    if separator and port.isdigit():
+        return host or "127.0.0.1", int(port)
+    return address
+
+
+class _Subscriber:
+    """Frames queued for one subscriber, dropping the oldest when it lags."""
+
+    def __init__(self, writer: asyncio.StreamWriter, max_pending: int):
+        self.writer = writer
+        self.max_pending = max_pending
+        self.frames: Deque[Tuple[bytes, int]] = deque()
+        self.ready = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+
+    @property
+    def peer(self) -> str:
+        return str(self.writer.get_extra_info("peername") or "local")
+
+    def publish(self, body: bytes, count: int) -> None:
+        if len(self.frames) >= self.max_pending:
+            _, lost = self.frames.popleft()
+            self.dropped += lost
+        self.frames.append((body, count))
+        self.ready.set()
+
+    async def send(self) -> None:
+        while True:
+            await self.ready.wait()
+            self.ready.clear()
+            while self.frames:
+                body, count = self.frames.popleft()
+                header = FRAME_HEADER.pack(_FRAME_MAGIC, count, self.dropped)
+                self.writer.write(header + body)
+                self.sent += count
+                # Frames queue up (and get dropped) here while the socket is full.
+                await self.writer.drain()
+
+
+class StreamServer:
+    """Publish the records appended to a ``SampleRing`` to socket subscribers.
+
+    Parameters
+    ----------
+    ring: SampleRing
+        Ring to publish, typically ``AcquisitionProcess.ring``.
+    sensor_name: str
+        Sensor registry name, announced to subscribers.
+    address: str
+        Unix socket path, or ``"HOST:PORT"`` to listen on TCP.
+    batch_interval: float
+        Seconds between frames; each frame holds every record appended since
+        the previous one.
+    max_pending: int
+        Frames queued per subscriber before its oldest frames are dropped.
+    """
+
+    def __init__(
+        self,
+        ring: SampleRing,
+        sensor_name: str,
+        address: str = DEFAULT_ADDRESS,
+        batch_interval: float = 0.05,
+        max_pending: int = 64,
+    ):
+        self.ring = ring
+        self.address = address
+        self.batch_interval = batch_interval
+        self.max_pending = max_pending
+        self.subscribers: Set[_Subscriber] = set()
+        # Connection handlers, cancelled when ``serve`` stops.
+        self._handlers: Set[asyncio.Task] = set()
+        hello = {"protocol": PROTOCOL, "sensor": sensor_name, "fields": FIELDS}
+        self._hello = json.dumps(hello).encode() + b"\n"
+
+    async def serve(self) -> None:
+        """Accept subscribers and publish to them until cancelled."""
+        target = parse_address(self.address)
+        if isinstance(target, tuple):
+            server = await asyncio.start_server(self._handle, *target)
+        else:
+            _remove_stale_socket(target)
+            server = await asyncio.start_unix_server(self._handle, target)
+        log.info("Serving on %s", self.address)
+        try:
+            async with server:
+                await self._publish()
+        finally:
+            for handler in self._handlers:
+                handler.cancel()
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+            if isinstance(target, str) and os.path.exists(target):
+                os.unlink(target)
+
+    async def _publish(self) -> None:
+        dropped = self.ring.dropped
+        while True:
+            body = self.ring.read_bytes()
+            count = len(body) // RECORD.size
+            # Records the ring overwrote before we got to them.
+            lost, dropped = self.ring.dropped - dropped, self.ring.dropped
+            for subscriber in self.subscribers:
+                subscriber.dropped += lost
+                if count:
+                    subscriber.publish(body, count)
+            await asyncio.sleep(self.batch_interval)
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        subscriber = _Subscriber(writer, self.max_pending)
+        writer.write(self._hello)
+        self.subscribers.add(subscriber)
+        log.info("%s subscribed", subscriber.peer)
+        # Subscribers never send anything; reading just notices them hanging up.
+        tasks = {
+            asyncio.ensure_future(subscriber.send()),
+            asyncio.ensure_future(reader.read()),
+        }
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.exception()
+        finally:
+            self._handlers.discard(handler)
+            self.subscribers.discard(subscriber)
+            for task in tasks:
+                task.cancel()
+            writer.close()
+            log.info(
+                "%s unsubscribed after %d records (%d dropped)",
+                subscriber.peer,
+                subscriber.sent,
+                subscriber.dropped,
+            )
+
+
+def _remove_stale_socket(path: str) -> None:
+    """Remove a socket file left behind by a server that is no longer running."""
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(path)
+        else:
+            raise OSError(f"A magnetometer server is already running on {path}.")
+
+
+class StreamClient:
+    """Subscribe to a ``StreamServer``.
+
+    Offers the same ``read`` and ``read_records`` as ``SampleRing``, so a client
+    can stand in for one, e.g. as ``magnetometer.tui.ring``.
+
+    Parameters
+    ----------
+    address: str
+        Address the server listens on.
+    timeout: float
+        Seconds to wait for the connection and the server's stream description.
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: float = 5.0):
+        target = parse_address(address)
+        if isinstance(target, tuple):
+            self.socket = socket.create_connection(target, timeout)
+        else:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.settimeout(timeout)
+            try:
+                self.socket.connect(target)
+            except OSError:
+                self.socket.close()
+                raise
+        self._buffer = bytearray()
+        # Of blocking receives; only the stream description is waited for with one.
+        self._timeout = timeout
+
+        while b"\n" not in self._buffer:
+            self._receive(block=True)
+        line, _, rest = bytes(self._buffer).partition(b"\n")
+        self._buffer[:] = rest
+        info = json.loads(line)
+        if info.get("protocol") != PROTOCOL or tuple(info["fields"]) != FIELDS:
+            self.close()
+            raise ValueError(f"Unsupported magnetometer stream: {info}")
+        self.sensor_name: str = info["sensor"]
+        self._timeout = None
+        # Records missed because this client didn't keep up with the server.
+        self.dropped = 0
+
+    def _receive(self, block: bool) -> None:
+        """Buffer whatever has arrived, waiting for something if ``block``."""
+        self.socket.setblocking(False)
+        while True:
+            try:
+                data = self.socket.recv(1 << 16)
+            except BlockingIOError:
+                if not block:
+                    return
+                self.socket.settimeout(self._timeout)
+                continue
+            if not data:
+                raise ConnectionError("The magnetometer server closed the connection.")
+            self._buffer += data
+            if block:
+                block = False
+                self.socket.setblocking(False)
+
+    def read(self, block: bool = False) -> List[memoryview]:
+        """Records received since the previous ``read``, oldest first.
+
+        Parameters
+        ----------
+        block: bool
+            Wait for at least one frame instead of returning an empty list.
+
+        Returns
+        -------
+        List[memoryview]
+            One chunk of float64 values per frame, ``len(FIELDS)`` per record.
+        """
+        self._receive(block=False)
+        chunks = []
+        while True:
+            offset = 0
+            while len(self._buffer) - offset >= FRAME_HEADER.size:
+                magic, count, self.dropped = FRAME_HEADER.unpack_from(
+                    self._buffer, offset
+                )
+                if magic != _FRAME_MAGIC:
+                    raise ValueError("Corrupt magnetometer stream.")
+                start = offset + FRAME_HEADER.size
+                end = start + count * RECORD.size
+                if end > len(self._buffer):
+                    break
+                chunks.append(memoryview(bytes(self._buffer[start:end])).cast("d"))
+                offset = end
+            del self._buffer[:offset]
+            if chunks or not block:
+                return chunks
+            self._receive(block=True)
+
+    def read_records(self, block: bool = False) -> Iterator[Tuple[float, ...]]:
+        """Like ``read``, but unpacked into one tuple of ``FIELDS`` per record."""
+        for chunk in self.read(block):
+            yield from RECORD.iter_unpack(chunk)
+
+    def close(self) -> None:
+        self.socket.close()
+
+    def __enter__(self) -> "StreamClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
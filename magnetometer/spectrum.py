@@ -0,0 +1,109 @@
+"""Sliding-window amplitude spectrum of the sample stream.
+
+Useful for finding AC field sources such as mains (50/60 Hz), motors and
+transformers. Frequencies above half the sample rate alias, so raise the rate
+(e.g. ``--rate``) to see them.
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+__all__ = [
+    "SlidingSpectrum",
+]
+
+
+class SlidingSpectrum:
+    """Windowed FFT over the most recent ``size`` samples of each channel.
+
+    Appending a sample is O(1). The FFT is only recomputed when ``magnitude`` is
+    read and at least ``hop`` samples arrived since the last one, so the cost is
+    O(size log size) per hop rather than per sample.
+
+    Parameters
+    ----------
+    size: int
+        Samples per window.
+    hop: Optional[int]
+        Samples between recomputations. Defaults to a quarter window.
+    channels: int
+        Values per sample, e.g. x, y, z and magnitude.
+    smoothing: float
+        Weight of each new sample interval in the sample-rate estimate.
+    """
+
+    def __init__(
+        self,
+        size: int = 256,
+        hop: Optional[int] = None,
+        channels: int = 4,
+        smoothing: float = 0.05,
+    ):
+        if size < 2:
+            raise ValueError(f"size must be at least 2, got {size}.")
+        self.size = size
+        self.hop = hop or max(size // 4, 1)
+        self.smoothing = smoothing
+
+        self.buffer = np.zeros((channels, size))
+        # Next column to write, and samples ever appended.
+        self.index = 0
+        self.count = 0
+        self._stale = 0
+        self._magnitude = np.zeros((channels, size // 2 + 1))
+
+        self.window = np.hanning(size)
+        # Scale to the amplitude of a sinusoid centered on a bin.
+        self._scale = 2 / self.window.sum()
+
+        # Seconds between samples.
+        self.period: Optional[float] = None
+        self._time: Optional[float] = None
+
+    def append(self, time: float, values: Sequence[float]) -> None:
+        """Add one sample of ``channels`` values taken at ``time`` seconds."""
+        self.buffer[:, self.index] = values
+        self.index = (self.index + 1) % self.size
+        self.count += 1
+        self._stale += 1
+
+        if self._time is not None:
+            dt = time - self._time
+            if dt > 0:
+                if self.period is None:
+                    self.period = dt
+                else:
+                    self.period += self.smoothing * (dt - self.period)
+        self._time = time
+
+    @property
+    def ready(self) -> bool:
+        """Whether a full window has been collected."""
+        return self.count >= self.size
+
+    @property
+    def rate(self) -> float:
+        """Estimated samples per second; ``0`` until two samples arrived."""
+        return 1 / self.period if self.period else 0.0
+
+    @property
+    def frequencies(self) -> np.ndarray:
+        """Center frequency of each bin, in Hz."""
+        return np.fft.rfftfreq(self.size, self.period or 1.0)
+
+    @property
+    def magnitude(self) -> np.ndarray:
+        """``(channels, size // 2 + 1)`` amplitudes, in the samples' units.
+
+        Each window's mean is removed first, so the DC bin is ~0. All zeros
+        until ``ready``.
+        """
+        if self.ready and (self._stale >= self.hop or self.count == self._stale):
+            # Oldest sample first, so the window tapers the ends of the span.
+            ordered = np.roll(self.buffer, -self.index, axis=1)
+            ordered -= ordered.mean(axis=1, keepdims=True)
+            spectrum = np.fft.rfft(ordered * self.window, axis=1)
+            self._magnitude = np.abs(spectrum) * self._scale
+            self._stale = 0
+        return self._magnitude
@@ -0,0 +1,112 @@
+"""Lightweight per-stage latency statistics.
+
+Each pipeline stage records durations (in nanoseconds) into a log-bucketed
+histogram, so recording is O(1) and memory is constant regardless of how long
+the session runs.
+"""
+
+from math import log2
+from typing import Dict, Iterable
+
+from rich.table import Table
+
+__all__ = [
+    "Histogram",
+    "Stats",
+]
+
+
+class Histogram:
+    """Log-bucketed histogram of non-negative integer durations.
+
+    Buckets are spaced ``2 ** (1 / BUCKETS_PER_OCTAVE)`` apart, so reported
+    percentiles are within ~9% of the true value.
+    """
+
+    BUCKETS_PER_OCTAVE = 8
+    N_BUCKETS = 64 * BUCKETS_PER_OCTAVE
+
+    def __init__(self):
+        self.counts = [0] * self.N_BUCKETS
+        self.count = 0
+        self.max = 0
+
+    def add(self, value: int) -> None:
+        if value > 0:
+            index = min(int(log2(value) * self.BUCKETS_PER_OCTAVE), self.N_BUCKETS - 1)
+        else:
+            index = 0
+        self.counts[index] += 1
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        """Estimate the ``q``-th percentile (``0 <= q <= 100``).
+
+        Returns the upper edge of the bucket containing the percentile, clipped
+        to the largest recorded value.
+        """
+        if not self.count:
+            return 0.0
+        target = q / 100 * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target and count:
+                return min(2 ** ((index + 1) / self.BUCKETS_PER_OCTAVE), self.max)
+        return float(self.max)
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class Stats:
+    """Collection of named stage histograms.
+
+    Parameters
+    ----------
+    stages: Iterable[str]
+        Stages to display first, in pipeline order.
+        Other stages are added in the order they are first recorded.
+    """
+
+    def __init__(self, stages: Iterable[str] = ()):
+        self.histograms: Dict[str, Histogram] = {stage: Histogram() for stage in stages}
+
+    def record(self, stage: str, ns: int) -> None:
+        try:
+            histogram = self.histograms[stage]
+        except KeyError:
+            histogram = self.histograms[stage] = Histogram()
+        histogram.add(ns)
+
+    def summary(self) -> Dict[str, dict]:
+        return {stage: h.summary() for stage, h in self.histograms.items()}
+
+    def table(self, **kwargs) -> Table:
+        """Render the summary as a Rich table, in milliseconds."""
+        table = Table(**kwargs)
+        table.add_column("Stage")
+        table.add_column("N", justify="right")
+        for column in ("p50", "p95", "p99", "max"):
+            table.add_column(f"{column} (ms)", justify="right")
+
+        for stage, summary in self.summary().items():
+            if not summary["count"]:
+                continue
+            table.add_row(
+                stage,
+                str(summary["count"]),
+                *(
+                    f"{summary[column] / 1e6:.2f}"
+                    for column in ("p50", "p95", "p99", "max")
+                ),
+            )
+        return table
@@ -0,0 +1,290 @@
+"""Stream sensor samples into your own code, synchronously or with asyncio.
+
+::
+
+    import magnetometer
+
+    async with magnetometer.stream("/dev/ttyACM0", sensor="lis3mdl", rate=50) as s:
+        async for batch in s:
+            print(batch.time[-1], batch.x[-1])
+
+Samples are read on a background thread into a ``SampleRing``, the same
+transport the TUI's ``--multiprocess`` mode and ``magnetometer serve`` use, and
+handed out in ``Batch``es of everything read since the previous batch.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+from magnetometer.acquisition import acquire
+from magnetometer.calibration import Calibration
+from magnetometer.ring import FIELDS, RECORD, SampleRing
+
+__all__ = [
+    "Batch",
+    "Stream",
+    "stream",
+]
+
+
+class Batch:
+    """Records read together, stored as one flat float64 array.
+
+    Columns are zero-copy views named after ``FIELDS``, e.g. ``batch.time`` or
+    ``batch.x``, and ``numpy.asarray(batch)`` is a ``(len(batch), len(FIELDS))``
+    array sharing the batch's memory.
+
+    Parameters
+    ----------
+    data: bytes
+        Records packed as ``RECORD``.
+    dropped: int
+        Records lost before this batch because the consumer didn't keep up.
+    """
+
+    def __init__(self, data: bytes = b"", dropped: int = 0):
+        self.data = memoryview(data).cast("B").cast("d")
+        self.dropped = dropped
+
+    def __len__(self) -> int:
+        return len(self.data) // len(FIELDS)
+
+    def __getattr__(self, name: str) -> memoryview:
+        if name in FIELDS:
+            return self.data[FIELDS.index(name) :: len(FIELDS)]
+        raise AttributeError(f"{type(self).__name__!r} has no attribute {name!r}")
+
+    def __iter__(self) -> Iterator[Tuple[float, ...]]:
+        """One tuple of ``FIELDS`` per record."""
+        return RECORD.iter_unpack(self.data)
+
+    def __array__(self, dtype=None):
+        array = np.frombuffer(self.data, dtype=np.float64).reshape(-1, len(FIELDS))
+        return array if dtype is None else array.astype(dtype)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self)} records, {self.dropped} dropped)"
+
+
+class Stream:
+    """Acquire samples on a background thread and iterate over them in batches.
+
+    Use ``stream`` to create one. Iterating (with ``for`` or ``async for``)
+    opens the sensor if needed and yields non-empty ``Batch``es until ``close``
+    is called; exiting a ``with``/``async with`` block closes the stream.
+
+    Parameters
+    ----------
+    port: str
+        CircuitPython device communication port.
+    sensor: str
+        Sensor registry name, e.g. ``"lis3mdl"``.
+    samples: int
+        Samples averaged on-device per reading, unless ``rate`` or ``noise``
+        is given.
+    interval: float
+        Seconds between reads, unless ``rate`` or ``noise`` is given.
+    rate: Optional[float]
+        See ``OversamplingController``.
+    noise: Optional[float]
+        See ``OversamplingController``.
+    batch_interval: float
+        Seconds to wait for more samples when none are available.
+    capacity: int
+        Records buffered between reads of the stream; older ones are dropped.
+    ring_name: Optional[str]
+        Name the ring, so other processes can ``SampleRing.attach`` to it.
+    calibration: Union[bool, Calibration]
+        Correction applied to every batch's x, y and z. ``True`` uses the
+        sensor's saved calibration, if any; ``False`` disables correction.
+    sda: int
+        SDA GPIO number.
+    scl: int
+        SCL GPIO number.
+    **sensor_kwargs
+        Passed to the sensor's constructor, e.g. ``reset``.
+    """
+
+    def __init__(
+        self,
+        port: str,
+        sensor: str = "lis3mdl",
+        *,
+        samples: int = 16,
+        interval: float = 0.1,
+        rate: Optional[float] = None,
+        noise: Optional[float] = None,
+        batch_interval: float = 0.05,
+        capacity: int = 4096,
+        ring_name: Optional[str] = None,
+        calibration: Union[bool, Calibration] = True,
+        sda: int = 0,
+        scl: int = 1,
+        **sensor_kwargs,
+    ):
+        self.port = port
+        self.sensor_name = sensor
+        self.samples = samples
+        self.interval = interval
+        self.rate = rate
+        self.noise = noise
+        self.batch_interval = batch_interval
+        self.capacity = capacity
+        self.ring_name = ring_name
+        self.sensor_kwargs = {"sda": sda, "scl": scl, **sensor_kwargs}
+        if calibration is True:
+            calibration = Calibration.load(sensor)
+        self.calibration = calibration or None
+
+        self.sensor = None
+        self.ring: Optional[SampleRing] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+        self._dropped = 0
+
+    def open(self) -> "Stream":
+        """Initialize the sensor and start acquiring; blocks until it's ready."""
+        if self.ring is not None:
+            return self
+        if self._stop.is_set():
+            raise ValueError("Stream is closed.")
+        from magnetometer.sensors import get_sensor
+
+        self.sensor = get_sensor(self.sensor_name)(self.port, **self.sensor_kwargs)
+        controller = None
+        if self.rate or self.noise:
+            from magnetometer.oversampling import OversamplingController
+
+            controller = OversamplingController(
+                self.rate, self.noise, samples=self.samples
+            )
+        self.ring = SampleRing.create(self.capacity, self.ring_name)
+        self._thread = threading.Thread(
+            target=self._acquire,
+            args=(controller,),
+            name="magnetometer-acquisition",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def _acquire(self, controller) -> None:
+        try:
+            acquire(
+                self.sensor,
+                self.ring,
+                self._stop,
+                self.samples,
+                self.interval,
+                controller,
+            )
+        except BaseException as e:
+            self._error = e
+
+    def close(self) -> None:
+        """Stop acquiring and release the sensor."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.sensor is not None:
+            self.sensor.close()
+            self.sensor = None
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def read(self) -> Batch:
+        """Records acquired since the previous ``read``, without waiting.
+
+        Raises the acquisition thread's exception if reading the sensor failed.
+        """
+        if self._error is not None:
+            raise self._error
+        if self.ring is None:
+            if self._stop.is_set():
+                raise ValueError("Stream is closed.")
+            raise ValueError("Stream isn't open.")
+        data = self.ring.read_bytes()
+        if self.calibration is not None and data:
+            records = np.frombuffer(data).reshape(-1, len(FIELDS))
+            self.calibration.apply(records[:, 1:4], out=records[:, 1:4])
+        dropped, self._dropped = self.ring.dropped - self._dropped, self.ring.dropped
+        return Batch(data, dropped)
+
+    def __iter__(self) -> "Stream":
+        return self
+
+    def __next__(self) -> Batch:
+        # Closing the stream, e.g. from the loop body, ends iteration.
+        if self.ring is None and not self._stop.is_set():
+            self.open()
+        while True:
+            if self._stop.is_set():
+                raise StopIteration
+            batch = self.read()
+            if batch:
+                return batch
+            time.sleep(self.batch_interval)
+
+    def __aiter__(self) -> "Stream":
+        return self
+
+    async def __anext__(self) -> Batch:
+        if self.ring is None and not self._stop.is_set():
+            await self.aopen()
+        while True:
+            if self._stop.is_set():
+                raise StopAsyncIteration
+            batch = self.read()
+            if batch:
+                return batch
+            await asyncio.sleep(self.batch_interval)
+
+    async def aopen(self) -> "Stream":
+        """``open`` without blocking the event loop."""
+        if self.ring is None:
+            await asyncio.get_running_loop().run_in_executor(None, self.open)
+        return self
+
+    async def aclose(self) -> None:
+        """``close`` without blocking the event loop."""
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def __enter__(self) -> "Stream":
+        return self.open()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "Stream":
+        return await self.aopen()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+
+def stream(port: str, sensor: str = "lis3mdl", **kwargs) -> Stream:
+    """Stream samples from a sensor in batches.
+
+    Parameters
+    ----------
+    port: str
+        CircuitPython device communication port.
+    sensor: str
+        Sensor registry name, e.g. ``"lis3mdl"``.
+    **kwargs
+        See ``Stream``.
+
+    Returns
+    -------
+    Stream
+        Iterate over it with ``for`` or ``async for``, ideally inside a
+        ``with``/``async with`` block so the sensor is released afterwards.
+    """
+    return Stream(port, sensor, **kwargs)
@@ -0,0 +1,224 @@
+"""Incremental sync of the vendored on-device dependencies.
+
+Only the modules a sensor needs are synced. A manifest of content hashes is
+kept on-device, so unchanged files are neither hashed on-device nor
+re-uploaded.
+"""
+
+import ast
+import hashlib
+import shutil
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Dict, Iterable, Optional
+
+from belay import Device
+
+__all__ = [
+    "DEPENDENCIES_PATH",
+    "MANIFEST",
+    "module_files",
+    "sync_dependencies",
+    "sync_files",
+]
+
+DEPENDENCIES_PATH = Path(__file__).parent / "dependencies" / "main"
+
+# On-device ``{device_path: hash}`` of every file written by ``sync_dependencies``.
+MANIFEST = "/lib/.magnetometer_manifest.json"
+
+_DEVICE_HELPERS = """\
+import json, os
+def __magnetometer_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+def __magnetometer_remove(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+def __magnetometer_save_manifest(path, manifest):
+    with open(path, "w") as f:
+        json.dump(manifest, f)
+"""
+
+
+def _module_path(root: Path, module: str) -> Optional[Path]:
+    """Source file of ``module`` under ``root``, if it is vendored."""
+    base = root.joinpath(*module.split("."))
+    for path in (base.with_suffix(".py"), base / "__init__.py"):
+        if path.is_file():
+            return path
+    return None
+
+
+def _imports(path: Path, module: str) -> Iterable[str]:
+    """Absolute names of the modules imported by ``path``."""
+    is_package = path.name == "__init__.py"
+    for node in ast.walk(ast.parse(path.read_text(), str(path))):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield alias.name
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                package = module.split(".")
+                if not is_package:
+                    package.pop()
+                package = package[: len(package) - node.level + 1]
+                base = ".".join(package + ([node.module] if node.module else []))
+            else:
+                base = node.module
+            yield base
+            # ``from package import submodule``
+            for alias in node.names:
+                yield f"{base}.{alias.name}"
+
+
+def module_files(
+    modules: Iterable[str], root: Path = DEPENDENCIES_PATH
+) -> Dict[str, Path]:
+    """Files needed to import ``modules``, following imports within ``root``.
+
+    Returns
+    -------
+    Dict[str, Path]
+        Maps each file's path relative to ``root`` (posix-style) to its path.
+    """
+    files = {}
+    pending = list(modules)
+    seen = set()
+    while pending:
+        module = pending.pop()
+        if module in seen:
+            continue
+        seen.add(module)
+
+        # Importing a submodule imports its parent packages first.
+        parts = module.split(".")
+        pending.extend(".".join(parts[:i]) for i in range(1, len(parts)))
+
+        path = _module_path(root, module)
+        if path is None:
+            continue
+        files[path.relative_to(root).as_posix()] = path
+        pending.extend(_imports(path, module))
+    return files
+
+
+def _hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def sync_dependencies(
+    device: Device,
+    modules: Iterable[str],
+    root: Path = DEPENDENCIES_PATH,
+    dst: str = "/lib",
+    manifest: str = MANIFEST,
+) -> Dict[str, str]:
+    """Upload the files needed to import ``modules`` that changed on-device.
+
+    Unlike ``Device.sync``, files are hashed on the host and compared against
+    the on-device manifest, and nothing outside ``modules`` is uploaded or
+    deleted.
+
+    Parameters
+    ----------
+    device: Device
+        Connected device.
+    modules: Iterable[str]
+        Top-level modules to make importable on-device, e.g. ``"adafruit_lis3mdl"``.
+    root: Path
+        Local directory containing the vendored modules.
+    dst: str
+        On-device directory to sync into.
+    manifest: str
+        On-device path of the hash manifest.
+
+    Returns
+    -------
+    Dict[str, str]
+        ``{device_path: hash}`` of the files that were uploaded.
+    """
+    return sync_files(device, module_files(modules, root), dst, manifest)
+
+
+def sync_files(
+    device: Device,
+    files: Dict[str, Path],
+    dst: str = "/lib",
+    manifest: str = MANIFEST,
+) -> Dict[str, str]:
+    """Upload the ``files`` that changed on-device.
+
+    Changed files are uploaded with ``Device.sync``, which minifies ``.py``
+    files. Uploading ``module.mpy`` removes a stale ``module.py`` (which
+    MicroPython would import instead) and vice versa.
+
+    Parameters
+    ----------
+    device: Device
+        Connected device.
+    files: Dict[str, Path]
+        Maps paths relative to ``dst`` to local files; see ``module_files``.
+    dst: str
+        On-device directory to sync into.
+    manifest: str
+        On-device path of the hash manifest.
+
+    Returns
+    -------
+    Dict[str, str]
+        ``{device_path: hash}`` of the files that were uploaded.
+    """
+    sources = {
+        f"{dst}/{relative}": (relative, path) for relative, path in files.items()
+    }
+    hashes = {
+        device_path: _hash(path.read_bytes())
+        for device_path, (_, path) in sources.items()
+    }
+
+    device(_DEVICE_HELPERS, record=False)
+    remote = device(f"__magnetometer_manifest({manifest!r})", record=False)
+    changed = {
+        device_path: file_hash
+        for device_path, file_hash in hashes.items()
+        if remote.get(device_path) != file_hash
+    }
+
+    if changed:
+        shadowed = set()
+        for device_path in changed:
+            stem, suffix = device_path.rsplit(".", 1)
+            if suffix in ("py", "mpy"):
+                shadowed.add(f"{stem}.{'mpy' if suffix == 'py' else 'py'}")
+        device(f"__magnetometer_remove({sorted(shadowed)!r})", record=False)
+
+        # ``Device.sync`` uploads a directory tree, so stage just the changed
+        # files in one; ``keep=True`` leaves everything else on-device alone.
+        with TemporaryDirectory() as tmp_dir:
+            for device_path in changed:
+                relative, path = sources[device_path]
+                staged = Path(tmp_dir, relative)
+                staged.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(path, staged)
+            device.sync(tmp_dir, dst, keep=True)
+
+        remote = {k: v for k, v in remote.items() if k not in shadowed}
+        remote.update(changed)
+        device(
+            f"__magnetometer_save_manifest({manifest!r}, {remote!r})",
+            record=False,
+        )
+
+    device(
+        "del json, __magnetometer_manifest, __magnetometer_remove, "
+        "__magnetometer_save_manifest",
+        record=False,
+    )
+    return changed
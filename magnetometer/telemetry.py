@@ -0,0 +1,78 @@
+"""On-device diagnostics reported by ``Sensor.read(telemetry=True)``."""
+
+import csv
+from collections import deque
+from pathlib import Path
+from time import time
+from typing import Optional
+
+from rich.console import Group, RenderableType
+
+import magnetometer.asciichartpy as acp
+
+__all__ = [
+    "Telemetry",
+]
+
+
+class Telemetry:
+    """Log and summarize per-read device telemetry.
+
+    Parameters
+    ----------
+    path: Optional[Path]
+        If provided, append every read as a CSV row to this file.
+    history_length: int
+        Number of ``mem_free`` readings kept for charting.
+    """
+
+    FIELDS = ("time", "device_ns", "i2c_ns", "python_ns", "mem_free", "collections")
+
+    def __init__(self, path: Optional[Path] = None, history_length: int = 512):
+        self.mem_free = deque(maxlen=history_length)
+        self.min_mem_free = None
+        self.collections = 0
+        self.reads = 0
+
+        self._file = None
+        self._writer = None
+        if path is not None:
+            self._file = open(path, "a", newline="")
+            self._writer = csv.writer(self._file)
+            if not self._file.tell():
+                self._writer.writerow(self.FIELDS)
+
+    def record(self, device_ns: int, i2c_ns: int, mem_free: int, collections: int):
+        self.mem_free.append(mem_free)
+        if self.min_mem_free is None or mem_free < self.min_mem_free:
+            self.min_mem_free = mem_free
+        self.collections += collections
+        self.reads += 1
+        if self._writer:
+            self._writer.writerow(
+                (
+                    f"{time():.3f}",
+                    device_ns,
+                    i2c_ns,
+                    device_ns - i2c_ns,
+                    mem_free,
+                    collections,
+                )
+            )
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+    def render(self, width: int = 40, height: int = 6) -> RenderableType:
+        """Device free memory over time, plus GC totals."""
+        if not self.mem_free:
+            return "Waiting for telemetry..."
+        series = [x / 1024 for x in list(self.mem_free)[-width:]]
+        return Group(
+            acp.plot(series, {"height": height, "format": "{:8.1f} "}),
+            f"free {series[-1]:.1f} KiB (min {self.min_mem_free / 1024:.1f} KiB), "
+            f"{self.collections} GCs in {self.reads} reads",
+        )
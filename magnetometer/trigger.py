@@ -0,0 +1,266 @@
+"""Oscilloscope-style triggered capture of field events.
+
+``TriggeredCapture`` watches incoming batches for a trigger condition and
+saves the samples around each trigger to a CSV file::
+
+    capture = TriggeredCapture(level=100, pre=200, post=800)
+    for batch in magnetometer.stream(port):
+        records = numpy.asarray(batch)
+        capture(records[:, 0], records[:, 1:4])
+
+Conditions are evaluated with array operations on whole batches, so
+monitoring costs tens of microseconds per batch whatever its size, and events
+are saved at the full sample rate. For transients faster than the host reads,
+``Sensor.capture`` evaluates a trigger on the device instead; ``save_event``
+writes its captures in the same format.
+"""
+
+import csv
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+__all__ = [
+    "TriggeredCapture",
+    "save_event",
+]
+
+
+class _Event:
+    def __init__(self, time: float, reasons: List[str], pre: np.ndarray):
+        self.time = time
+        self.reasons = reasons
+        self.pre = pre
+        self.post: List[np.ndarray] = []
+        self.post_count = 0
+
+
+class TriggeredCapture:
+    """Capture samples before and after a trigger condition.
+
+    Samples are ``(time, x, y, z)`` rows. A trigger fires on a sample where any
+    enabled condition holds:
+
+    * ``level``: ``|B|`` rises through the level.
+    * ``slope``: ``|dB/dt|``, from the vector change since the previous sample,
+      exceeds the limit.
+    * ``saturation``: an axis reaches this fraction of the full scale, e.g.
+      when a magnet comes too close for the current range.
+
+    The ``pre`` samples before a trigger and the ``post`` samples from it on
+    are written to ``directory``; the next trigger is looked for after them.
+
+    Parameters
+    ----------
+    level: Optional[float]
+        Magnitude threshold, in microteslas.
+    slope: Optional[float]
+        Rate-of-change limit, in microteslas per second.
+    saturation: Optional[float]
+        Fraction of the full scale, e.g. ``0.95``.
+    pre: int
+        Samples kept from before the trigger.
+    post: int
+        Samples captured from the trigger on.
+    directory: Path
+        Where event files are written.
+    """
+
+    def __init__(
+        self,
+        level: Optional[float] = None,
+        slope: Optional[float] = None,
+        saturation: Optional[float] = None,
+        pre: int = 100,
+        post: int = 100,
+        directory: Path = Path(),
+    ):
+        if level is None and slope is None and saturation is None:
+            raise ValueError("At least one trigger condition must be specified.")
+        if post < 1:
+            raise ValueError(f"post must be at least 1, got {post}.")
+        self.level = level
+        self.slope = slope
+        self.saturation = saturation
+        self.pre = pre
+        self.post = post
+        self.directory = Path(directory)
+
+        # The last ``pre`` samples, for the start of the next event.
+        self._history = np.empty((0, 5))
+        self._event: Optional[_Event] = None
+        # Whether the last sample was saturated.
+        self._saturated = False
+        # Files of the events saved so far.
+        self.events: List[Path] = []
+
+    @property
+    def capturing(self) -> bool:
+        """Whether a trigger fired and its post-trigger samples are being collected."""
+        return self._event is not None
+
+    def _conditions(
+        self,
+        samples: np.ndarray,
+        raw: Optional[np.ndarray],
+        full_scale: Optional[float],
+    ) -> List[tuple]:
+        """``(name, mask)`` of each enabled condition over ``samples``."""
+        # Include the previous sample for crossings and differences.
+        context = np.concatenate([self._history[-1:], samples])
+        offset = len(context) - len(samples)
+
+        def rising(above: np.ndarray) -> np.ndarray:
+            # The first sample ever has nothing to rise from.
+            edges = np.zeros_like(above)
+            edges[1:] = above[1:] & ~above[:-1]
+            return edges[offset:]
+
+        conditions = []
+        xyz = context[:, 1:4]
+        if self.level is not None:
+            # Squared magnitudes, to skip the square roots.
+            squared = np.einsum("ij,ij->i", xyz, xyz)
+            conditions.append(("level", rising(squared >= self.level**2)))
+        if self.slope is not None:
+            change = xyz[1:] - xyz[:-1]
+            dt = context[1:, 0] - context[:-1, 0]
+            fast = (dt > 0) & (
+                np.einsum("ij,ij->i", change, change) > (self.slope * dt) ** 2
+            )
+            conditions.append(
+                ("slope", np.concatenate([np.zeros(1 - offset, dtype=bool), fast]))
+            )
+        if self.saturation is not None and full_scale:
+            limit = self.saturation * full_scale
+            saturated = np.empty(len(samples) + 1, dtype=bool)
+            saturated[0] = self._saturated
+            (np.abs(samples[:, 1:4] if raw is None else raw) >= limit).any(
+                axis=1, out=saturated[1:]
+            )
+            self._saturated = bool(saturated[-1])
+            # Like the level, only entering saturation triggers.
+            conditions.append(("saturation", saturated[1:] & ~saturated[:-1]))
+        return conditions
+
+    def __call__(
+        self,
+        times: np.ndarray,
+        values: np.ndarray,
+        full_scale: Optional[float] = None,
+        raw: Optional[np.ndarray] = None,
+        missed: Optional[np.ndarray] = None,
+    ) -> List[Path]:
+        """Process a batch of samples.
+
+        Parameters
+        ----------
+        times: np.ndarray
+            ``(n,)`` sample times, from ``time.time()``.
+        values: np.ndarray
+            ``(n, 3)`` x, y and z, in microteslas.
+        full_scale: Optional[float]
+            Sensor range the batch was read at, for the saturation condition.
+        raw: Optional[np.ndarray]
+            ``(n, 3)`` readings before calibration and filtering, for the
+            saturation condition. Defaults to ``values``.
+        missed: Optional[np.ndarray]
+            ``(n,)`` conversions lost before each sample (see
+            ``magnetometer.gaps``), marked in event files.
+
+        Returns
+        -------
+        List[Path]
+            Event files completed by this batch.
+        """
+        if missed is None:
+            missed = np.zeros(len(times))
+        samples = np.column_stack([times, values, missed]).astype(float, copy=False)
+        n = len(samples)
+        conditions = self._conditions(samples, raw, full_scale)
+        fired = np.zeros(n, dtype=bool)
+        for _, mask in conditions:
+            fired |= mask
+
+        saved: List[Path] = []
+        i = 0
+        if self._event is None and not fired.any():
+            # Nothing to capture; the common case.
+            i = n
+        while i < n:
+            if self._event is None:
+                hits = np.flatnonzero(fired[i:])
+                if not len(hits):
+                    break
+                i += hits[0]
+                pre = np.concatenate([self._history, samples[:i]])[-self.pre :]
+                if not self.pre:
+                    pre = pre[:0]
+                reasons = [name for name, mask in conditions if mask[i]]
+                self._event = _Event(samples[i, 0], reasons, pre)
+            event = self._event
+            take = min(self.post - event.post_count, n - i)
+            event.post.append(samples[i : i + take])
+            event.post_count += take
+            i += take
+            if event.post_count >= self.post:
+                saved.append(self._save(event))
+                self._event = None
+
+        keep = max(self.pre, 1)
+        if n >= keep:
+            self._history = samples[-keep:]
+        else:
+            self._history = np.concatenate([self._history, samples])[-keep:]
+        return saved
+
+    def _save(self, event: _Event) -> Path:
+        path = save_event(
+            self.directory,
+            np.concatenate([event.pre, *event.post]),
+            len(event.pre),
+            "+".join(event.reasons),
+        )
+        self.events.append(path)
+        return path
+
+
+def save_event(directory: Path, samples: np.ndarray, index: int, reason: str) -> Path:
+    """Write a captured event to a new CSV file.
+
+    Parameters
+    ----------
+    directory: Path
+        Created if it doesn't exist.
+    samples: np.ndarray
+        ``(n, 4)`` rows of ``time.time()``, x, y and z, optionally followed by
+        a fifth column of conversions lost before each row. Those gaps are
+        written as rows with no readings and a ``gap`` note.
+    index: int
+        Row of the sample that triggered.
+    reason: str
+        Conditions that fired, noted on the trigger row.
+
+    Returns
+    -------
+    Path
+        The event file, named after the trigger time.
+    """
+    t_trigger = samples[index, 0]
+    stamp = datetime.fromtimestamp(t_trigger).strftime("%Y%m%d-%H%M%S.%f")
+    path = Path(directory) / f"event-{stamp}.csv"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    magnitude = np.linalg.norm(samples[:, 1:4], axis=1)
+    missed = samples[:, 4] if samples.shape[1] > 4 else np.zeros(len(samples))
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["time", "offset", "x", "y", "z", "magnitude", "note"])
+        rows = zip(samples[:, :4].tolist(), magnitude.tolist(), missed.tolist())
+        for row, ((t, x, y, z), mag, lost) in enumerate(rows):
+            if lost and row:
+                writer.writerow(("", "", "", "", "", "", f"gap: {lost:g} missed"))
+            note = reason if row == index else ""
+            writer.writerow((f"{t:.6f}", f"{t - t_trigger:.6f}", x, y, z, mag, note))
+    return path
@@ -0,0 +1,593 @@
+"""Textual user interface.
+
+Imported only when the interactive app runs, so that headless commands and
+library use of ``Sensor`` don't pay for Textual and Rich.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime
+from math import isfinite, nan, sqrt
+from pathlib import Path
+from time import perf_counter_ns
+from typing import TYPE_CHECKING, List, Optional
+
+import numpy as np
+from rich.align import Align
+from rich.console import Console, Group, RenderableType
+from rich.panel import Panel
+from rich.table import Table
+from rich.text import Text
+from textual.app import App
+from textual.widget import Widget
+from textual.widgets import Footer
+
+import magnetometer.asciichartpy as acp
+from magnetometer import __version__
+from magnetometer.calibration import Calibration, EllipsoidFit
+from magnetometer.clock import ClockSync
+from magnetometer.filters import FilterChain, filter_chain
+from magnetometer.gaps import GapCounter
+from magnetometer.ring import FIELDS
+from magnetometer.running_stats import RunningStats, WindowedStats
+from magnetometer.spectrum import SlidingSpectrum
+from magnetometer.stats import Stats
+from magnetometer.trigger import TriggeredCapture
+
+if TYPE_CHECKING:
+    from magnetometer.oversampling import OversamplingController
+    from magnetometer.pipeline import PipelinedRead
+    from magnetometer.ring import SampleRing
+    from magnetometer.sensors import Sensor
+    from magnetometer.telemetry import Telemetry
+
+# Set by ``magnetometer.main`` before running ``MagnetometerApp``.
+sensor: Sensor = None  # type: ignore
+stats = Stats(
+    [
+        "device",
+        "device.i2c",
+        "device.python",
+        "link",
+        "wait",
+        "history",
+        "series",
+        "plot",
+        "rich",
+    ]
+)
+# Set when on-device telemetry is requested.
+telemetry: Optional[Telemetry] = None
+# Set to read through a pipeline instead of calling ``sensor.read`` directly.
+pipeline: Optional[PipelinedRead] = None
+# Samples averaged per reading, unless ``controller`` is set.
+samples = 16
+# Set to adapt ``samples`` and the read interval to a requested rate/noise.
+controller: Optional[OversamplingController] = None
+# Set to chart samples from an acquisition process instead of reading
+# ``sensor``, which is then the sensor class.
+ring: Optional[SampleRing] = None
+# Hard/soft-iron correction applied to every reading.
+calibration: Optional[Calibration] = None
+# Filters between acquisition and the chart; all off if not set.
+filters: Optional[FilterChain] = None
+# Set to save the samples around trigger events.
+trigger: Optional[TriggeredCapture] = None
+# Samples per spectrum window.
+spectrum_size = 256
+# Readings covered by each windowed statistic; statistics over all readings
+# since the last zeroing are always kept too.
+stat_windows = (100,)
+
+X_COLOR = "red"
+Y_COLOR = "green"
+Z_COLOR = "blue"
+MAG_COLOR = "white"
+
+
+class Chart(Widget):
+    # Seconds between sensor reads.
+    interval = 0.1
+
+    def __init__(
+        self,
+        *args,
+        history_length: int = 1024,
+        spectrum: Optional[SlidingSpectrum] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+
+        self.height = -1
+        self.width = -1
+
+        self.zero_x_val = 0
+        self.zero_y_val = 0
+        self.zero_z_val = 0
+
+        self.scale = 0
+
+        # Host-side time of the last reading and of the last redraw.
+        self.host_ns = 0
+        self.draw_ns = 0
+
+        # Add a dummy zero-value to simulate an X-axis
+        self.history = deque(
+            [(0, nan, nan, nan, nan)] * history_length, maxlen=history_length
+        )
+        self.history.append((0, 0, 0, 0, 0))  # Need one valid data-point
+        self.spectrum = spectrum
+
+        # Per channel (x, y, z, mag): one ``WindowedStats`` per window, then
+        # ``RunningStats`` over everything.
+        self.signal_stats = [
+            [*(WindowedStats(window) for window in stat_windows), RunningStats()]
+            for _ in range(4)
+        ]
+        # Index of the statistics shown.
+        self.signal_stats_view = 0
+
+        self.calibration = calibration
+        # Collects raw readings while calibrating.
+        self.fit: Optional[EllipsoidFit] = None
+        self.calibration_message: Optional[str] = None
+
+        self.filters = filters if filters is not None else filter_chain()
+        self.trigger = trigger
+        # Stamps direct reads; the acquisition process has its own.
+        self.clock = ClockSync()
+        self.gaps = GapCounter()
+
+    def on_mount(self) -> None:
+        if ring is not None:
+            self.set_interval(self.interval, self.read_ring)
+        elif controller is None:
+            self.set_interval(self.interval, self.read_sensor)
+        else:
+            self.set_timer(controller.interval, self.poll)
+
+    def poll(self) -> None:
+        """Read, then schedule the next read ``controller.interval`` after this one."""
+        t_start = perf_counter_ns()
+        self.read_sensor()
+        elapsed = (perf_counter_ns() - t_start) / 1e9
+        self.set_timer(max(controller.interval - elapsed, 0), self.poll)
+
+    def zero_x(self) -> None:
+        self.zero_x_val += self.history[-1][1]
+        self.reset_signal_stats(0)
+
+    def zero_y(self) -> None:
+        self.zero_y_val += self.history[-1][2]
+        self.reset_signal_stats(1)
+
+    def zero_z(self) -> None:
+        self.zero_z_val += self.history[-1][3]
+        self.reset_signal_stats(2)
+
+    def reset_signal_stats(self, channel: int) -> None:
+        """Restart a channel's statistics, and the magnitude's, which depends on it."""
+        for index in (channel, 3):
+            for channel_stats in self.signal_stats[index]:
+                channel_stats.reset()
+
+    def toggle_calibration(self) -> None:
+        """Start collecting readings for a calibration, or finish and save it."""
+        if self.fit is None:
+            self.fit = EllipsoidFit()
+            self.calibration_message = None
+            return
+
+        fit, self.fit = self.fit, None
+        try:
+            self.calibration = fit.solve()
+        except ValueError as e:
+            self.calibration_message = f"[bold red]Calibration failed: {e}[/]"
+        else:
+            path = self.calibration.save(sensor.__registry__.name)
+            self.calibration_message = f"Calibration saved to {path}"
+            # Offsets and statistics of uncorrected readings no longer apply.
+            self.zero_x_val = self.zero_y_val = self.zero_z_val = 0
+            for channel in range(3):
+                self.reset_signal_stats(channel)
+        self.set_timer(5, self.clear_calibration_message)
+
+    def toggle_filter(self, kind: str) -> None:
+        self.filters.toggle(kind)
+        self.refresh()
+
+    def clear_calibration_message(self) -> None:
+        self.calibration_message = None
+
+    def cycle_signal_stats(self) -> None:
+        """Show the statistics of the next window."""
+        self.signal_stats_view = (self.signal_stats_view + 1) % len(
+            self.signal_stats[0]
+        )
+        self.refresh()
+
+    def read_sensor(self) -> None:
+        read = sensor.read if pipeline is None else pipeline
+        n = samples if controller is None else controller.samples
+        t_start = perf_counter_ns()
+        if telemetry is None:
+            x, y, z, device_ns, started, sequence = read(
+                self.scale, samples=n, timed=True
+            )
+        else:
+            result = read(self.scale, samples=n, telemetry=True)
+            x, y, z, device_ns, started, sequence = result[:6]
+            i2c_ns, mem_free, collections = result[6:]
+        t_read = perf_counter_ns()
+        stats.record("device", device_ns)
+        if telemetry is not None:
+            stats.record("device.i2c", i2c_ns)
+            stats.record("device.python", device_ns - i2c_ns)
+            telemetry.record(device_ns, i2c_ns, mem_free, collections)
+        if pipeline is None:
+            round_trip_ns = t_read - t_start
+            self.clock.add(started + device_ns // 2, t_start, t_read)
+        else:
+            # The round trip overlapped with earlier host work; only the
+            # time spent blocked on it delays this sample.
+            round_trip_ns = pipeline.round_trip_ns
+            self.clock.add(
+                started + device_ns // 2,
+                pipeline.started_ns,
+                pipeline.started_ns + round_trip_ns,
+            )
+            n = pipeline.kwargs["samples"]
+            stats.record("wait", pipeline.wait_ns)
+        stats.record("link", round_trip_ns - device_ns)
+        if controller is not None:
+            controller.update((x, y, z), n, round_trip_ns, self.host_ns)
+        missed = self.gaps([sequence], [n])
+
+        scale = self.scale
+        self.scale = sensor.autorange(scale, (x, y, z))
+        raw = (x, y, z)
+        if self.fit is not None:
+            self.fit.append(raw)
+        if self.calibration is not None:
+            x, y, z = self.calibration(raw)
+        t = self.clock.time(started + device_ns // 2)
+        if self.filters.active:
+            x, y, z = self.filters(np.array([t]), np.array([[x, y, z]]))[0].tolist()
+        if self.trigger is not None:
+            self.trigger(
+                np.array([t]),
+                np.array([[x, y, z]]),
+                sensor.scales[scale] if sensor.scales else None,
+                np.array([raw]),
+                missed,
+            )
+        self.add_sample(t, x, y, z, gap=bool(missed[0]))
+        t_history = perf_counter_ns()
+        stats.record("history", t_history - t_read)
+        self.host_ns = t_history - t_read + self.draw_ns
+        self.refresh()
+
+    def read_ring(self) -> None:
+        """Chart the samples the acquisition process published since last time."""
+        t_start = perf_counter_ns()
+        n_samples = 0
+        for chunk in ring.read():
+            records = raw = np.frombuffer(chunk).reshape(-1, len(FIELDS))
+            missed = self.gaps(records[:, 7], records[:, 6])
+            if self.fit is not None:
+                self.fit.extend(records[:, 1:4])
+            if self.calibration is not None or self.filters.active:
+                records = records.copy()
+            if self.calibration is not None:
+                self.calibration.apply(records[:, 1:4], out=records[:, 1:4])
+            if self.filters.active:
+                records[:, 1:4] = self.filters(records[:, 0], records[:, 1:4])
+            if self.trigger is not None:
+                # The acquisition process doesn't report its range; readings
+                # clip at the largest one, which it switches to when needed.
+                self.trigger(
+                    records[:, 0],
+                    records[:, 1:4],
+                    sensor.scales[-1] if sensor.scales else None,
+                    raw[:, 1:4],
+                    missed,
+                )
+            for (t, x, y, z, device_ns, round_trip_ns, _, _), gap in zip(
+                records.tolist(), missed.tolist()
+            ):
+                stats.record("device", int(device_ns))
+                stats.record("link", int(round_trip_ns - device_ns))
+                self.add_sample(t, x, y, z, gap=bool(gap))
+            n_samples += len(records)
+        if n_samples:
+            stats.record("history", perf_counter_ns() - t_start)
+            self.refresh()
+
+    def add_sample(
+        self, t: float, x: float, y: float, z: float, gap: bool = False
+    ) -> None:
+        """Add a reading taken at ``time.time()`` ``t``.
+
+        If readings were lost before it (``gap``), the chart breaks the line.
+        """
+        if gap:
+            self.history.append((0, nan, nan, nan, nan))
+        x -= self.zero_x_val
+        y -= self.zero_y_val
+        z -= self.zero_z_val
+        mag = sqrt(x**2 + y**2 + z**2)
+        # The leading 0 is plotted as the chart's zero line.
+        self.history.append((0, x, y, z, mag))
+        for channel_stats, value in zip(self.signal_stats, (x, y, z, mag)):
+            for running in channel_stats:
+                running.append(value)
+        if self.spectrum is not None:
+            self.spectrum.append(t, (x, y, z, mag))
+
+    def on_resize(self, event):
+        self.height = event.height
+        self.width = event.width
+
+    def render_lines(self) -> None:
+        self.render_ns = 0
+        t_start = perf_counter_ns()
+        super().render_lines()
+        self.draw_ns = perf_counter_ns() - t_start
+        # Only Rich's share; ``render`` records its own stages.
+        stats.record("rich", self.draw_ns - self.render_ns)
+
+    def render(self) -> RenderableType:
+        t_start = perf_counter_ns()
+        try:
+            return self._render()
+        finally:
+            self.render_ns = perf_counter_ns() - t_start
+
+    def _subtitle(self) -> Optional[str]:
+        parts = []
+        if controller is not None:
+            subtitle = (
+                f"{1 / controller.interval:.1f} Hz, {controller.samples}x oversampling"
+            )
+            if controller.warning:
+                subtitle += f" [bold red]({controller.warning})[/]"
+            parts.append(subtitle)
+        if self.filters.active:
+            parts.append(f"Filters: {self.filters.describe()}")
+        gaps = self.gaps.describe()
+        if gaps:
+            parts.append(f"[bold red]Conversions {gaps}[/]")
+        if self.trigger is not None:
+            events = self.trigger.events
+            state = "[bold red]capturing[/]" if self.trigger.capturing else "armed"
+            subtitle = f"Trigger {state} ({len(events)} saved)"
+            if events:
+                subtitle += f", last {events[-1]}"
+            parts.append(subtitle)
+        if self.fit is not None:
+            parts.append(
+                f"[bold yellow]Calibrating: rotate the sensor in every direction, "
+                f"then press c ({self.fit.count} readings)[/]"
+            )
+        elif self.calibration_message:
+            parts.append(self.calibration_message)
+        return " | ".join(parts) or None
+
+    def _render(self) -> RenderableType:
+        if self.height == -1 or self.width == -1:
+            return ""
+
+        width = self.width - 13
+        cfg = {
+            "offset": 2,
+            "colors": ["", X_COLOR, Y_COLOR, Z_COLOR, MAG_COLOR],
+            "height": self.height - 9,
+        }
+
+        t_start = perf_counter_ns()
+        series = [list(elem)[-width:] for elem in zip(*self.history)]
+        max_mag = max(mag for mag in series[4] if isfinite(mag))
+
+        if max_mag > 1000:
+            units = "m"
+            scale = 1000
+            series = [[x / 1000 for x in data] for data in series]
+        else:
+            units = "μ"
+            scale = 1
+
+        x = series[1][-1]
+        y = series[2][-1]
+        z = series[3][-1]
+        mag = series[4][-1]
+
+        t_plot = perf_counter_ns()
+        stats.record("series", t_plot - t_start)
+        buf = acp.plot(series, cfg)
+        stats.record("plot", perf_counter_ns() - t_plot)
+
+        return Group(
+            Panel(
+                buf,
+                title=f"Magnetometer v{__version__} ({sensor.__registry__.name})",
+                subtitle=self._subtitle(),
+            ),
+            self._footer(
+                [
+                    f"[bold {X_COLOR}]X: {x:6.2f} {units}T[/]",
+                    f"[bold {Y_COLOR}]Y: {y:6.2f} {units}T[/]",
+                    f"[bold {Z_COLOR}]Z: {z:6.2f} {units}T[/]",
+                    f"[bold {MAG_COLOR}]Mag: {mag:6.2f} {units}T[/]",
+                ],
+                scale,
+            ),
+            Align.center(f"[dim]Statistics over {self._signal_stats_span()}[/]"),
+        )
+
+    def _footer(self, readings: List[str], scale: float) -> Table:
+        """Latest reading and statistics of each channel, one column each."""
+        table = Table.grid(expand=True)
+        for _ in readings:
+            table.add_column(justify="center", ratio=1)
+        table.add_row(*readings)
+        table.add_row(*(self._signal_stats(i, scale) for i in range(len(readings))))
+        return table
+
+    def _signal_stats_span(self) -> str:
+        running = self.signal_stats[0][self.signal_stats_view]
+        if isinstance(running, WindowedStats):
+            return f"the last {running.window} readings"
+        return "all readings since zeroing"
+
+    def _signal_stats(self, channel: int, scale: float) -> str:
+        """Statistics lines of a channel, in the chart's units."""
+        running = self.signal_stats[channel][self.signal_stats_view]
+        return (
+            f"μ {running.mean / scale:.2f}  σ {running.std / scale:.3f}\n"
+            f"rms {running.rms / scale:.2f}  p-p {running.peak_to_peak / scale:.2f}\n"
+            f"min {running.min / scale:.2f}  max {running.max / scale:.2f}"
+        )
+
+
+class SpectrumPane(Widget):
+    """Amplitude spectrum of each axis and the magnitude, as bar charts.
+
+    Bars are scaled per channel; the labels give each channel's strongest
+    frequency and its amplitude.
+    """
+
+    BARS = np.array(list(" ▁▂▃▄▅▆▇█"))
+
+    def __init__(self, spectrum: SlidingSpectrum, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.spectrum = spectrum
+
+    def on_mount(self) -> None:
+        self.visible = False
+        self.set_interval(0.25, self.refresh)
+
+    def render(self) -> RenderableType:
+        spectrum = self.spectrum
+        title = f"Spectrum ({spectrum.rate:.1f} Hz sampling)"
+        if not spectrum.ready:
+            return Panel(
+                f"Collecting samples ({spectrum.count}/{spectrum.size})", title=title
+            )
+
+        # Skip the DC bin; the mean is removed anyway.
+        magnitude = spectrum.magnitude[:, 1:]
+        frequencies = spectrum.frequencies[1:]
+        width = max(self.size.width - 4, 1)
+        # A label row and the bars, per channel.
+        rows = max((self.size.height - 3) // 4 - 1, 1)
+
+        # Combine bins into one bar per column, keeping the largest.
+        columns = min(width, magnitude.shape[1])
+        starts = np.linspace(0, magnitude.shape[1], columns, endpoint=False)
+        bars = np.maximum.reduceat(magnitude, starts.astype(int), axis=1)
+        top = bars.max(axis=1, keepdims=True)
+        levels = np.round(bars / np.where(top > 0, top, 1) * rows * 8).astype(int)
+
+        lines = []
+        for channel, (name, color) in enumerate(
+            (("X", X_COLOR), ("Y", Y_COLOR), ("Z", Z_COLOR), ("Mag", MAG_COLOR))
+        ):
+            peak = magnitude[channel].argmax()
+            lines.append(
+                f"[bold {color}]{name}[/]: peak {frequencies[peak]:.2f} Hz, "
+                f"{magnitude[channel, peak]:.3g} μT"
+            )
+            for row in reversed(range(rows)):
+                chars = self.BARS[np.clip(levels[channel] - row * 8, 0, 8)]
+                lines.append(Text("".join(chars), style=color))
+        nyquist = f"{frequencies[-1]:.1f} Hz"
+        lines.append(f"0 Hz{nyquist:>{max(columns - 4, len(nyquist))}}")
+        return Panel(Group(*lines), title=title)
+
+
+class StatsOverlay(Widget):
+    """Per-stage latency percentiles, drawn on top of the chart.
+
+    With on-device telemetry enabled, the device's free memory is charted below.
+    """
+
+    def on_mount(self) -> None:
+        self.visible = False
+        self.set_interval(0.5, self.refresh)
+
+    def render(self) -> RenderableType:
+        latency = Panel(stats.table(expand=True, box=None), title="Latency")
+        if telemetry is None:
+            return latency
+        return Group(
+            latency,
+            Panel(telemetry.render(width=self.size.width - 15), title="Device Memory"),
+        )
+
+
+class MagnetometerApp(App):
+    async def on_load(self) -> None:
+        await self.bind("a", "zero_all", "Zero ALL")
+        await self.bind("x", "zero_x", "Zero X")
+        await self.bind("y", "zero_y", "Zero Y")
+        await self.bind("z", "zero_z", "Zero Z")
+        await self.bind("s", "screenshot", "Screenshot")
+        await self.bind("t", "toggle_stats", "Stats")
+        await self.bind("f", "toggle_spectrum", "Spectrum")
+        await self.bind("w", "cycle_signal_stats", "Window")
+        await self.bind("c", "toggle_calibration", "Calibrate")
+        await self.bind("l", "toggle_filter('lowpass')", "Low-pass")
+        await self.bind("h", "toggle_filter('highpass')", "High-pass")
+        await self.bind("n", "toggle_filter('notch')", "Notch")
+
+        await self.bind("q", "quit", "Quit")
+
+    async def on_mount(self) -> None:
+        spectrum = SlidingSpectrum(spectrum_size)
+        footer = Footer()
+        self.chart = Chart(spectrum=spectrum)
+        self.spectrum_pane = SpectrumPane(spectrum)
+        self.stats_overlay = StatsOverlay()
+
+        await self.view.dock(footer, edge="bottom")
+        # Hidden panes take no space, so the chart fills the rest either way.
+        await self.view.dock(self.spectrum_pane, edge="right", size=60)
+        await self.view.dock(self.chart, edge="top")
+        await self.view.dock(self.stats_overlay, edge="right", size=60, z=1)
+
+    def action_zero_x(self) -> None:
+        self.chart.zero_x()
+
+    def action_zero_y(self) -> None:
+        self.chart.zero_y()
+
+    def action_zero_z(self) -> None:
+        self.chart.zero_z()
+
+    def action_zero_all(self) -> None:
+        self.chart.zero_x()
+        self.chart.zero_y()
+        self.chart.zero_z()
+
+    def action_toggle_stats(self) -> None:
+        self.stats_overlay.visible = not self.stats_overlay.visible
+
+    def action_toggle_filter(self, kind: str) -> None:
+        self.chart.toggle_filter(kind)
+
+    def action_toggle_calibration(self) -> None:
+        self.chart.toggle_calibration()
+
+    def action_cycle_signal_stats(self) -> None:
+        self.chart.cycle_signal_stats()
+
+    def action_toggle_spectrum(self) -> None:
+        self.spectrum_pane.visible = not self.spectrum_pane.visible
+
+    def action_screenshot(self) -> None:
+        time = datetime.now().isoformat(timespec="seconds", sep=" ")
+        fn_svg = Path(f"magnetometer {time}.svg")
+        console = Console(record=True)
+        console.print(self)
+        console.save_svg(str(fn_svg), title=time)
@@ -0,0 +1,24 @@
+import numpy as np
+
+from magnetometer.gradient import Gradient
+from magnetometer.sensors import SensorArray
+
+
+def test_read_all_sequence_ignores_read():
+    array = SensorArray("emulated", ["lis3mdl", "lis3mdl@0x1E"], sda=0, scl=1)
+    try:
+        *_, first = array.read_all([0, 0], samples=4, timed=True)
+        array.read(samples=3)
+        *_, second = array.read_all([0, 0], samples=4, timed=True)
+    finally:
+        array.close()
+    assert second - first == 4
+
+
+def test_gradient_linear_field():
+    positions = np.array([[0, 0, 0], [0.1, 0, 0], [0, 0.1, 0], [0, 0, 0.1]])
+    tensor = np.arange(9.0).reshape(3, 3)
+    readings = np.array([10.0, 20.0, 30.0]) + positions @ tensor.T
+    field, gradient = Gradient(positions)(readings)
+    np.testing.assert_allclose(gradient, tensor, atol=1e-9)
+    np.testing.assert_allclose(field, readings.mean(axis=0))
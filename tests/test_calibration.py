@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from magnetometer.calibration import Calibration, EllipsoidFit
+
+OFFSET = np.array([12.0, -30.0, 5.0])
+# Symmetric soft-iron distortion with unit determinant, so the fitted sphere
+# keeps the true field's radius.
+SOFT_IRON = np.array([[1.2, 0.1, -0.05], [0.1, 0.9, 0.08], [-0.05, 0.08, 1.0]])
+SOFT_IRON /= np.cbrt(np.linalg.det(SOFT_IRON))
+RADIUS = 50.0
+
+
+def rotated_readings(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    directions = rng.normal(size=(n, 3))
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    return (RADIUS * directions) @ SOFT_IRON.T + OFFSET
+
+
+def test_fit_recovers_distortion():
+    fit = EllipsoidFit()
+    readings = rotated_readings()
+    for batch in np.array_split(readings, 7):
+        fit.extend(batch)
+    calibration = fit.solve()
+
+    np.testing.assert_allclose(calibration.offset, OFFSET, atol=1e-6)
+    np.testing.assert_allclose(calibration.matrix, np.linalg.inv(SOFT_IRON), atol=1e-6)
+    corrected = calibration.apply(readings)
+    np.testing.assert_allclose(np.linalg.norm(corrected, axis=1), RADIUS, rtol=1e-6)
+
+
+def test_fit_needs_enough_readings():
+    fit = EllipsoidFit()
+    for reading in rotated_readings(8):
+        fit.append(reading)
+    with pytest.raises(ValueError, match="at least 9"):
+        fit.solve()
+
+
+def test_fit_needs_every_orientation():
+    fit = EllipsoidFit()
+    angles = np.linspace(0, 2 * np.pi, 100)
+    # Rotated about one axis only: a circle, not an ellipsoid.
+    fit.extend(np.column_stack([np.cos(angles), np.sin(angles), 0 * angles]))
+    with pytest.raises(ValueError, match="orientations"):
+        fit.solve()
+
+
+def test_call_matches_apply_with_plain_floats():
+    calibration = Calibration(OFFSET, np.linalg.inv(SOFT_IRON))
+    reading = rotated_readings(1)[0]
+    corrected = calibration(reading)
+    assert all(type(value) is float for value in corrected)
+    np.testing.assert_allclose(corrected, calibration.apply(reading[None])[0])
+
+
+def test_apply_in_place():
+    calibration = Calibration(OFFSET, SOFT_IRON)
+    readings = rotated_readings(10)
+    expected = calibration.apply(readings)
+    calibration.apply(readings, out=readings)
+    np.testing.assert_allclose(readings, expected)
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / "calibration.json"
+    assert Calibration.load("lis3mdl", path) is None
+    Calibration(OFFSET, SOFT_IRON).save("lis3mdl", path)
+    Calibration().save("tlv493d", path)
+    loaded = Calibration.load("lis3mdl", path)
+    np.testing.assert_allclose(loaded.offset, OFFSET)
+    np.testing.assert_allclose(loaded.matrix, SOFT_IRON)
+    assert Calibration.load("mmc5603", path) is None
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from magnetometer.clock import ClockSync
+
+OFFSET_NS = 123_456_789_000
+DRIFT_PPM = 40.0
+
+
+def device_ns(host_ns):
+    """Device clock: offset from the host's and running 40 ppm fast."""
+    return OFFSET_NS + int(host_ns * (1 + DRIFT_PPM * 1e-6))
+
+
+def test_recovers_offset_and_drift():
+    rng = np.random.default_rng(0)
+    clock = ClockSync(window=128, refit=8)
+    host = 5_000_000_000
+    for _ in range(500):
+        round_trip = int(rng.uniform(1e6, 1.2e6))
+        if rng.random() < 0.1:
+            # A delayed reply: the device stamp isn't mid-way, but the round
+            # trip is long enough for the fit to leave it out.
+            clock.add(device_ns(host + 200_000), host, host + 5 * round_trip)
+        else:
+            clock.add(device_ns(host + round_trip // 2), host, host + round_trip)
+        host += 10_000_000
+
+    assert clock.drift == pytest.approx(DRIFT_PPM, abs=0.5)
+    # Stamps map back to the host time they were taken at.
+    for host_ns in (host - 1_000_000_000, host, host + 1_000_000_000):
+        assert clock.host_ns(device_ns(host_ns)) == pytest.approx(host_ns, abs=20_000)
+    assert clock.time(device_ns(host)) == pytest.approx(
+        (host + clock.epoch_ns) * 1e-9, abs=1e-4
+    )
+
+
+def test_single_pair_assumes_no_drift():
+    clock = ClockSync()
+    clock.add(1_000, 10_000, 12_000)
+    assert clock.rate == 1
+    assert clock.host_ns(2_000) == 12_000
+
+
+def test_window_must_hold_two_pairs():
+    with pytest.raises(ValueError):
+        ClockSync(window=1)
@@ -0,0 +1,18 @@
+import sys
+
+from magnetometer.emulation import EmulatedBoard
+from magnetometer.emulation.board import STANDINS_PATH
+
+
+def test_standins_removed_with_last_board():
+    first = EmulatedBoard()
+    second = EmulatedBoard()
+    second.soft_reset()
+    assert "microcontroller" in sys.modules
+
+    first.close()
+    assert STANDINS_PATH in sys.path
+    second.close()
+    second.close()
+    assert STANDINS_PATH not in sys.path
+    assert "microcontroller" not in sys.modules
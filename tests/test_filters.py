@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from magnetometer.filters import KINDS, Biquad, filter_chain
+
+
+def recursion(biquad, values, state):
+    """Transposed direct form II, one sample at a time."""
+    b0, b1, b2 = biquad.b
+    a1, a2 = biquad.a
+    z0, z1 = state.copy()
+    output = np.empty_like(values)
+    for k, x in enumerate(values):
+        y = b0 * x + z0
+        z0 = b1 * x - a1 * y + z1
+        z1 = b2 * x - a2 * y
+        output[k] = y
+    return output
+
+
+@pytest.fixture
+def signal():
+    rng = np.random.default_rng(0)
+    t = np.arange(600) / 200
+    values = np.column_stack(
+        [
+            np.sin(2 * np.pi * 50 * t),
+            30 + np.sin(2 * np.pi * 0.5 * t),
+            rng.normal(size=len(t)),
+        ]
+    )
+    return values
+
+
+def designed(kind):
+    biquad = Biquad(kind, {"lowpass": 5, "highpass": 1, "notch": 50}[kind])
+    biquad.design(200)
+    return biquad
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_block_matches_recursion(kind, signal):
+    biquad = designed(kind)
+    # Steady state for a constant input equal to the first value.
+    b0, b1, b2 = biquad.b
+    a1, a2 = biquad.a
+    x0 = signal[0]
+    y0 = x0 * (b0 + b1 + b2) / (1 + a1 + a2)
+    z1 = b2 * x0 - a2 * y0
+    state = np.stack([b1 * x0 - a1 * y0 + z1, z1])
+
+    output = biquad(signal)  # Longer than one block.
+    np.testing.assert_allclose(output, recursion(biquad, signal, state), atol=1e-9)
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_batches_match_one_pass(kind, signal):
+    whole = designed(kind)(signal)
+    biquad = designed(kind)
+    splits = [1, 2, 3, 50, 51, 300]
+    batches = np.split(signal, splits)
+    output = np.concatenate([biquad(batch) for batch in batches])
+    np.testing.assert_allclose(output, whole, atol=1e-9)
+
+
+def test_lowpass_starts_settled():
+    biquad = designed("lowpass")
+    values = np.full((10, 3), 42.0)
+    np.testing.assert_allclose(biquad(values), values)
+
+
+def test_notch_rejects_mains(signal):
+    output = designed("notch")(signal[:, :1])
+    assert np.abs(output[-100:]).max() < 0.1
+
+
+def test_chain_designs_for_measured_rate(signal):
+    chain = filter_chain(lowpass=5)
+    times = 1e9 + np.arange(len(signal)) / 200
+    chain(times, signal)
+    assert chain.filters["lowpass"].rate == pytest.approx(200)
+    assert chain.describe() == "lowpass 5 Hz"
@@ -0,0 +1,44 @@
+import numpy as np
+
+from magnetometer.gaps import GapCounter
+
+
+def test_consecutive_readings_have_no_gaps():
+    gaps = GapCounter()
+    missed = gaps(np.array([16, 32, 48]), np.full(3, 16))
+    np.testing.assert_array_equal(missed, [0, 0, 0])
+    gaps(np.array([64]), np.array([16]))
+    assert gaps.describe() == ""
+
+
+def test_counts_missed_across_batches():
+    gaps = GapCounter()
+    gaps(np.array([4, 8]), np.array([4, 4]))
+    # 8 -> 20 skips two readings of 4, and 20 -> 26 skips 2 conversions.
+    missed = gaps(np.array([20, 26, 30]), np.array([4, 4, 4]))
+    np.testing.assert_array_equal(missed, [8, 2, 0])
+    assert (gaps.missed, gaps.gaps, gaps.repeated) == (10, 2, 0)
+    assert gaps.describe() == "10 missed in 2 gaps"
+
+
+def test_counts_repeated():
+    gaps = GapCounter()
+    # A TLV493D read faster than it converts: 1 conversion read twice.
+    missed = gaps(np.array([1, 2, 2, 3]), np.ones(4))
+    np.testing.assert_array_equal(missed, [0, 0, 0, 0])
+    assert (gaps.missed, gaps.repeated) == (0, 1)
+    assert gaps.describe() == "1 repeated"
+
+
+def test_reset_sequence_is_not_a_gap():
+    gaps = GapCounter()
+    gaps(np.array([100, 110]), np.array([10, 10]))
+    # The device restarted and counts from zero again.
+    missed = gaps(np.array([10, 20, 40]), np.array([10, 10, 10]))
+    np.testing.assert_array_equal(missed, [0, 0, 10])
+    assert (gaps.missed, gaps.gaps, gaps.repeated) == (10, 1, 0)
+
+
+def test_empty_batch():
+    gaps = GapCounter()
+    assert len(gaps(np.array([]), np.array([]))) == 0
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from magnetometer.ring import _COUNT, _WRITING_OFFSET, FIELDS, SampleRing
+
+
+def record(i):
+    return (float(i),) * len(FIELDS)
+
+
+@pytest.fixture
+def ring():
+    ring = SampleRing.create(4)
+    yield ring
+    ring.close()
+
+
+def test_wraparound(ring):
+    for i in range(3):
+        ring.append(record(i))
+    assert [r[0] for r in ring.read_records()] == [0, 1, 2]
+    for i in range(3, 6):
+        ring.append(record(i))
+    chunks = ring.read()
+    # Record 3 sits at the end of the buffer, 4 and 5 at its start.
+    assert len(chunks) == 2
+    values = np.concatenate([np.asarray(chunk) for chunk in chunks])
+    assert values[:: len(FIELDS)].tolist() == [3, 4, 5]
+    assert ring.dropped == 0
+    assert ring.read() == []
+
+
+def test_lapped_reader_drops_oldest(ring):
+    for i in range(10):
+        ring.append(record(i))
+    assert [r[0] for r in ring.read_records()] == [6, 7, 8, 9]
+    assert ring.dropped == 6
+    ring.append(record(10))
+    assert [r[0] for r in ring.read_records()] == [10]
+    assert ring.dropped == 6
+
+
+def test_attached_readers_are_independent(ring):
+    ring.append(record(0))
+    first = SampleRing.attach(ring.name)
+    second = SampleRing.attach(ring.name)
+    try:
+        # Attaching starts from the newest record on.
+        assert first.read() == []
+        ring.append(record(1))
+        ring.append(record(2))
+        assert [r[0] for r in first.read_records()] == [1, 2]
+        ring.append(record(3))
+        assert [r[0] for r in second.read_records()] == [1, 2, 3]
+        assert [r[0] for r in first.read_records()] == [3]
+    finally:
+        first.close()
+        second.close()
+
+
+def test_record_being_overwritten_is_dropped(ring):
+    for i in range(4):
+        ring.append(record(i))
+    # The writer has started on record 4, which overwrites record 0's slot,
+    # but hasn't published it yet.
+    _COUNT.pack_into(ring.shm.buf, _WRITING_OFFSET, 4)
+    data = ring.read_bytes()
+    assert np.frombuffer(data)[:: len(FIELDS)].tolist() == [1, 2, 3]
+    assert ring.dropped == 1
+
+
+def test_views_skip_record_being_overwritten(ring):
+    for i in range(4):
+        ring.append(record(i))
+    _COUNT.pack_into(ring.shm.buf, _WRITING_OFFSET, 5)
+    chunks = ring.read()
+    values = np.concatenate([np.asarray(chunk) for chunk in chunks])
+    assert values[:: len(FIELDS)].tolist() == [2, 3]
+    assert ring.dropped == 2
+
+
+def test_attach_rejects_other_memory():
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(create=True, size=64)
+    try:
+        with pytest.raises(ValueError):
+            SampleRing(shm)
+    finally:
+        shm.close()
+        shm.unlink()
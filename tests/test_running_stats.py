@@ -0,0 +1,64 @@
+from math import isnan
+
+import numpy as np
+import pytest
+
+from magnetometer.running_stats import RunningStats, WindowedStats
+
+
+def assert_matches(stats, values):
+    values = np.asarray(values)
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(values.mean(), abs=1e-9)
+    std = values.std(ddof=1) if len(values) > 1 else 0.0
+    assert stats.std == pytest.approx(std, abs=1e-9)
+    assert stats.rms == pytest.approx(np.sqrt((values**2).mean()), abs=1e-9)
+    assert stats.min == values.min()
+    assert stats.max == values.max()
+    assert stats.peak_to_peak == values.max() - values.min()
+
+
+def test_running_matches_numpy():
+    values = np.random.default_rng(0).normal(1e4, 3, size=300)
+    stats = RunningStats()
+    for i, value in enumerate(values, 1):
+        stats.append(value)
+        assert_matches(stats, values[:i])
+
+
+@pytest.mark.parametrize("window", [1, 2, 7, 50])
+def test_windowed_matches_numpy(window):
+    rng = np.random.default_rng(window)
+    # A drifting signal with spikes, so min and max change hands.
+    values = np.cumsum(rng.normal(size=400)) + 100 * (rng.random(400) > 0.97)
+    stats = WindowedStats(window)
+    for i, value in enumerate(values, 1):
+        stats.append(float(value))
+        # Before and after the window fills, and across the periodic
+        # recompute of the sums.
+        assert_matches(stats, values[max(i - window, 0) : i])
+
+
+def test_windowed_large_offset_stays_accurate():
+    values = 5e6 + np.random.default_rng(1).normal(size=5000)
+    stats = WindowedStats(100)
+    for value in values:
+        stats.append(float(value))
+    assert stats.std == pytest.approx(values[-100:].std(ddof=1), rel=1e-6)
+
+
+def test_empty_and_reset():
+    stats = WindowedStats(3)
+    assert isnan(stats.min) and isnan(stats.max) and isnan(stats.rms)
+    for value in (1.0, 2.0, 3.0, 4.0):
+        stats.append(value)
+    stats.reset()
+    assert stats.count == 0
+    assert isnan(stats.max)
+    stats.append(-1.0)
+    assert_matches(stats, [-1.0])
+
+
+def test_window_must_be_positive():
+    with pytest.raises(ValueError):
+        WindowedStats(0)
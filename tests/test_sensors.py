@@ -0,0 +1,31 @@
+import pytest
+
+from magnetometer.sensors import get_sensor
+
+
+@pytest.fixture
+def sensor():
+    sensor = get_sensor("lis3mdl")("emulated", sda=0, scl=1)
+    yield sensor
+    sensor.close()
+
+
+def test_reconnect_warm(sensor):
+    sensor("sentinel = 1")
+    sensor.reconnect()
+    assert sensor.warm
+    # Same interpreter, so the sensor was not set up again.
+    assert sensor("sentinel") == 1
+    assert len(sensor.read()) == 3
+
+
+def test_reconnect_after_reboot(sensor):
+    sensor._board.reboot()
+    sensor.reconnect()
+    assert not sensor.warm
+    assert sensor("_magnetometer_config") == sensor.config
+    assert len(sensor.read()) == 3
+
+
+def test_sin_close():
+    get_sensor("sin")("emulated", sda=0, scl=1).close()
@@ -0,0 +1,107 @@
+import asyncio
+import socket
+import threading
+import time
+from contextlib import contextmanager, suppress
+
+import pytest
+
+from magnetometer.ring import FIELDS, SampleRing
+from magnetometer.server import StreamClient, StreamServer
+
+
+def free_tcp_address():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return f"127.0.0.1:{probe.getsockname()[1]}"
+
+
+@pytest.fixture(params=["unix", "tcp"])
+def address(request, tmp_path):
+    if request.param == "unix":
+        if not hasattr(socket, "AF_UNIX"):
+            pytest.skip("No Unix sockets.")
+        return str(tmp_path / "magnetometer.sock")
+    return free_tcp_address()
+
+
+@contextmanager
+def serving(ring, address):
+    server = StreamServer(ring, "lis3mdl", address, batch_interval=0.01)
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(server.serve())
+
+    def run():
+        with suppress(asyncio.CancelledError):
+            loop.run_until_complete(task)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    try:
+        yield server
+    finally:
+        loop.call_soon_threadsafe(task.cancel)
+        thread.join()
+        loop.close()
+
+
+def connect(address):
+    deadline = time.monotonic() + 5
+    while True:
+        try:
+            return StreamClient(address)
+        except (ConnectionRefusedError, FileNotFoundError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.01)
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def receive(client, n):
+    records = []
+    while len(records) < n:
+        records.extend(client.read_records(block=True))
+    return records
+
+
+def record(i):
+    return (float(i),) * len(FIELDS)
+
+
+def test_round_trip_and_disconnect(address):
+    with SampleRing.create(64) as ring, serving(ring, address) as server:
+        with connect(address) as first, connect(address) as second:
+            assert first.sensor_name == "lis3mdl"
+            wait_for(lambda: len(server.subscribers) == 2)
+            for i in range(5):
+                ring.append(record(i))
+            assert receive(first, 5) == [record(i) for i in range(5)]
+            assert receive(second, 5) == [record(i) for i in range(5)]
+            assert first.dropped == 0
+
+            first.close()
+            wait_for(lambda: len(server.subscribers) == 1)
+            # The remaining subscriber keeps receiving.
+            ring.append(record(5))
+            assert receive(second, 1) == [record(5)]
+
+        wait_for(lambda: not server.subscribers)
+        # New subscribers get records from when they connect.
+        with connect(address) as third:
+            wait_for(lambda: len(server.subscribers) == 1)
+            ring.append(record(6))
+            assert receive(third, 1) == [record(6)]
+
+
+def test_client_notices_server_stopping(address):
+    with SampleRing.create(64) as ring:
+        with serving(ring, address):
+            client = connect(address)
+        with client, pytest.raises(ConnectionError):
+            list(client.read_records(block=True))
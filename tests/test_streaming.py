@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+import magnetometer
+
+
+def test_stream_default_pins():
+    with magnetometer.stream("emulated", "mmc5603", interval=0) as stream:
+        batch = next(stream)
+        assert len(batch)
+        assert stream.sensor.sda == 0
+        assert stream.sensor.scl == 1
+
+
+def test_close_during_iteration():
+    stream = magnetometer.stream("emulated", "lis3mdl", interval=0)
+    batches = 0
+    for _ in stream:
+        batches += 1
+        stream.close()
+    assert batches == 1
+    assert stream.sensor is None
+    assert stream.ring is None
+    with pytest.raises(ValueError, match="closed"):
+        stream.open()
+
+
+def test_close_during_async_iteration():
+    async def run(stream):
+        batches = 0
+        async for _ in stream:
+            batches += 1
+            await stream.aclose()
+        return batches
+
+    stream = magnetometer.stream("emulated", "lis3mdl", interval=0)
+    assert asyncio.run(run(stream)) == 1
+    assert stream.ring is None
@@ -0,0 +1,80 @@
+import csv
+
+import numpy as np
+import pytest
+
+from magnetometer.trigger import TriggeredCapture
+
+T0 = 1.7e9
+RATE = 100.0
+
+
+def batch(start, magnitudes):
+    times = T0 + (start + np.arange(len(magnitudes))) / RATE
+    values = np.zeros((len(magnitudes), 3))
+    values[:, 2] = magnitudes
+    return times, values
+
+
+def rows(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_level_fires_once_with_windows(tmp_path):
+    capture = TriggeredCapture(level=50, pre=5, post=8, directory=tmp_path)
+    signal = np.r_[np.full(20, 10.0), np.full(60, 80.0)]
+    saved = []
+    # Batches split the pre window and the post window.
+    for start, stop in [(0, 17), (17, 22), (22, 80)]:
+        saved += capture(*batch(start, signal[start:stop]))
+
+    # Staying above the level doesn't fire again.
+    assert len(saved) == 1
+    assert capture.events == saved
+    event = rows(saved[0])
+    assert len(event) == 5 + 8
+    notes = [row["note"] for row in event]
+    assert notes.index("level") == 5
+    assert float(event[5]["offset"]) == 0
+    assert float(event[5]["z"]) == 80
+    assert {float(row["z"]) for row in event[:5]} == {10}
+
+
+def test_level_fires_again_after_falling(tmp_path):
+    capture = TriggeredCapture(level=50, pre=2, post=2, directory=tmp_path)
+    signal = np.r_[np.full(5, 10.0), np.full(5, 80.0), np.full(5, 10.0), [80, 80]]
+    assert len(capture(*batch(0, signal))) == 2
+
+
+def test_capturing_until_post_is_complete(tmp_path):
+    capture = TriggeredCapture(level=50, pre=0, post=10, directory=tmp_path)
+    assert capture(*batch(0, [10, 60, 60])) == []
+    assert capture.capturing
+    (path,) = capture(*batch(3, np.full(20, 60.0)))
+    assert not capture.capturing
+    assert len(rows(path)) == 10
+
+
+def test_slope(tmp_path):
+    capture = TriggeredCapture(slope=1000, pre=3, post=3, directory=tmp_path)
+    # 5 μT per sample at 100 Hz is 500 μT/s: too slow to fire.
+    ramp = 5.0 * np.arange(30)
+    assert capture(*batch(0, ramp)) == []
+    # A 20 μT step in one sample is 2000 μT/s.
+    (path,) = capture(*batch(30, np.r_[ramp[-1] + 20, np.full(5, ramp[-1] + 20)]))
+    event = rows(path)
+    assert [row["note"] for row in event].index("slope") == 3
+    assert float(event[2]["z"]) == ramp[-1]
+
+
+def test_saturation(tmp_path):
+    capture = TriggeredCapture(saturation=0.9, pre=1, post=1, directory=tmp_path)
+    assert capture(*batch(0, [10, 95, 99]), full_scale=100) != []
+    # Still saturated: not entering saturation again.
+    assert capture(*batch(3, [99, 99]), full_scale=100) == []
+
+
+def test_needs_a_condition():
+    with pytest.raises(ValueError):
+        TriggeredCapture()
@@ -0,0 +1,25 @@
+import io
+import re
+
+from rich.console import Console
+
+import magnetometer.tui as tui
+from magnetometer.sensors import get_sensor
+
+
+def test_chart_axis_covers_readings():
+    tui.sensor = get_sensor("sin")(None, sda=0, scl=1)
+    chart = tui.Chart()
+    chart.width, chart.height = 80, 24
+    for _ in range(50):
+        chart.read_sensor()
+
+    console = Console(width=80, record=True, file=io.StringIO())
+    console.print(chart._render())
+    text = console.export_text()
+    labels = [float(label) for label in re.findall(r"(-?\d+\.\d+) [┤┼]", text)]
+
+    # The sin sensor reads within ±2 μT per axis, so |B| stays below 3.5 μT.
+    assert labels
+    assert max(labels) < 3.5
+    assert min(labels) >= -2